@@ -1,3 +1,37 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from store.tests import QueryBudgetMixin
+
+
+class AccountQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """Presupuesto de consultas de registro, login y perfil; las búsquedas de usuario van por índice único."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        get_user_model().objects.bulk_create([
+            get_user_model()(username=f'usuario{i}', email=f'usuario{i}@test.com') for i in range(50)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_register_and_login(self):
+        response = self.assertQueryBudget(3, 'post', '/api/accounts/register/', { # email libre, username libre, INSERT
+            'username': 'nuevo', 'email': 'nuevo@test.com', 'password': 'Test1234!', 'password2': 'Test1234!',
+        }, status_code=201)
+        self.assertEqual(response.data['user']['username'], 'nuevo')
+        response = self.assertQueryBudget(2, 'post', '/api/accounts/login/', { # Usuario + last_login
+            'username': 'cliente', 'password': 'Test1234!',
+        })
+        self.assertIn('access', response.data)
+
+    def test_profile(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.assertQueryBudget(1, 'get', '/api/accounts/profile/')
+        # Usuario (JWT), unicidad del email (UniqueValidator del modelo y validate_email normalizado), UPDATE
+        response = self.assertQueryBudget(4, 'patch', '/api/accounts/profile/update/', {'email': 'Otro@Test.com'})
+        self.assertEqual(response.data['email'], 'otro@test.com')
@@ -55,12 +55,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Lookups de trigramas y búsqueda de texto completo
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'store.profiling.ProfilingMiddleware',  # Primero para medir también el resto del middleware; sin REQUEST_PROFILING se descarta al arrancar
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Para servir archivos estáticos en producción
+    'store.middleware.CompressionMiddleware',  # brotli/gzip de las respuestas de la API (después de WhiteNoise: no toca estáticos)
     'corsheaders.middleware.CorsMiddleware', # <-- Moverlo arriba, después de SecurityMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -207,14 +210,42 @@ REST_FRAMEWORK = {
         'rest_framework.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/day',
-        'user': '1000/day'
+        # Configurables para las pruebas de carga locales (load_tests/), donde todo llega desde una sola IP
+        'anon': os.environ.get('THROTTLE_RATE_ANON', '100/day'),
+        'user': os.environ.get('THROTTLE_RATE_USER', '1000/day'),
+        'product_suggest': os.environ.get('THROTTLE_RATE_SUGGEST', '120/minute'),  # Autocompletado: una petición por tecla
     },
+    'DEFAULT_RENDERER_CLASSES': (
+        'store.renderers.ORJSONRenderer',  # JSON con orjson
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'store.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
 }
 
+# Caché en proceso de reglas de cupones (store/coupon_cache.py)
+COUPON_CACHE_MAX_SIZE = int(os.environ.get('COUPON_CACHE_MAX_SIZE', 1024))  # Entradas LRU (incluye códigos inexistentes)
+COUPON_CACHE_TIMEOUT = int(os.environ.get('COUPON_CACHE_TIMEOUT', 300))  # Segundos; acota cambios hechos en otros procesos
+
+# Vigencia (segundos) del quote_token que devuelve /api/cart/price/
+CART_QUOTE_MAX_AGE = int(os.environ.get('CART_QUOTE_MAX_AGE', 600))
+
+# Respuestas de la API más pequeñas que esto (bytes) no se comprimen
+API_COMPRESSION_MIN_SIZE = int(os.environ.get('API_COMPRESSION_MIN_SIZE', 1024))
+
+# Perfilado de peticiones (store/profiling.py): Server-Timing, estadísticas por ruta y volcados de cProfile en /api/profiling/
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', 'False') == 'True'
+REQUEST_PROFILING_SAMPLE_RATE = int(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 100))  # Perfila 1 de cada N peticiones (0 = ninguna)
+REQUEST_PROFILING_SLOW_MS = float(os.environ.get('REQUEST_PROFILING_SLOW_MS', 0))  # > 0: perfila todas y guarda las más lentas (costoso)
+REQUEST_PROFILING_DIR = os.environ.get('REQUEST_PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+REQUEST_PROFILING_MAX_DUMPS = int(os.environ.get('REQUEST_PROFILING_MAX_DUMPS', 50))  # Se borran los más antiguos
+
 # Configuración de DRF Simple JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),  # Token de acceso dura 1 hora
@@ -250,7 +281,7 @@ SIMPLE_JWT = {
 # Configuraciones de seguridad adicionales para producción
 if not DEBUG:
     # HTTPS/SSL
-    SECURE_SSL_REDIRECT = True
+    SECURE_SSL_REDIRECT = os.environ.get('SECURE_SSL_REDIRECT', 'True') == 'True'  # False para servir HTTP en local (load_tests/)
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
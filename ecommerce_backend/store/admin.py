@@ -1,32 +1,77 @@
 from django.contrib import admin
+from django.core.cache import cache
 from django.utils.html import format_html
-from .models import Category, Product, Coupon
+from .models import Category, Product, Coupon, Order, OrderItem
+
+SUPPLIERS_CACHE_KEY = 'admin_product_suppliers'
+SUPPLIERS_CACHE_TIMEOUT = 600
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug', 'product_count')
+    list_display = ('name', 'slug', 'products', 'in_stock_count')
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ('product_count', 'in_stock_count')
     ordering = ('name',)
     
-    def product_count(self, obj):
-        count = obj.products.count()
-        return format_html('<span style="color: #28a745; font-weight: bold;">{}</span>', count)
-    product_count.short_description = 'Productos'
+    def products(self, obj):
+        # Contador desnormalizado: sin una query por fila del listado
+        return format_html('<span style="color: #28a745; font-weight: bold;">{}</span>', obj.product_count)
+    products.short_description = 'Productos'
+    products.admin_order_field = 'product_count'
+
+class InStockFilter(admin.SimpleListFilter):
+    # Opciones fijas: list_filter = ('stock',) hacía un SELECT DISTINCT stock sobre todo el catálogo
+    title = 'disponibilidad'
+    parameter_name = 'in_stock'
+
+    def lookups(self, request, model_admin):
+        return (('1', 'Con stock'), ('0', 'Agotado'))
+
+    def queryset(self, request, queryset):
+        if self.value() == '1':
+            return queryset.filter(stock__gt=0)
+        if self.value() == '0':
+            return queryset.filter(stock=0)
+        return queryset
+
+class SupplierFilter(admin.SimpleListFilter):
+    title = 'proveedor'
+    parameter_name = 'supplier'
+
+    def lookups(self, request, model_admin):
+        suppliers = cache.get(SUPPLIERS_CACHE_KEY)
+        if suppliers is None:
+            # Los productos de feeds siempre traen external_id: la consulta recorre el índice
+            # único parcial (supplier, external_id) en vez de la tabla completa
+            suppliers = list(
+                Product.objects.filter(external_id__isnull=False).order_by('supplier')
+                .values_list('supplier', flat=True).distinct()
+            )
+            cache.set(SUPPLIERS_CACHE_KEY, suppliers, SUPPLIERS_CACHE_TIMEOUT)
+        return [('', 'Propios')] + [(supplier, supplier) for supplier in suppliers if supplier]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        return queryset if value is None else queryset.filter(supplier=value)
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'price', 'stock', 'created_at')
-    list_filter = ('category', 'created_at', 'stock')
-    search_fields = ('name', 'description', 'category__name')
+    list_filter = ('category', SupplierFilter, 'created_at', InStockFilter)
+    search_fields = ('name', 'description', 'category__name', 'external_id')
     readonly_fields = ('created_at', 'updated_at')
     ordering = ('-created_at',)
     list_per_page = 25
+    show_full_result_count = False # Evita un segundo COUNT(*) del catálogo completo al filtrar
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_document')
 
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
-    list_display = ('code', 'discount_type', 'discount_value', 'active', 'used_count', 'usage_limit')
-    list_filter = ('active', 'discount_type', 'created_at')
+    list_display = ('code', 'discount_type', 'discount_value', 'active', 'is_public', 'used_count', 'usage_limit')
+    list_filter = ('active', 'is_public', 'discount_type', 'created_at')
     search_fields = ('code',)
     readonly_fields = ('used_count', 'created_at', 'updated_at')
     ordering = ('-created_at',)
@@ -34,7 +79,7 @@ class CouponAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Información del Cupón', {
-            'fields': ('code', 'discount_type', 'discount_value', 'active')
+            'fields': ('code', 'discount_type', 'discount_value', 'active', 'is_public')
         }),
         ('Restricciones', {
             'fields': ('minimum_amount', 'valid_from', 'valid_until')
@@ -48,6 +93,23 @@ class CouponAdmin(admin.ModelAdmin):
         }),
     )
 
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = ('product', 'product_name', 'unit_price', 'quantity', 'line_total')
+    can_delete = False
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'total', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__username', 'user__email', 'shipping_address')
+    readonly_fields = ('user', 'subtotal', 'shipping_cost', 'total', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    inlines = [OrderItemInline]
+    ordering = ('-created_at',)
+    list_per_page = 25
+
 # Personalizar el sitio de administración
 admin.site.site_header = "Ecommerce - Panel de Administración"
 admin.site.site_title = "Admin Ecommerce"
@@ -0,0 +1,54 @@
+"""
+Carga masiva de productos (import_catalog, generate_synthetic_catalog).
+
+En PostgreSQL se usa COPY ... FROM STDIN; en otros motores, un INSERT con
+executemany. Ambos escriben las columnas tal cual, incluido created_at,
+así que los triggers de la BD (search_document) siguen aplicándose.
+
+El módulo no importa modelos al cargarse: store.synthetic lo usa desde
+procesos de trabajo que no inicializan Django.
+"""
+import io
+
+from django.db import connection
+
+PRODUCT_TABLE = 'store_product'
+PRODUCT_COLUMNS = ('category_id', 'name', 'description', 'price', 'stock', 'image_url', 'created_at', 'updated_at')
+
+
+def copy_text(value):
+    """Valor en el formato de texto de COPY (\\N es NULL; se escapan separadores)."""
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_line(values):
+    return '\t'.join(copy_text(value) for value in values) + '\n'
+
+
+def copy_products(text):
+    """Carga filas ya renderizadas con copy_line() (una por línea) mediante COPY."""
+    sql = f'COPY {PRODUCT_TABLE} ({", ".join(PRODUCT_COLUMNS)}) FROM STDIN'
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'): # psycopg2
+            raw.copy_expert(sql, io.StringIO(text))
+        else: # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(text)
+
+
+def insert_products(rows):
+    """Inserta tuplas en el orden de PRODUCT_COLUMNS con un único executemany (motores sin COPY)."""
+    ops = connection.ops
+    rows = [
+        (category_id, name, description, ops.adapt_decimalfield_value(price, 10, 2), stock, image_url,
+         ops.adapt_datetimefield_value(created_at), ops.adapt_datetimefield_value(updated_at))
+        for category_id, name, description, price, stock, image_url, created_at, updated_at in rows
+    ]
+    placeholders = ', '.join(['%s'] * len(PRODUCT_COLUMNS))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {PRODUCT_TABLE} ({", ".join(PRODUCT_COLUMNS)}) VALUES ({placeholders})', rows,
+        )
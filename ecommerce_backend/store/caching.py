@@ -0,0 +1,89 @@
+"""
+GET condicional (ETag / Last-Modified) para los listados y detalles del catálogo.
+
+La versión del catálogo sale de tres valores baratos de obtener:
+
+- Max(updated_at) de productos: se lee del extremo del índice product_updated_idx.
+  Todas las escrituras de productos (ORM, SQL de inventario, COPY, sincronización)
+  actualizan updated_at.
+- Max(updated_at) y Count() de categorías: tabla pequeña. Una categoría se toca
+  al renombrarla y cada vez que cambian sus contadores de productos (altas,
+  bajas, agotados), así que las eliminaciones también cambian la versión.
+
+No se cuenta por filtro: un COUNT sobre el catálogo cuesta más que servir la
+página. Si la versión no cambió, ninguna combinación de filtros cambió: el
+ETag combina la versión con la URL completa y el tipo de contenido.
+
+Last-Modified tiene resolución de segundos. Mientras el segundo del último
+cambio no termina, otro cambio en ese mismo segundo no lo movería, así que no
+se envía ni se evalúa If-Modified-Since: queda solo el ETag (que además tiene
+precedencia sobre If-Modified-Since cuando llegan ambos, RFC 9110 §13.2.2).
+"""
+import hashlib
+import time
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Category, Product
+
+
+def catalog_version():
+    """(último cambio del catálogo, clave de versión). El datetime es None si el catálogo está vacío."""
+    products = Product.objects.order_by().aggregate(updated=Max('updated_at'))
+    categories = Category.objects.order_by().aggregate(updated=Max('updated_at'), count=Count('id'))
+    stamps = [stamp for stamp in (products['updated'], categories['updated']) if stamp is not None]
+    last_modified = max(stamps) if stamps else None
+    key = f'{products["updated"]}|{categories["updated"]}|{categories["count"]}'
+    return last_modified, key
+
+
+class CatalogCacheMixin:
+    """
+    Agrega GET condicional a list/retrieve de un ViewSet del catálogo.
+
+    Con la versión sin cambios responde 304 antes de consultar la página y de
+    serializar. Las respuestas anónimas son públicas para el CDN (s-maxage) y
+    el navegador revalida siempre (max-age=0), recibiendo 304 casi gratis.
+    """
+    cache_max_age = 0 # Navegador: revalida en cada navegación
+    cache_s_maxage = 60 # CDN / caché compartida
+    cache_stale_while_revalidate = 300
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def conditional_response(self, request, view, *args, **kwargs):
+        last_modified, version = self.catalog_version = catalog_version() # La vista puede reutilizarla (p. ej. en claves de caché)
+        representation = f'{version}|{request.get_full_path()}|{request.accepted_media_type}'
+        etag = 'W/"%s"' % hashlib.md5(representation.encode('utf-8')).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        if timestamp is not None and timestamp >= int(time.time()):
+            timestamp = None # Segundo en curso: un cambio más en este segundo dejaría el mismo Last-Modified
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        self.patch_cache_headers(request, response)
+        return response
+
+    def patch_cache_headers(self, request, response):
+        if request.user.is_authenticated:
+            # Los administradores ven sus cambios al instante; el CDN no guarda respuestas con credenciales
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=self.cache_max_age, s_maxage=self.cache_s_maxage,
+                stale_while_revalidate=self.cache_stale_while_revalidate,
+            )
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding', 'Authorization'))
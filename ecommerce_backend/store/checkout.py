@@ -0,0 +1,221 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .coupon_cache import coupon_rules
+from .coupons import compute_discount, coupon_rejection, get_coupon, normalize_coupon_code, redeem_coupon
+from .models import Category, Order, OrderItem, Product, count_change
+
+FREE_SHIPPING_THRESHOLD = Decimal('100.00') # Igual que Checkout.jsx: envío gratis desde S/.100
+SHIPPING_COST = Decimal('15.00')
+QUOTE_SALT = 'store.checkout.quote'
+
+
+class InsufficientStock(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'No hay suficiente stock para completar el pedido.'
+    default_code = 'insufficient_stock'
+
+    def __init__(self, items):
+        super().__init__()
+        # Se conservan los enteros de 'items' (APIException los convertiría a texto)
+        self.detail = {'detail': self.default_detail, 'items': items}
+
+
+def merge_lines(lines):
+    """Agrupa las líneas por producto: {product_id: cantidad total}."""
+    quantities = {}
+    for line in lines:
+        quantities[line['product_id']] = quantities.get(line['product_id'], 0) + line['quantity']
+    return quantities
+
+
+def cart_subtotal(quantities):
+    """
+    Subtotal de {product_id: cantidad} con precios actuales, en una sola query.
+    Lanza ValidationError si algún producto no existe.
+    """
+    prices = dict(Product.objects.filter(id__in=quantities.keys()).values_list('id', 'price'))
+    missing = sorted(set(quantities) - set(prices))
+    if missing:
+        raise ValidationError({'items': [f'Producto {product_id} no existe.' for product_id in missing]})
+    return sum((prices[product_id] * quantity for product_id, quantity in quantities.items()), Decimal('0.00'))
+
+
+def shipping_for(subtotal):
+    return Decimal('0.00') if subtotal >= FREE_SHIPPING_THRESHOLD else SHIPPING_COST
+
+
+def price_cart(lines, coupon_code=None):
+    """
+    Cotiza un carrito con precios y stock actuales.
+
+    Todas las líneas se cargan con un único values_list sobre id__in y el
+    cupón sale de la caché en proceso, así que el número de queries no
+    depende del tamaño del carrito. Devuelve el detalle por línea, los totales
+    y un quote_token firmado con los precios cotizados para el checkout.
+    """
+    quantities = merge_lines(lines)
+    rows = Product.objects.filter(id__in=quantities.keys()).values_list('id', 'name', 'price', 'stock')
+    products = {row[0]: row for row in rows}
+
+    missing = sorted(set(quantities) - set(products))
+    if missing:
+        raise ValidationError({'items': [f'Producto {product_id} no existe.' for product_id in missing]})
+
+    subtotal = Decimal('0.00')
+    items = []
+    for product_id, quantity in quantities.items():
+        _, name, price, stock = products[product_id]
+        line_total = price * quantity
+        subtotal += line_total
+        items.append({
+            'product_id': product_id,
+            'name': name,
+            'unit_price': price,
+            'quantity': quantity,
+            'line_total': line_total,
+            'stock': stock,
+            'available': stock >= quantity,
+        })
+
+    discount, coupon_detail = Decimal('0.00'), None
+    if coupon_code:
+        coupon = coupon_rules.get(coupon_code)
+        coupon_detail = 'Cupón inválido o no existe.' if coupon is None else coupon.rejection(subtotal)
+        if coupon_detail is None:
+            coupon_code = coupon.code
+            discount = coupon.discount(subtotal)
+        else:
+            coupon_code = None
+    shipping_cost = shipping_for(subtotal)
+
+    quote = {
+        'l': [[item['product_id'], item['quantity'], str(item['unit_price'])] for item in items],
+        'c': coupon_code or '',
+    }
+    return {
+        'items': items,
+        'available': all(item['available'] for item in items),
+        'subtotal': subtotal,
+        'coupon_code': coupon_code or None,
+        'coupon_detail': coupon_detail,
+        'discount': discount,
+        'shipping_cost': shipping_cost,
+        'total': subtotal - discount + shipping_cost,
+        'quote_token': signing.dumps(quote, salt=QUOTE_SALT, compress=True),
+        'expires_in': settings.CART_QUOTE_MAX_AGE,
+    }
+
+
+def load_quote(token, lines, coupon_code=None):
+    """
+    Valida un quote_token de price_cart() contra el carrito del checkout.
+    Devuelve {product_id: precio cotizado}; lanza ValidationError si la
+    cotización expiró, fue alterada o no corresponde a las líneas y el cupón.
+    """
+    try:
+        quote = signing.loads(token, salt=QUOTE_SALT, max_age=settings.CART_QUOTE_MAX_AGE)
+    except signing.SignatureExpired:
+        raise ValidationError({'quote_token': ['La cotización expiró, vuelve a cotizar el carrito.']})
+    except signing.BadSignature:
+        raise ValidationError({'quote_token': ['Cotización inválida.']})
+
+    quantities = {product_id: quantity for product_id, quantity, _ in quote['l']}
+    if quantities != merge_lines(lines) or quote['c'] != normalize_coupon_code(coupon_code):
+        raise ValidationError({'quote_token': ['La cotización no corresponde al carrito, vuelve a cotizarlo.']})
+    return {product_id: Decimal(price) for product_id, _, price in quote['l']}
+
+
+def place_order(user, lines, shipping_address, coupon_code=None, quoted_prices=None):
+    """
+    Crea un pedido y descuenta el stock en una sola transacción.
+
+    - Un único SELECT ... WHERE id IN (...) ORDER BY id FOR UPDATE obtiene los
+      precios y bloquea las filas. Bloquear siempre en orden de clave primaria
+      evita deadlocks entre checkouts que comparten productos.
+    - El stock se descuenta con un bulk_update y los ítems con bulk_create,
+      así que el número de queries no depende de la cantidad de líneas.
+    - Si hay cupón, su uso se registra con redeem_coupon() dentro de la misma
+      transacción: si el pedido falla, el uso no se consume.
+    - Con quoted_prices (de load_quote) se respetan los precios cotizados en
+      lugar de volver a cotizar; el stock se valida igual.
+    """
+    quantities = merge_lines(lines)
+
+    with transaction.atomic():
+        products = list(
+            Product.objects
+            .select_for_update()
+            .filter(id__in=quantities.keys())
+            .order_by('id')
+            .only('id', 'name', 'price', 'stock', 'category_id')
+        )
+
+        missing = sorted(set(quantities) - {product.id for product in products})
+        if missing:
+            raise ValidationError({'items': [f'Producto {product_id} no existe.' for product_id in missing]})
+
+        shortages = [
+            {'product_id': product.id, 'name': product.name, 'requested': quantities[product.id], 'available': product.stock}
+            for product in products
+            if product.stock < quantities[product.id]
+        ]
+        if shortages:
+            raise InsufficientStock(shortages)
+
+        now = timezone.now()
+        subtotal = Decimal('0.00')
+        items, deltas = [], {}
+        for product in products:
+            quantity = quantities[product.id]
+            # Solo cambia in_stock_count de la categoría si el producto se agota con este pedido
+            count_change(deltas, (product.category_id, product.stock), (product.category_id, product.stock - quantity))
+            unit_price = quoted_prices[product.id] if quoted_prices else product.price
+            line_total = unit_price * quantity
+            subtotal += line_total
+            product.stock -= quantity
+            product.updated_at = now
+            items.append(OrderItem(
+                product=product,
+                product_name=product.name,
+                unit_price=unit_price,
+                quantity=quantity,
+                line_total=line_total,
+            ))
+        Product.objects.bulk_update(products, ['stock', 'updated_at'])
+        Category.objects.apply_count_deltas(deltas)
+
+        coupon, discount = None, Decimal('0.00')
+        if coupon_code:
+            coupon = get_coupon(coupon_code)
+            if coupon is None:
+                raise ValidationError({'coupon_code': ['Cupón inválido o no existe.']})
+            rejection = coupon_rejection(coupon, subtotal, now)
+            if rejection is None and not redeem_coupon(coupon, now):
+                rejection = 'Este cupón ha alcanzado su límite de usos.' # Agotado por otro pedido en paralelo
+            if rejection:
+                coupon_rules.invalidate(coupon.code)
+                raise ValidationError({'coupon_code': [rejection]})
+            discount = compute_discount(coupon, subtotal)
+
+        shipping_cost = shipping_for(subtotal)
+        order = Order.objects.create(
+            user=user,
+            shipping_address=shipping_address,
+            subtotal=subtotal,
+            coupon=coupon,
+            discount=discount,
+            shipping_cost=shipping_cost,
+            total=subtotal - discount + shipping_cost,
+        )
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+
+    return order
@@ -0,0 +1,148 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .coupons import compute_discount, coupon_rejection, normalize_coupon_code
+from .models import Coupon
+
+
+class CouponRule:
+    """
+    Copia inmutable de las reglas de un cupón, lista para validar sin tocar la base de datos.
+
+    used_count no se copia: cambia con cada pedido (un UPDATE sin señales, quizá
+    en otro proceso), así que los cupones con límite de usos lo leen de la base
+    de datos al validarse. Los ilimitados nunca lo consultan.
+    """
+    __slots__ = (
+        'id', 'code', 'discount_type', 'discount_value', 'active', 'valid_from', 'valid_until',
+        'minimum_amount', 'usage_limit',
+    )
+
+    def __init__(self, coupon):
+        for name in self.__slots__:
+            setattr(self, name, getattr(coupon, name))
+
+    @property
+    def used_count(self):
+        used_count = Coupon.objects.filter(pk=self.id).values_list('used_count', flat=True).first()
+        return self.usage_limit if used_count is None else used_count # Eliminado mientras tanto: agotado
+
+    def rejection(self, cart_total, now=None):
+        return coupon_rejection(self, cart_total, now)
+
+    def discount(self, cart_total):
+        return compute_discount(self, cart_total)
+
+
+class BloomFilter:
+    """Filtro de Bloom simple: 'no está' es seguro, 'está' puede ser un falso positivo."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(value))
+
+
+_MISSING = object() # Resultado negativo cacheado ("el código no existe")
+
+
+class CouponRuleCache:
+    """
+    Caché en proceso de reglas de cupones por código normalizado.
+
+    - LRU acotado con expiración (COUPON_CACHE_MAX_SIZE, COUPON_CACHE_TIMEOUT).
+    - Cachea también los códigos inexistentes, de modo que los intentos con
+      códigos al azar no llegan a la base de datos.
+    - Un filtro de Bloom con todos los códigos rechaza de inmediato los que no
+      existen; se reconstruye con una sola query cuando expira.
+    - Las señales de Coupon invalidan las entradas del código actual y del
+      anterior si se renombró (ver store/signals.py). En otros procesos los
+      cambios se ven al expirar; used_count no se cachea (ver CouponRule).
+    - Cada invalidación avanza una generación: una lectura de la base de datos
+      que empezó antes no se guarda, para no pisar la invalidación con datos viejos.
+    """
+
+    def __init__(self, max_size=None, timeout=None):
+        self.max_size = max_size or getattr(settings, 'COUPON_CACHE_MAX_SIZE', 1024)
+        self.timeout = timeout or getattr(settings, 'COUPON_CACHE_TIMEOUT', 300)
+        self._entries = OrderedDict()
+        self._bloom = None
+        self._bloom_expires = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bloom = None
+            self._generation += 1
+
+    def invalidate(self, code):
+        """Descarta la entrada de un código y lo agrega al filtro (por si es un cupón nuevo)."""
+        code = normalize_coupon_code(code)
+        with self._lock:
+            self._entries.pop(code, None)
+            if self._bloom is not None:
+                self._bloom.add(code)
+            self._generation += 1
+
+    def _load_bloom(self, now):
+        codes = list(Coupon.objects.values_list('code', flat=True))
+        bloom = BloomFilter(capacity=len(codes) * 2)
+        for code in codes:
+            bloom.add(code)
+        self._bloom, self._bloom_expires = bloom, now + self.timeout
+
+    def get(self, code):
+        """Devuelve el CouponRule del código, o None si no existe."""
+        code = normalize_coupon_code(code)
+        if not code:
+            return None
+        now = time.monotonic()
+
+        with self._lock:
+            if self._bloom is None or now >= self._bloom_expires:
+                self._load_bloom(now)
+            if code not in self._bloom:
+                return None
+
+            entry = self._entries.get(code)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(code)
+                return None if entry[0] is _MISSING else entry[0]
+            generation = self._generation
+
+        rule = self._fetch(code)
+
+        with self._lock:
+            if generation == self._generation: # Sin invalidaciones durante la lectura
+                self._entries[code] = (rule, now + self.timeout)
+                self._entries.move_to_end(code)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return None if rule is _MISSING else rule
+
+    def _fetch(self, code):
+        coupon = Coupon.objects.filter(code=code).first()
+        return CouponRule(coupon) if coupon is not None else _MISSING
+
+
+coupon_rules = CouponRuleCache()
@@ -0,0 +1,96 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Coupon
+
+CENT = Decimal('0.01')
+
+
+def normalize_coupon_code(code):
+    """Los códigos se guardan y se buscan en mayúsculas y sin espacios alrededor."""
+    return (code or '').strip().upper()
+
+
+def get_coupon(code):
+    """Busca un cupón por código normalizado (usa el índice único). Devuelve None si no existe."""
+    code = normalize_coupon_code(code)
+    if not code:
+        return None
+    return Coupon.objects.filter(code=code).first()
+
+
+def coupon_rejection(coupon, cart_total, now=None):
+    """
+    Devuelve el motivo por el que el cupón no se puede aplicar a `cart_total`,
+    o None si es aplicable.
+    """
+    now = now or timezone.now()
+    if not coupon.active:
+        return 'Cupón inactivo.'
+    if coupon.valid_from and now < coupon.valid_from:
+        return 'Este cupón aún no es válido.'
+    if coupon.valid_until and now > coupon.valid_until:
+        return 'Este cupón ha expirado.'
+    if cart_total < coupon.minimum_amount:
+        return f'El monto mínimo de compra para este cupón es S/.{coupon.minimum_amount}.'
+    if coupon.usage_limit != -1 and coupon.used_count >= coupon.usage_limit:
+        return 'Este cupón ha alcanzado su límite de usos.'
+    return None
+
+
+def compute_discount(coupon, cart_total):
+    """Descuento en Decimal, redondeado a céntimos y nunca mayor que el total."""
+    if coupon.discount_type == 'percentage':
+        discount = (cart_total * coupon.discount_value / Decimal('100')).quantize(CENT, rounding=ROUND_HALF_UP)
+    else:
+        discount = coupon.discount_value
+    return min(discount, cart_total)
+
+
+def rank_coupons(coupons, cart_total, now=None):
+    """
+    Evalúa varios cupones contra el mismo total en una sola pasada.
+
+    Devuelve una lista de dicts ordenada: primero los aplicables, de mayor a
+    menor descuento; luego los rechazados con su motivo. Todo en Decimal.
+    """
+    now = now or timezone.now()
+    results = []
+    for coupon in coupons:
+        rejection = coupon_rejection(coupon, cart_total, now)
+        discount = Decimal('0.00') if rejection else compute_discount(coupon, cart_total).quantize(CENT)
+        results.append({
+            'code': coupon.code,
+            'discount_type': coupon.discount_type,
+            'discount_value': coupon.discount_value,
+            'applicable': rejection is None,
+            'discount_amount': discount,
+            'final_total': (cart_total - discount).quantize(CENT),
+            'detail': rejection,
+        })
+    results.sort(key=lambda result: (not result['applicable'], -result['discount_amount'], result['code']))
+    return results
+
+
+def redeem_coupon(coupon, now=None):
+    """
+    Registra un uso del cupón con un único UPDATE condicional:
+
+        UPDATE ... SET used_count = used_count + 1
+        WHERE id = %s AND active AND (usage_limit = -1 OR used_count < usage_limit) ...
+
+    La condición se evalúa con la fila bloqueada, así que bajo redenciones en
+    paralelo nunca se emiten más usos que usage_limit. Devuelve True si se aplicó.
+    """
+    now = now or timezone.now()
+    updated = (
+        Coupon.objects
+        .filter(pk=coupon.pk, active=True)
+        .filter(Q(usage_limit=-1) | Q(used_count__lt=F('usage_limit')))
+        .filter(Q(valid_from__isnull=True) | Q(valid_from__lte=now))
+        .filter(Q(valid_until__isnull=True) | Q(valid_until__gte=now))
+        .update(used_count=F('used_count') + 1, updated_at=now)
+    )
+    return updated == 1
@@ -0,0 +1,70 @@
+"""
+Exportación del catálogo en streaming (GET /api/products/export/).
+
+Las filas salen de queryset.values(...).iterator(chunk_size=...), que en
+PostgreSQL usa un cursor del lado del servidor: ni la base de datos ni el
+worker materializan el resultado completo. Se agrupan en bloques de ~64 KB
+y, si el cliente lo acepta, se comprimen con gzip a medida que se generan.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = (
+    'id', 'name', 'description', 'price', 'stock', 'category_id', 'category__slug', 'image_url',
+    'supplier', 'external_id', 'created_at', 'updated_at',
+)
+CHUNK_SIZE = 2000 # Filas por viaje al cursor del servidor
+FLUSH_BYTES = 64 * 1024
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def _ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(['' if row[field] is None else row[field] for field in EXPORT_FIELDS])
+
+
+def _buffered(lines):
+    """Agrupa líneas en bloques de bytes: un write por bloque, no por fila."""
+    parts, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b''.join(parts)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) # wbits=31: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, fmt, gzip=False):
+    """Generador de bytes con el catálogo de `queryset` en 'ndjson' o 'csv'."""
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    lines = _csv_lines(rows) if fmt == 'csv' else _ndjson_lines(rows)
+    chunks = _buffered(lines)
+    return _gzipped(chunks) if gzip else chunks
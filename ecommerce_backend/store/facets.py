@@ -0,0 +1,86 @@
+"""
+Facetas del catálogo (GET /api/products/facets/).
+
+Una sola consulta agregada agrupada por categoría: el total, el conteo con
+stock y un Count(... FILTER (WHERE precio en el tramo)) por tramo de precio.
+Los tramos y la disponibilidad globales se suman en Python a partir de las
+filas por categoría, que son pocas.
+
+El resultado se cachea por filtros normalizados + versión del catálogo
+(store.caching.catalog_version): cualquier escritura genera claves nuevas, así
+que la caché nunca devuelve conteos viejos.
+"""
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+
+from .filters import normalize_suggest_term
+
+DEFAULT_PRICE_EDGES = (Decimal('0'), Decimal('25'), Decimal('50'), Decimal('100'), Decimal('250'), Decimal('500'), Decimal('1000'))
+MAX_PRICE_BUCKETS = 20
+# Parámetros del listado que no cambian el conjunto de productos filtrado
+IGNORED_PARAMS = {'cursor', 'page', 'pagination', 'ordering', 'fields', 'omit', 'format'}
+
+
+def parse_price_edges(value):
+    """'0,50,100' -> (0, 50, 100): límites inferiores de cada tramo; el último queda abierto."""
+    if not value:
+        return DEFAULT_PRICE_EDGES
+    try:
+        edges = tuple(Decimal(part.strip()) for part in value.split(','))
+    except InvalidOperation:
+        raise ValidationError({'price_buckets': ['Usa precios separados por coma, p. ej. 0,50,100.']})
+    if not 1 <= len(edges) <= MAX_PRICE_BUCKETS or any(not edge.is_finite() or edge < 0 for edge in edges):
+        raise ValidationError({'price_buckets': [f'Entre 1 y {MAX_PRICE_BUCKETS} precios no negativos.']})
+    if any(low >= high for low, high in zip(edges, edges[1:])):
+        raise ValidationError({'price_buckets': ['Los precios deben ser crecientes.']})
+    return edges
+
+
+def facet_cache_key(params, search_param, version):
+    """Clave de caché: parámetros que filtran (ordenados, búsqueda normalizada) + versión del catálogo."""
+    normalized = {}
+    for name in sorted(params):
+        if name in IGNORED_PARAMS:
+            continue
+        values = sorted(params.getlist(name))
+        if name == search_param:
+            values = [normalize_suggest_term(value) for value in values]
+        normalized[name] = values
+    payload = json.dumps([normalized, version], separators=(',', ':'), ensure_ascii=False)
+    return 'product_facets:' + hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def facet_counts(queryset, edges):
+    """Conteos por categoría, tramo de precio y disponibilidad en una sola consulta."""
+    buckets = {
+        f'bucket_{index}': Count('id', filter=Q(price__gte=low, price__lt=high) if high is not None else Q(price__gte=low))
+        for index, (low, high) in enumerate(zip(edges, edges[1:] + (None,)))
+    }
+    rows = list(
+        queryset.order_by() # Sin ORDER BY: el orden del listado agregaría columnas al GROUP BY
+        .values('category_id', 'category__slug', 'category__name')
+        .annotate(total=Count('id'), in_stock=Count('id', filter=Q(stock__gt=0)), **buckets)
+    )
+
+    total = sum(row['total'] for row in rows)
+    in_stock = sum(row['in_stock'] for row in rows)
+    return {
+        'total': total,
+        'categories': [
+            {'id': row['category_id'], 'slug': row['category__slug'], 'name': row['category__name'], 'count': row['total']}
+            for row in sorted(rows, key=lambda row: (-row['total'], row['category__name']))
+        ],
+        'price': [
+            {
+                'min': f'{low:.2f}',
+                'max': None if high is None else f'{high:.2f}',
+                'count': sum(row[f'bucket_{index}'] for row in rows),
+            }
+            for index, (low, high) in enumerate(zip(edges, edges[1:] + (None,)))
+        ],
+        'availability': {'in_stock': in_stock, 'out_of_stock': total - in_stock},
+    }
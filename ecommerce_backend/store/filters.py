@@ -0,0 +1,139 @@
+import unicodedata
+
+import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.lookups import Lookup
+from rest_framework import filters
+
+from .models import Category, Product
+
+SEARCH_CONFIG = 'spanish'
+CATEGORY_SLUGS_CACHE_KEY = 'category_ids_by_slug'
+CATEGORY_SLUGS_CACHE_TIMEOUT = 300 # Además se invalida al guardar o eliminar una categoría (signals.py)
+
+
+def category_ids_by_slug():
+    """Mapa {slug: id} de todas las categorías, cacheado (son pocas y casi nunca cambian)."""
+    slugs = cache.get(CATEGORY_SLUGS_CACHE_KEY)
+    if slugs is None:
+        slugs = dict(Category.objects.order_by().values_list('slug', 'id'))
+        cache.set(CATEGORY_SLUGS_CACHE_KEY, slugs, CATEGORY_SLUGS_CACHE_TIMEOUT)
+    return slugs
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Filtros del catálogo. La categoría se resuelve a category_id (por id o por
+    slug vía category_ids_by_slug) para filtrar sin JOIN con Category; así las
+    consultas usan los índices compuestos (category, created_at/price, id).
+    """
+    category = django_filters.CharFilter(method='filter_category', label='Categoría (id o slug)')
+    category__slug = django_filters.CharFilter(method='filter_category', label='Slug de la categoría') # Compatibilidad
+    price__gte = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price__lte = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+
+    class Meta:
+        model = Product
+        fields = []
+
+    def filter_category(self, queryset, name, value):
+        value = value.strip()
+        if value.isdigit():
+            return queryset.filter(category_id=int(value))
+        category_id = category_ids_by_slug().get(value)
+        if category_id is None:
+            # Slug desconocido o categoría creada en otro proceso después de cachear el mapa
+            category_id = Category.objects.filter(slug=value).values_list('id', flat=True).first()
+            if category_id is None:
+                return queryset.none()
+        return queryset.filter(category_id=category_id)
+
+    def filter_in_stock(self, queryset, name, value):
+        # stock > 0 es la condición del índice parcial product_in_stock_idx
+        return queryset.filter(stock__gt=0) if value else queryset.filter(stock=0)
+
+
+def strip_accents(value):
+    """Quita tildes y diéresis igual que unaccent() al construir el documento de búsqueda."""
+    normalized = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Búsqueda de texto completo sobre Product.search_document (tsvector + GIN).
+
+    En PostgreSQL filtra con websearch_to_tsquery('spanish', ...) y ordena por
+    SearchRank cuando el cliente no pide otro orden. En otros motores (tests
+    locales con SQLite) se usa el SearchFilter de DRF con icontains.
+    """
+    search_vector_field = 'search_document'
+
+    def get_search_text(self, request):
+        return ' '.join(self.get_search_terms(request))
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+
+        query = SearchQuery(strip_accents(text), config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset
+            .filter(**{self.search_vector_field: query})
+            .annotate(search_rank=SearchRank(F(self.search_vector_field), query))
+            .order_by('-search_rank', '-id')
+        )
+
+
+def normalize_suggest_term(value):
+    """Normaliza el texto del autocompletado: minúsculas y espacios colapsados."""
+    return ' '.join((value or '').split()).lower()
+
+
+class ILike(Lookup):
+    """
+    `columna ILIKE patrón` de PostgreSQL, usado como expresión. name__istartswith
+    compila UPPER(name) LIKE UPPER('q%'), que el índice GIN gin_trgm_ops sobre
+    name no puede servir; ILIKE sobre la columna sí.
+    """
+    lookup_name = 'ilike'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', (*lhs_params, *rhs_params)
+
+
+def suggest_products(queryset, term, limit):
+    """
+    Devuelve hasta `limit` tuplas (id, name, category slug) para el autocompletado.
+
+    En PostgreSQL combina prefijo (name ILIKE 'q%') y similitud de palabra con
+    trigramas (q <% name), ambos servidos por el índice GIN gin_trgm_ops sobre
+    name (un BitmapOr), así que tolera errores de tipeo. Los prefijos exactos
+    van primero.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        queryset = queryset.filter(name__icontains=term).order_by('name', 'id')
+    else:
+        connection = connections[queryset.db]
+        is_prefix = ILike(F('name'), connection.ops.prep_for_like_query(term) + '%')
+        queryset = (
+            queryset
+            .filter(is_prefix | Q(name__trigram_word_similar=term))
+            .annotate(
+                is_prefix=Case(When(is_prefix, then=Value(1)), default=Value(0), output_field=IntegerField()),
+                similarity=TrigramWordSimilarity(term, 'name'),
+            )
+            .order_by('-is_prefix', '-similarity', 'name', 'id')
+        )
+    return list(queryset.values_list('id', 'name', 'category__slug')[:limit])
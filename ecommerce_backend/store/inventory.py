@@ -0,0 +1,131 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Category, Product, count_change
+
+
+def _adjust_stock(product_id, delta, require_available):
+    """
+    Ejecuta un único UPDATE ... RETURNING sobre el stock del producto.
+
+    La condición y el cambio se evalúan dentro de la misma sentencia, así que
+    no hay lectura-modificación-escritura desde el cliente ni actualizaciones
+    perdidas bajo concurrencia. Devuelve el nuevo stock o None si no se aplicó.
+
+    Si el stock cruza el cero (se agota o se repone) también cambia
+    in_stock_count de la categoría: en PostgreSQL dentro de la misma sentencia
+    (CTE con UPDATE), en otros motores con una segunda UPDATE en la transacción.
+    """
+    table = connection.ops.quote_name(Product._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = f'UPDATE {table} SET stock = stock + %s, updated_at = %s WHERE id = %s'
+    params = [delta, now, product_id]
+    if require_available:
+        sql += ' AND stock >= %s'
+        params.append(-delta)
+    sql += ' RETURNING stock, category_id'
+    # Stock resultante que indica el cruce: 0 al agotarse, `delta` si antes no había
+    crossing, change = (0, -1) if delta < 0 else (delta, 1)
+
+    if connection.vendor == 'postgresql':
+        categories = connection.ops.quote_name(Category._meta.db_table)
+        sql = (
+            f'WITH p AS ({sql}), c AS ('
+            f'UPDATE {categories} SET in_stock_count = in_stock_count + %s, updated_at = %s '
+            f'FROM p WHERE {categories}.id = p.category_id AND p.stock = %s) '
+            'SELECT stock FROM p'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [change, now, crossing])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row and row[0] == crossing:
+            Category.objects.apply_count_deltas({row[1]: [0, change]})
+    return row[0] if row else None
+
+
+def reserve_stock(product_id, quantity):
+    """Descuenta `quantity` unidades solo si hay stock suficiente. Devuelve el nuevo stock o None."""
+    return _adjust_stock(product_id, -quantity, require_available=True)
+
+
+def release_stock(product_id, quantity):
+    """Devuelve `quantity` unidades al stock. Devuelve el nuevo stock o None si el producto no existe."""
+    return _adjust_stock(product_id, quantity, require_available=False)
+
+
+def _update_from_values(rows, now):
+    """
+    PostgreSQL: aplica [(id, price, stock)] con un único
+    UPDATE ... FROM (VALUES ...) en lugar de una sentencia por producto.
+    """
+    table = connection.ops.quote_name(Product._meta.db_table)
+    values = ', '.join(['(%s, %s::numeric, %s::integer)'] * len(rows))
+    sql = (
+        f'UPDATE {table} AS p SET price = v.price, stock = v.stock, updated_at = %s '
+        f'FROM (VALUES {values}) AS v(id, price, stock) WHERE p.id = v.id'
+    )
+    params = [now] + [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def bulk_update_products(entries, batch_size=5000):
+    """
+    Aplica cambios de precio y stock a muchos productos en una transacción.
+
+    `entries` es una lista de dicts ya validados con 'id' y alguno de 'price',
+    'stock' (valor absoluto) o 'stock_delta' (relativo). Un único
+    SELECT ... FOR UPDATE carga y bloquea todos los productos, así los deltas
+    no pierden actualizaciones concurrentes; después se escribe todo con
+    UPDATE ... FROM (VALUES ...) en PostgreSQL o bulk_update en otros motores.
+
+    Devuelve un resultado por entrada, en el mismo orden: {'id', 'status',
+    'price', 'stock'} si se aplicó, o {'id', 'status': 'error', 'detail'}.
+    """
+    with transaction.atomic():
+        current = {
+            pk: (price, stock, category_id)
+            for pk, price, stock, category_id in (
+                Product.objects.select_for_update().filter(id__in=[entry['id'] for entry in entries])
+                .order_by('id').values_list('id', 'price', 'stock', 'category_id')
+            )
+        }
+
+        results, changes, deltas = [], {}, {}
+        for entry in entries:
+            pk = entry['id']
+            if pk not in current:
+                results.append({'id': pk, 'status': 'error', 'detail': 'Producto no existe.'})
+                continue
+            if pk in changes:
+                results.append({'id': pk, 'status': 'error', 'detail': 'Producto repetido en la misma petición.'})
+                continue
+            price, previous_stock, category_id = current[pk]
+            price = entry.get('price', price)
+            stock = entry['stock'] if 'stock' in entry else previous_stock + entry.get('stock_delta', 0)
+            if stock < 0:
+                results.append({'id': pk, 'status': 'error', 'detail': f'El stock quedaría negativo ({stock}).'})
+                continue
+            changes[pk] = (price, stock)
+            count_change(deltas, (category_id, previous_stock), (category_id, stock))
+            results.append({'id': pk, 'status': 'updated', 'price': price, 'stock': stock})
+
+        now = timezone.now()
+        rows = [(pk, price, stock) for pk, (price, stock) in changes.items()]
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if connection.vendor == 'postgresql':
+                _update_from_values(batch, now)
+            else:
+                Product.objects.bulk_update(
+                    [Product(id=pk, price=price, stock=stock, updated_at=now) for pk, price, stock in batch],
+                    ['price', 'stock', 'updated_at'],
+                )
+        Category.objects.apply_count_deltas(deltas) # Solo los productos que se agotaron o repusieron
+    return results
@@ -0,0 +1,247 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from store.filters import strip_accents
+from store.models import Category, Coupon, Product
+from decimal import Decimal
+import django
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+
+BENCH_USERNAME = 'benchmark_api'
+BENCH_PASSWORD = 'Benchmark1234!'
+BENCH_COUPON = 'BENCHAPI10'
+
+# Métricas comparadas con la línea base: (clave, relativa al umbral, diferencia mínima para contar)
+COMPARED_METRICS = [('p50_ms', True, 0.5), ('p90_ms', True, 1.0), ('db_ms', True, 0.5), ('alloc_kb', True, 32), ('queries', False, 0)]
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark en proceso de la API (URLconf real, middleware incluido) sobre el catálogo cargado: '
+        'latencia p50/p90/p99, consultas y tiempo de BD, memoria asignada; JSON y comparación con una línea base'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Peticiones medidas por escenario (default: 50)')
+        parser.add_argument('--warmup', type=int, default=5, help='Peticiones de calentamiento por escenario (default: 5)')
+        parser.add_argument('--alloc-iterations', type=int, default=5, help='Peticiones con tracemalloc por escenario (default: 5)')
+        parser.add_argument('--page', type=int, default=50, help='Página N de los escenarios de navegación profunda (default: 50)')
+        parser.add_argument('--scenarios', help='Escenarios a ejecutar separados por coma (default: todos)')
+        parser.add_argument('--output', help='Guarda los resultados en este archivo JSON')
+        parser.add_argument('--compare', help='JSON de una ejecución anterior (línea base) contra el que comparar')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Aumento relativo tolerado antes de marcar regresión (default: 0.2 = 20%%)',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['warmup'] < 0 or options['alloc_iterations'] < 0 or options['page'] < 1:
+            raise CommandError('--iterations y --page deben ser >= 1; --warmup y --alloc-iterations, >= 0.')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'No se pudo leer la línea base {options["compare"]}: {exc}')
+
+        product_count = Product.objects.count()
+        if not product_count:
+            raise CommandError('No hay productos: ejecuta antes generate_synthetic_catalog.')
+
+        # Todo en una transacción que se revierte: el usuario, el cupón y last_login del login no quedan en la BD.
+        # DEBUG=False como en producción: sin el registro de queries de CursorDebugWrapper
+        with override_settings(DEBUG=False), transaction.atomic():
+            self.client = APIClient(SERVER_NAME='localhost', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+            self.addresses = itertools.count(1)
+            scenarios = self.build_scenarios(options['page'])
+            if options['scenarios']:
+                selected = [name.strip() for name in options['scenarios'].split(',')]
+                unknown = set(selected) - set(scenarios)
+                if unknown:
+                    raise CommandError(f'Escenarios desconocidos: {", ".join(sorted(unknown))}. Disponibles: {", ".join(scenarios)}')
+                scenarios = {name: scenarios[name] for name in selected}
+
+            results = {}
+            for name, request in scenarios.items():
+                results[name] = self.measure(request, options)
+                self.report(name, results[name])
+            transaction.set_rollback(True)
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'products': product_count,
+                'iterations': options['iterations'],
+                'page': options['page'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'compression_min_size': settings.API_COMPRESSION_MIN_SIZE,
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(report, output_file, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'\nResultados guardados en {options["output"]}'))
+        if baseline is not None:
+            regressions = self.compare(baseline, report, options['threshold'])
+            if regressions:
+                raise CommandError(f'{len(regressions)} regresiones frente a {options["compare"]}: {", ".join(regressions)}')
+            self.stdout.write(self.style.SUCCESS('✓ Sin regresiones frente a la línea base'))
+
+    def build_scenarios(self, page):
+        """Escenarios {nombre: () -> respuesta}, resueltos contra los datos cargados."""
+        client = self.client
+        product = Product.objects.filter(stock__gt=10).order_by('id').first() or Product.objects.order_by('id').first()
+        cart = [{'product_id': pk, 'quantity': 1} for pk in Product.objects.filter(stock__gt=10).order_by('id').values_list('id', flat=True)[:5]]
+        category = Category.objects.order_by('-product_count', 'id').first()
+        # Término de búsqueda y prefijo del autocompletado derivados del catálogo (p. ej. 'mochila' / 'moch')
+        term = strip_accents(product.name.split()[0]).lower()
+
+        User = get_user_model()
+        user = User.objects.filter(username=BENCH_USERNAME).first()
+        if user is None:
+            user = User.objects.create_user(username=BENCH_USERNAME, email=f'{BENCH_USERNAME}@test.com', password=BENCH_PASSWORD)
+        Coupon.objects.get_or_create(
+            code=BENCH_COUPON, defaults={'discount_type': 'percentage', 'discount_value': Decimal('10.00')},
+        )
+
+        # El cursor de la página N se obtiene recorriendo `next` antes de medir
+        cursor_url = '/api/products/'
+        for _ in range(page - 1):
+            next_url = self.get(cursor_url).data['next']
+            if not next_url:
+                break
+            cursor_url = next_url[next_url.index('/api/'):]
+
+        return {
+            'browse_first_page': lambda: self.get('/api/products/'),
+            'browse_page_n': lambda: self.get(f'/api/products/?page={page}'),
+            'browse_cursor_page_n': lambda: self.get(cursor_url),
+            'product_detail': lambda: self.get(f'/api/products/{product.pk}/'),
+            'category_filter': lambda: self.get(f'/api/products/?category={category.slug}&ordering=price'),
+            'search': lambda: self.get(f'/api/products/?search={term}'),
+            'suggest': lambda: self.get(f'/api/products/suggest/?q={term[:4]}'),
+            'facets': lambda: self.get('/api/products/facets/'),
+            'categories': lambda: self.get('/api/categories/'),
+            'coupon_apply': lambda: self.post('/api/coupons/apply_coupon/', {'code': BENCH_COUPON, 'cart_total': '150.00'}),
+            'cart_price': lambda: self.post('/api/cart/price/', {'items': cart, 'coupon_code': BENCH_COUPON}),
+            'login': lambda: client.post(
+                '/api/accounts/login/', {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD}, format='json',
+                REMOTE_ADDR=self.next_address(),
+            ),
+        }
+
+    def next_address(self):
+        # Una IP distinta por petición: el throttling anónimo (100/día) cortaría la medición, pero su costo se sigue midiendo
+        number = next(self.addresses)
+        return f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}'
+
+    def get(self, url):
+        return self.client.get(url, REMOTE_ADDR=self.next_address())
+
+    def post(self, url, data):
+        return self.client.post(url, data, format='json', REMOTE_ADDR=self.next_address())
+
+    def measure(self, request, options):
+        for _ in range(options['warmup']):
+            request()
+
+        timings, db_timings, query_counts, statuses = [], [], [], set()
+        for _ in range(options['iterations']):
+            db = [0, 0.0]
+
+            def timed_execute(execute, sql, params, many, context):
+                start = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    db[0] += 1
+                    db[1] += time.perf_counter() - start
+
+            with connection.execute_wrapper(timed_execute):
+                start = time.perf_counter()
+                response = request()
+                timings.append(time.perf_counter() - start)
+            db_timings.append(db[1])
+            query_counts.append(db[0])
+            statuses.add(response.status_code)
+
+        # Memoria en una pasada aparte: tracemalloc multiplica la latencia
+        allocations = []
+        tracemalloc.start()
+        try:
+            for _ in range(options['alloc_iterations']):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                request()
+                allocations.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        db_timings.sort()
+        allocations.sort()
+        return {
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+            'p90_ms': round(percentile(timings, 0.9) * 1000, 3),
+            'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+            'db_ms': round(percentile(db_timings, 0.5) * 1000, 3),
+            'queries': max(query_counts),
+            'alloc_kb': round(percentile(allocations, 0.5) / 1024, 1) if allocations else None,
+            'bytes': len(response.content),
+        }
+
+    def report(self, name, result):
+        status = ','.join(map(str, result['status']))
+        style = self.style.SUCCESS if all(code < 400 for code in result['status']) else self.style.ERROR
+        alloc = '-' if result['alloc_kb'] is None else f'{result["alloc_kb"]:.0f}'
+        self.stdout.write(
+            f'  {name:<22} {style(f"{status:>5}")}  p50 {result["p50_ms"]:7.2f} ms  p90 {result["p90_ms"]:7.2f} ms  '
+            f'p99 {result["p99_ms"]:7.2f} ms  BD {result["db_ms"]:6.2f} ms / {result["queries"]} q  {alloc:>6} KB'
+        )
+
+    def compare(self, baseline, report, threshold):
+        """Imprime la comparación escenario a escenario y devuelve las regresiones ('escenario.métrica')."""
+        base_meta, meta = baseline.get('meta', {}), report['meta']
+        for key in ('vendor', 'products'):
+            if base_meta.get(key) != meta[key]:
+                self.stdout.write(self.style.WARNING(f'La línea base usó {key}={base_meta.get(key)} y esta ejecución {meta[key]}'))
+
+        self.stdout.write(self.style.SUCCESS(f'\nComparación con la línea base (umbral {threshold:.0%})'))
+        regressions = []
+        for name, result in report['scenarios'].items():
+            base = baseline.get('scenarios', {}).get(name)
+            if base is None:
+                self.stdout.write(f'  {name:<22} sin línea base')
+                continue
+            changes = []
+            for metric, relative, min_delta in COMPARED_METRICS:
+                before, after = base.get(metric), result.get(metric)
+                if before is None or after is None:
+                    continue
+                worse = after - before > min_delta and (not relative or after > before * (1 + threshold))
+                if worse:
+                    regressions.append(f'{name}.{metric}')
+                if before and (worse or abs(after - before) / before > threshold):
+                    label = f'{metric} {before:g} -> {after:g} ({(after - before) / before:+.0%})'
+                    changes.append(self.style.ERROR(label) if worse else label)
+            self.stdout.write(f'  {name:<22} {"  ".join(changes) or "sin cambios"}')
+        return regressions
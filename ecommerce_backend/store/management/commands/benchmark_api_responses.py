@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from store.middleware import CompressionMiddleware, brotli
+from store.models import Product
+from store.product_rows import render_rows, row_values
+from store.renderers import ORJSONRenderer
+from store.serializers import ProductSerializer
+import gzip
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de la codificación de páginas del catálogo: JSONRenderer de DRF frente a orjson, y gzip/brotli'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='20,100,500', help='Tamaños de página separados por coma (default: 20,100,500)')
+        parser.add_argument('--repeat', type=int, default=50, help='Repeticiones por medición; se reporta la mediana (default: 50)')
+
+    def handle(self, *args, **options):
+        try:
+            page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--page-sizes debe ser una lista de enteros, p. ej. 20,100,500.')
+        fields = list(ProductSerializer.field_sets['all'])
+        queryset = Product.objects.order_by('-created_at', '-id')
+        if not queryset.exists():
+            raise CommandError('No hay productos: ejecuta antes generate_synthetic_catalog.')
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli no está instalado: solo se mide gzip.'))
+
+        self.repeat = options['repeat']
+        for size in page_sizes:
+            # La misma forma que la respuesta del listado con ?fields=all
+            page = {'next': None, 'previous': None, 'results': render_rows(row_values(queryset, fields, {'created_at'})[:size], fields)}
+            self.stdout.write(self.style.SUCCESS(f'\nPágina de {size} productos'))
+
+            drf_ms, body = self.measure(lambda: JSONRenderer().render(page))
+            orjson_ms, body = self.measure(lambda: ORJSONRenderer().render(page))
+            self.stdout.write(f'  {"JSONRenderer (DRF)":<22} {drf_ms:7.3f} ms CPU  {len(body):9d} bytes')
+            self.stdout.write(f'  {"ORJSONRenderer":<22} {orjson_ms:7.3f} ms CPU  {len(body):9d} bytes  x{drf_ms / orjson_ms:.1f}')
+
+            level = CompressionMiddleware.gzip_level
+            gzip_ms, compressed = self.measure(lambda: gzip.compress(body, compresslevel=level, mtime=0))
+            self.report(f'gzip (nivel {level})', gzip_ms, compressed, body)
+            if brotli is not None:
+                quality = CompressionMiddleware.brotli_quality
+                brotli_ms, compressed = self.measure(lambda: brotli.compress(body, quality=quality))
+                self.report(f'brotli (calidad {quality})', brotli_ms, compressed, body)
+
+    def measure(self, function):
+        """Mediana de tiempo de CPU (process_time) en ms y el último resultado."""
+        timings = []
+        for _ in range(self.repeat):
+            start = time.process_time()
+            result = function()
+            timings.append(time.process_time() - start)
+        timings.sort()
+        return timings[len(timings) // 2] * 1000, result
+
+    def report(self, label, milliseconds, compressed, body):
+        self.stdout.write(
+            f'  {label:<22} {milliseconds:7.3f} ms CPU  {len(compressed):9d} bytes  '
+            f'({len(compressed) / len(body):.0%} del original)'
+        )
@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from store.models import Category, Order, OrderItem, Product
+from store.checkout import InsufficientStock, place_order
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import random
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de checkouts concurrentes con productos compartidos: verifica que no haya sobreventa ni deadlocks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Hilos concurrentes (default: 16)')
+        parser.add_argument('--orders', type=int, default=1000, help='Checkouts a intentar en total (default: 1000)')
+        parser.add_argument('--products', type=int, default=10, help='Productos "calientes" compartidos (default: 10)')
+        parser.add_argument('--stock', type=int, default=300, help='Stock inicial de cada producto (default: 300)')
+        parser.add_argument('--max-lines', type=int, default=4, help='Máximo de líneas por pedido (default: 4)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla para los carritos (default: 42)')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite serializa las escrituras: los resultados no representan contención real.'))
+
+        User = get_user_model()
+        user, created_user = User.objects.get_or_create(username='benchmark_checkout', defaults={'email': 'benchmark_checkout@test.com'})
+        previous_orders = list(Order.objects.filter(user=user).values_list('id', flat=True)) # De una cuenta existente: no se tocan
+        category, created_category = Category.objects.get_or_create(name='Benchmark', defaults={'slug': 'benchmark'})
+        products = [
+            Product.objects.create(category=category, name=f'Producto benchmark {i}', price=Decimal('9.90'), stock=options['stock'])
+            for i in range(options['products'])
+        ]
+        product_ids = [product.id for product in products]
+
+        try:
+            self.run_benchmark(user, product_ids, options)
+        finally:
+            orders = Order.objects.filter(user=user).exclude(id__in=previous_orders)
+            OrderItem.objects.filter(order__in=orders).delete()
+            orders.delete()
+            Product.objects.filter(id__in=product_ids).delete()
+            if created_category:
+                category.delete()
+            if created_user:
+                user.delete()
+
+    def run_benchmark(self, user, product_ids, options):
+        rng = random.Random(options['seed'])
+        # Las líneas van en orden aleatorio a propósito: sin el bloqueo por PK habría deadlocks
+        carts = [
+            [{'product_id': pid, 'quantity': rng.randint(1, 3)} for pid in rng.sample(product_ids, rng.randint(1, options['max_lines']))]
+            for _ in range(options['orders'])
+        ]
+
+        counters = {'ok': 0, 'out_of_stock': 0, 'deadlocks': 0, 'errors': 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            local = {'ok': 0, 'out_of_stock': 0, 'deadlocks': 0, 'errors': 0}
+            local_latencies = []
+            try:
+                for cart in chunk:
+                    start = time.perf_counter()
+                    try:
+                        place_order(user, cart, 'Calle Benchmark 123')
+                        local['ok'] += 1
+                    except InsufficientStock:
+                        local['out_of_stock'] += 1
+                    except DatabaseError as exc:
+                        local['deadlocks' if 'deadlock' in str(exc).lower() else 'errors'] += 1
+                    local_latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+            with lock:
+                for key, value in local.items():
+                    counters[key] += value
+                latencies.extend(local_latencies)
+
+        threads = options['threads']
+        chunks = [carts[i::threads] for i in range(threads)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, chunks))
+        elapsed = time.perf_counter() - start
+
+        # Verificar sobreventa: stock inicial - unidades vendidas == stock final, y nunca negativo
+        sold = dict(
+            OrderItem.objects.filter(order__user=user).values_list('product_id').annotate(total=Sum('quantity'))
+        )
+        oversold = []
+        for product in Product.objects.filter(id__in=product_ids):
+            expected = options['stock'] - sold.get(product.id, 0)
+            if product.stock != expected or product.stock < 0:
+                oversold.append((product.id, product.stock, expected))
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0
+
+        self.stdout.write(self.style.SUCCESS('\nCheckout concurrente'))
+        self.stdout.write(f'  Pedidos creados: {counters["ok"]}  sin stock: {counters["out_of_stock"]}  errores: {counters["errors"]}')
+        self.stdout.write(f'  Throughput: {len(carts) / elapsed:.0f} checkouts/s ({elapsed:.2f}s, {threads} hilos)')
+        self.stdout.write(f'  Latencia: p50 {p50:.1f} ms  p99 {p99:.1f} ms')
+        if counters['deadlocks']:
+            self.stdout.write(self.style.ERROR(f'  ✗ {counters["deadlocks"]} deadlocks'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  ✓ Sin deadlocks'))
+        if oversold:
+            self.stdout.write(self.style.ERROR(f'  ✗ Sobreventa en {len(oversold)} productos: {oversold[:5]}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  ✓ Sin sobreventa'))
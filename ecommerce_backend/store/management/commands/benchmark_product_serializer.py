@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from store.models import Product
+from store.product_rows import render_rows, row_values
+from store.serializers import ProductSerializer
+import time
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark de una página del listado: ProductSerializer frente a la lectura rápida (values() + render compilado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='20,100,500', help='Tamaños de página separados por coma (default: 20,100,500)')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por medición; se reporta la mediana (default: 20)')
+        parser.add_argument(
+            '--fields', choices=sorted(ProductSerializer.field_sets), default='all',
+            help='Conjunto de campos a serializar (default: all)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--page-sizes debe ser una lista de enteros, p. ej. 20,100,500.')
+        fields = list(ProductSerializer.field_sets[options['fields']])
+        queryset = Product.objects.defer('search_document').order_by('-created_at', '-id')
+        if not queryset.exists():
+            raise CommandError('No hay productos: ejecuta antes generate_synthetic_catalog.')
+
+        variants = [
+            # Lo que hacía el listado antes: category_name con una query por fila
+            ('ProductSerializer', lambda size: ProductSerializer(queryset[:size], many=True, fields=fields).data),
+            ('ProductSerializer + select_related', lambda size: ProductSerializer(
+                queryset.select_related('category')[:size], many=True, fields=fields,
+            ).data),
+            ('values() + ProductRow', lambda size: render_rows(row_values(queryset, fields, {'created_at'})[:size], fields)),
+        ]
+
+        self.stdout.write(f'Campos: {options["fields"]} ({len(fields)}), mediana de {options["repeat"]} repeticiones')
+        for size in page_sizes:
+            self.stdout.write(self.style.SUCCESS(f'\nPágina de {size} productos'))
+            baseline = None
+            for label, serialize in variants:
+                # Calentamiento (conexión, cachés de Django y del render compilado); aquí se cuentan las queries
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                    serialize(size)
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    serialize(size)
+                    timings.append(time.perf_counter() - start)
+                timings.sort()
+                median = timings[len(timings) // 2] * 1000
+                baseline = baseline or median
+                self.stdout.write(
+                    f'  {label:<36} {median:8.2f} ms  {len(queries):4d} queries  '
+                    f'{median / size * 1000:7.1f} µs/fila  x{baseline / median:.1f}'
+                )
@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from store.models import Category, Product
+from store.inventory import reserve_stock
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de reservas de stock concurrentes sobre un mismo producto (UPDATE condicional vs lectura-modificación-escritura)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Hilos concurrentes (default: 16)')
+        parser.add_argument('--attempts', type=int, default=2000, help='Intentos de reserva en total (default: 2000)')
+        parser.add_argument('--stock', type=int, default=1000, help='Stock inicial del producto (default: 1000)')
+        parser.add_argument('--quantity', type=int, default=1, help='Unidades por reserva (default: 1)')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite serializa las escrituras: los resultados no representan contención real.'))
+
+        category, created = Category.objects.get_or_create(name='Benchmark', defaults={'slug': 'benchmark'})
+        try:
+            for label, reserve in [('UPDATE condicional', self.reserve_atomic), ('Lectura-modificación-escritura', self.reserve_naive)]:
+                product = Product.objects.create(
+                    category=category, name='Producto benchmark', price=Decimal('1.00'), stock=options['stock'],
+                )
+                try:
+                    self.run_scenario(label, product, reserve, options)
+                finally:
+                    product.delete()
+        finally:
+            if created:
+                category.delete()
+
+    def reserve_atomic(self, product_id, quantity):
+        return reserve_stock(product_id, quantity) is not None
+
+    def reserve_naive(self, product_id, quantity):
+        # Simula el PATCH anterior del carrito: lee el stock y escribe el valor calculado por el cliente
+        product = Product.objects.get(pk=product_id)
+        if product.stock < quantity:
+            return False
+        Product.objects.filter(pk=product_id).update(stock=product.stock - quantity)
+        return True
+
+    def run_scenario(self, label, product, reserve, options):
+        attempts, quantity = options['attempts'], options['quantity']
+        counters = {'ok': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker(n):
+            local = {'ok': 0, 'rejected': 0, 'errors': 0}
+            try:
+                for _ in range(n):
+                    try:
+                        local['ok' if reserve(product.pk, quantity) else 'rejected'] += 1
+                    except DatabaseError:
+                        local['errors'] += 1
+            finally:
+                connection.close()
+            with lock:
+                for key, value in local.items():
+                    counters[key] += value
+
+        threads = options['threads']
+        per_thread = [attempts // threads + (1 if i < attempts % threads else 0) for i in range(threads)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, per_thread))
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        expected_stock = options['stock'] - counters['ok'] * quantity
+        lost_updates = product.stock - expected_stock
+
+        self.stdout.write(self.style.SUCCESS(f'\n{label}'))
+        self.stdout.write(f'  Reservas exitosas: {counters["ok"]}  rechazadas: {counters["rejected"]}  errores: {counters["errors"]}')
+        self.stdout.write(f'  Throughput: {attempts / elapsed:.0f} reservas/s ({elapsed:.2f}s, {threads} hilos)')
+        self.stdout.write(f'  Stock final: {product.stock} (esperado {expected_stock})')
+        if lost_updates:
+            self.stdout.write(self.style.ERROR(f'  ✗ {lost_updates} unidades vendidas de más (actualizaciones perdidas)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  ✓ Sin actualizaciones perdidas'))
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from store.bulk_load import PRODUCT_TABLE, copy_products, insert_products
+from store.models import Category, OrderItem
+from store.synthetic import category_rows, generate_chunk
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Genera un catálogo sintético determinista (nombres en español, precios, stock y fechas realistas) para benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000, help='Productos a generar (default: 100000)')
+        parser.add_argument('--categories', type=int, default=20, help='Categorías a usar o crear (default: 20)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla: misma semilla, mismo catálogo (default: 42)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos generadores (default: núcleos de CPU)')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Productos por bloque y por transacción (default: 20000)')
+        parser.add_argument('--days', type=int, default=730, help='Antigüedad máxima de created_at en días (default: 730)')
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Elimina antes los productos de esas categorías (y desvincula sus ítems de pedido)',
+        )
+
+    def handle(self, *args, **options):
+        total, chunk_size = options['products'], options['chunk_size']
+        if total < 0 or chunk_size < 1 or options['categories'] < 1:
+            raise CommandError('--products debe ser >= 0, y --chunk-size y --categories >= 1.')
+
+        categories = []
+        for name, slug, base_price in category_rows(options['categories']):
+            category, _ = Category.objects.get_or_create(slug=slug, defaults={'name': name})
+            categories.append((category.id, base_price))
+        if options['replace']:
+            self.delete_products([category_id for category_id, _ in categories])
+
+        as_copy = connection.vendor == 'postgresql'
+        load = copy_products if as_copy else insert_products
+        # Un `now` fijo (a la hora) para que la misma semilla genere las mismas fechas durante el día
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        chunks = [(index, min(chunk_size, total - start)) for index, start in enumerate(range(0, total, chunk_size))]
+
+        self.stdout.write(
+            f'Generando {total} productos en {len(categories)} categorías '
+            f'({len(chunks)} bloques, {options["workers"]} procesos, {"COPY" if as_copy else "INSERT"})...'
+        )
+        loaded = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            # Ventana acotada de bloques en vuelo: la memoria no crece con --products
+            pending = deque()
+            for index, count in chunks:
+                pending.append((count, executor.submit(
+                    generate_chunk, options['seed'], index, count, categories, now, options['days'], as_copy,
+                )))
+                if len(pending) >= options['workers'] * 2:
+                    loaded += self.load_next(pending, load)
+                    self.report_progress(loaded, start)
+            while pending:
+                loaded += self.load_next(pending, load)
+                self.report_progress(loaded, start)
+
+        elapsed = time.perf_counter() - start
+        # COPY y el DELETE directo no pasan por los contadores; recount() además toca updated_at de las
+        # categorías, que cambia la versión del catálogo (las fechas generadas son pasadas)
+        Category.objects.filter(id__in=[category_id for category_id, _ in categories]).recount()
+        self.stdout.write(self.style.SUCCESS(f'\n✓ {loaded} productos generados en {elapsed:.2f}s'))
+        self.stdout.write(f'  Throughput: {loaded / elapsed if elapsed else 0:.0f} filas/s')
+        if as_copy:
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {PRODUCT_TABLE}') # Estadísticas frescas para que los benchmarks usen los índices
+            self.stdout.write('  ANALYZE ejecutado')
+
+    def load_next(self, pending, load):
+        # Se cargan en orden de bloque: los ids resultantes también son deterministas
+        count, future = pending.popleft()
+        rows = future.result()
+        with transaction.atomic():
+            load(rows)
+        return count
+
+    def delete_products(self, category_ids):
+        # DELETE directo: el ORM cargaría cada producto en memoria para emular el SET_NULL de OrderItem
+        with transaction.atomic():
+            OrderItem.objects.filter(product__category_id__in=category_ids).update(product=None)
+            with connection.cursor() as cursor:
+                placeholders = ', '.join(['%s'] * len(category_ids))
+                cursor.execute(f'DELETE FROM {PRODUCT_TABLE} WHERE category_id IN ({placeholders})', category_ids)
+                deleted = cursor.rowcount
+        self.stdout.write(f'  {deleted} productos anteriores eliminados')
+
+    def report_progress(self, loaded, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  {loaded} filas ({loaded / elapsed:.0f} filas/s)')
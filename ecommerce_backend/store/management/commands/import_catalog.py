@@ -0,0 +1,160 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from store.bulk_load import copy_line, copy_products
+from store.models import Category, Product, count_change
+from decimal import Decimal, InvalidOperation
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+
+
+class Command(BaseCommand):
+    help = 'Importa productos desde un CSV o JSONL (también .gz) en lotes, con memoria constante'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar (.csv, .jsonl, opcionalmente .gz; "-" para stdin)')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Formato (por defecto según la extensión)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por lote (default: 5000)')
+        parser.add_argument(
+            '--method', choices=['auto', 'copy', 'bulk'], default='auto',
+            help='copy: COPY de PostgreSQL; bulk: bulk_create; auto: COPY si está disponible (default: auto)',
+        )
+        parser.add_argument('--create-categories', action='store_true', help='Crea las categorías que no existan')
+        parser.add_argument('--max-errors', type=int, default=100, help='Aborta tras esta cantidad de filas inválidas (default: 100)')
+
+    def handle(self, *args, **options):
+        path, fmt = options['path'], options['format']
+        if fmt is None:
+            fmt = 'jsonl' if path.removesuffix('.gz').endswith(('.jsonl', '.ndjson')) else 'csv'
+
+        method = options['method']
+        if method == 'auto':
+            method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+        elif method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('COPY solo está disponible con PostgreSQL.')
+
+        # Mapa slug → id en memoria: una query para todo el import
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.create_categories = options['create_categories']
+        self.errors, self.max_errors = 0, options['max_errors']
+        write_batch = self.copy_batch if method == 'copy' else self.bulk_batch
+
+        imported = 0
+        batch = []
+        start = time.perf_counter()
+        with self.open_source(path) as source:
+            rows = self.read_jsonl(source) if fmt == 'jsonl' else enumerate(csv.DictReader(source), start=2)
+            for line, row in rows:
+                values = self.parse_row(line, row)
+                if values is None:
+                    continue
+                batch.append(values)
+                if len(batch) >= options['batch_size']:
+                    imported += self.flush(write_batch, batch)
+                    batch = []
+                    self.report_progress(imported, start)
+            if batch:
+                imported += self.flush(write_batch, batch)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'\n✓ {imported} productos importados con {method} en {elapsed:.2f}s'))
+        self.stdout.write(f'  Throughput: {imported / elapsed if elapsed else 0:.0f} filas/s')
+        if self.errors:
+            self.stdout.write(self.style.WARNING(f'  {self.errors} filas inválidas omitidas'))
+
+    def open_source(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8', newline='')
+        return open(path, encoding='utf-8', newline='')
+
+    def read_jsonl(self, source):
+        """(línea, fila) de cada objeto JSON; las líneas inválidas o que no son objetos se rechazan como filas inválidas."""
+        for line, text in enumerate(source, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as exc:
+                self.reject(line, f'JSON inválido: {exc}')
+                continue
+            if not isinstance(row, dict):
+                self.reject(line, f'se esperaba un objeto JSON, no {type(row).__name__}')
+                continue
+            yield line, row
+
+    def reject(self, line, message):
+        self.errors += 1
+        self.stderr.write(f'  Línea {line}: {message}')
+        if self.errors >= self.max_errors:
+            raise CommandError(f'Demasiadas filas inválidas ({self.errors}); import abortado.')
+
+    def parse_row(self, line, row):
+        """Valida una fila y devuelve (category_id, name, description, price, stock, image_url), o None."""
+        try:
+            name = str(row.get('name') or '').strip()
+            if not name:
+                raise ValueError('falta el nombre')
+            price = Decimal(str(row.get('price')))
+            if not price.is_finite() or price < 0:
+                raise ValueError(f'precio inválido: {row.get("price")!r}')
+            stock = int(row.get('stock') or 0)
+            if stock < 0:
+                raise ValueError(f'stock negativo: {stock}')
+            category_id = self.resolve_category(row)
+        except (ValueError, InvalidOperation, TypeError) as exc:
+            self.reject(line, exc)
+            return None
+        return (
+            category_id,
+            name[:200],
+            row.get('description') or '',
+            price.quantize(Decimal('0.01')),
+            stock,
+            row.get('image_url') or None,
+        )
+
+    def resolve_category(self, row):
+        slug = str(row.get('category_slug') or row.get('category') or '').strip()
+        if not slug:
+            raise ValueError('falta la categoría')
+        slug = slugify(slug)
+        category_id = self.categories.get(slug)
+        if category_id is None:
+            if not self.create_categories:
+                raise ValueError(f'categoría inexistente: {slug!r} (usa --create-categories)')
+            category, _ = Category.objects.get_or_create(
+                slug=slug, defaults={'name': (row.get('category_name') or slug.replace('-', ' ').title())[:100]},
+            )
+            category_id = self.categories[slug] = category.id
+        return category_id
+
+    def flush(self, write_batch, batch):
+        # Cada lote en su propia transacción: un import enorme no mantiene una transacción abierta por horas
+        with transaction.atomic():
+            write_batch(batch)
+            deltas = {}
+            for category_id, _, _, _, stock, _ in batch:
+                count_change(deltas, None, (category_id, stock))
+            Category.objects.apply_count_deltas(deltas)
+        return len(batch)
+
+    def bulk_batch(self, batch):
+        Product.objects.bulk_create([
+            Product(category_id=category_id, name=name, description=description, price=price, stock=stock, image_url=image_url)
+            for category_id, name, description, price, stock, image_url in batch
+        ])
+
+    def copy_batch(self, batch):
+        now = timezone.now()
+        copy_products(''.join(copy_line((*values, now, now)) for values in batch))
+
+    def report_progress(self, imported, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  {imported} filas ({imported / elapsed:.0f} filas/s)')
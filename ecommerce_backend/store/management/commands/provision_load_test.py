@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from store.models import Coupon, Order, Product
+from decimal import Decimal
+import time
+
+USERNAME_PREFIX = 'loadtest_'
+# (código, tipo, valor, monto mínimo) de los cupones que usa el perfil de carga (load_tests/)
+COUPONS = [
+    ('LOADTEST10', 'percentage', Decimal('10.00'), Decimal('0.00')),
+    ('LOADTEST20', 'percentage', Decimal('20.00'), Decimal('200.00')),
+]
+
+
+class Command(BaseCommand):
+    help = 'Prepara un servidor local para las pruebas de carga (load_tests/): usuarios loadtest_NNNNN, cupones y catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Usuarios compradores a crear (default: 200)')
+        parser.add_argument('--password', default='LoadTest1234!', help='Contraseña común de los usuarios (default: LoadTest1234!)')
+        parser.add_argument(
+            '--products', type=int, default=20000,
+            help='Productos mínimos en el catálogo; si faltan se generan con generate_synthetic_catalog (default: 20000)',
+        )
+        parser.add_argument('--cleanup', action='store_true', help='Elimina los usuarios, pedidos y cupones de la prueba de carga')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            return self.cleanup()
+        if options['users'] < 1 or options['products'] < 0:
+            raise CommandError('--users debe ser >= 1 y --products >= 0.')
+
+        start = time.perf_counter()
+        missing = options['products'] - Product.objects.count()
+        if missing > 0:
+            call_command('generate_synthetic_catalog', '--products', str(missing), stdout=self.stdout)
+
+        User = get_user_model()
+        password = make_password(options['password']) # Un solo hash para todos: crear miles de usuarios no cuesta un PBKDF2 por cada uno
+        usernames = [f'{USERNAME_PREFIX}{i:05d}' for i in range(1, options['users'] + 1)]
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [User(username=username, email=f'{username}@loadtest.local', password=password) for username in usernames],
+                ignore_conflicts=True, batch_size=1000,
+            )
+            # Los que ya existían quedan con la contraseña de esta ejecución
+            User.objects.filter(username__in=usernames).update(password=password, is_active=True)
+            for code, discount_type, value, minimum in COUPONS:
+                Coupon.objects.update_or_create(code=code, defaults={
+                    'discount_type': discount_type, 'discount_value': value, 'minimum_amount': minimum,
+                    'usage_limit': -1, 'active': True, 'valid_from': None, 'valid_until': None,
+                })
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(usernames)} usuarios ({usernames[0]} … {usernames[-1]}), {len(COUPONS)} cupones, '
+            f'{Product.objects.count()} productos ({time.perf_counter() - start:.2f}s)'
+        ))
+        self.stdout.write(f'  LOADTEST_USERS={len(usernames)} LOADTEST_PASSWORD={options["password"]}')
+
+    def cleanup(self):
+        User = get_user_model()
+        users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        with transaction.atomic():
+            _, orders = Order.objects.filter(user__in=users).delete() # Order.user es PROTECT: primero los pedidos
+            _, deleted = users.delete()
+            Coupon.objects.filter(code__in=[code for code, *_ in COUPONS]).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Eliminados {deleted.get(User._meta.label, 0)} usuarios y {orders.get(Order._meta.label, 0)} pedidos de la prueba de carga'
+        ))
+        self.stdout.write(self.style.WARNING('  El stock descontado por los checkouts no se repone.'))
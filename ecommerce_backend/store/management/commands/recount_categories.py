@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+from store.models import Category, Product
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recalcula product_count e in_stock_count de las categorías desde la tabla de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Categorías a recalcular (por defecto, todas)')
+        parser.add_argument('--check', action='store_true', help='Solo informa las diferencias, sin corregirlas')
+
+    def handle(self, *args, **options):
+        categories = Category.objects.all()
+        if options['slugs']:
+            categories = categories.filter(slug__in=options['slugs'])
+            missing = set(options['slugs']) - set(categories.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f'Categorías inexistentes: {", ".join(sorted(missing))}')
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            # Bloquea las categorías: ningún delta se aplica entre la cuenta y la corrección
+            stored = list(categories.select_for_update().order_by('id').values_list('id', 'name', 'product_count', 'in_stock_count'))
+            actual = {
+                row['category']: (row['total'], row['in_stock'])
+                for row in Product.objects.filter(category__in=[pk for pk, *_ in stored]).order_by().values('category')
+                .annotate(total=Count('id'), in_stock=Count('id', filter=Q(stock__gt=0)))
+            }
+            drift = [
+                (name, (product_count, in_stock_count), actual.get(pk, (0, 0)))
+                for pk, name, product_count, in_stock_count in stored
+                if (product_count, in_stock_count) != actual.get(pk, (0, 0))
+            ]
+            if drift and not options['check']:
+                categories.recount()
+        elapsed = time.perf_counter() - start
+
+        for name, (product_count, in_stock_count), (total, in_stock) in drift:
+            self.stdout.write(f'  {name}: productos {product_count} -> {total}, con stock {in_stock_count} -> {in_stock}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(stored)} categorías al día ({elapsed:.2f}s)'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} de {len(stored)} categorías con contadores desfasados (sin corregir)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(drift)} de {len(stored)} categorías corregidas ({elapsed:.2f}s)'))
@@ -0,0 +1,178 @@
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import timezone
+from store.management.commands.import_catalog import Command as ImportCatalogCommand
+from store.models import Category, Product, count_change
+import csv
+import hashlib
+import time
+
+
+def content_hash(values):
+    """Hash de los campos que vienen del feed (categoría, nombre, descripción, precio, stock, imagen)."""
+    text = '\x1f'.join('' if value is None else str(value) for value in values)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Command(ImportCatalogCommand):
+    help = 'Sincroniza el catálogo de un proveedor: solo escribe los productos nuevos, cambiados o retirados del feed'
+
+    def add_arguments(self, parser):
+        # Mismo formato de feed que import_catalog (de ahí se reutilizan la lectura y la validación de filas)
+        parser.add_argument('path', help='Feed a sincronizar (.csv, .jsonl, opcionalmente .gz; "-" para stdin)')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Formato (por defecto según la extensión)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Filas por lote de escritura (default: 2000)')
+        parser.add_argument('--create-categories', action='store_true', help='Crea las categorías que no existan')
+        parser.add_argument('--max-errors', type=int, default=100, help='Aborta tras esta cantidad de filas inválidas (default: 100)')
+        parser.add_argument('--supplier', required=True, help='Proveedor del feed (los external_id son únicos por proveedor)')
+        parser.add_argument(
+            '--removed', choices=['zero-stock', 'delete', 'keep'], default='zero-stock',
+            help='Qué hacer con los productos que ya no están en el feed (default: zero-stock)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra el resumen de cambios, sin escribir')
+
+    def handle(self, *args, **options):
+        path, fmt = options['path'], options['format']
+        if fmt is None:
+            fmt = 'jsonl' if path.removesuffix('.gz').endswith(('.jsonl', '.ndjson')) else 'csv'
+        supplier, batch_size, dry_run = options['supplier'], options['batch_size'], options['dry_run']
+
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.create_categories = options['create_categories']
+        self.errors, self.max_errors = 0, options['max_errors']
+
+        # Mapa {external_id: (id, hash)} precargado con una query sobre el índice (supplier, external_id)
+        known = {
+            external_id: (pk, stored_hash)
+            for pk, external_id, stored_hash in Product.objects.filter(supplier=supplier, external_id__isnull=False)
+            .order_by().values_list('id', 'external_id', 'content_hash').iterator(chunk_size=10000)
+        }
+        seen = set()
+        summary = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        inserts, updates = [], []
+        now = timezone.now()
+
+        start = time.perf_counter()
+        with self.open_source(path) as source:
+            rows = self.read_jsonl(source) if fmt == 'jsonl' else enumerate(csv.DictReader(source), start=2)
+            for line, row in rows:
+                external_id = str(row.get('external_id') or row.get('sku') or '').strip()[:100]
+                if not external_id:
+                    self.reject(line, 'falta external_id')
+                    continue
+                if external_id in seen:
+                    self.reject(line, f'external_id repetido: {external_id!r}')
+                    continue
+                values = self.parse_row(line, row)
+                if values is None:
+                    continue
+                seen.add(external_id)
+
+                digest = content_hash(values)
+                current = known.get(external_id)
+                if current is not None and current[1] == digest:
+                    summary['unchanged'] += 1
+                    continue
+
+                if dry_run: # Solo el resumen: sin construir ni acumular productos que nunca se escribirían
+                    summary['inserted' if current is None else 'updated'] += 1
+                    continue
+
+                category_id, name, description, price, stock, image_url = values
+                product = Product(
+                    category_id=category_id, name=name, description=description, price=price, stock=stock,
+                    image_url=image_url, supplier=supplier, external_id=external_id, content_hash=digest, updated_at=now,
+                )
+                if current is None:
+                    inserts.append(product)
+                    summary['inserted'] += 1
+                else:
+                    product.id = current[0]
+                    updates.append(product)
+                    summary['updated'] += 1
+
+                if len(inserts) >= batch_size:
+                    self.write_inserts(inserts)
+                    inserts = []
+                if len(updates) >= batch_size:
+                    self.write_updates(updates)
+                    updates = []
+
+        removed = [pk for external_id, (pk, stored_hash) in known.items() if external_id not in seen and stored_hash]
+        if options['removed'] != 'keep':
+            summary['removed'] = len(removed)
+
+        if not dry_run:
+            self.write_inserts(inserts)
+            self.write_updates(updates)
+            if options['removed'] != 'keep':
+                for offset in range(0, len(removed), batch_size):
+                    self.write_removed(removed[offset:offset + batch_size], options['removed'], now)
+
+        elapsed = time.perf_counter() - start
+        processed = sum(summary.values()) - summary['removed']
+        title = 'Simulación (sin cambios escritos)' if dry_run else 'Sincronización completada'
+        self.stdout.write(self.style.SUCCESS(f'\n✓ {title}: {supplier} en {elapsed:.2f}s'))
+        self.stdout.write(
+            f'  Nuevos: {summary["inserted"]}  cambiados: {summary["updated"]}  '
+            f'sin cambios: {summary["unchanged"]}  retirados: {summary["removed"]}'
+        )
+        self.stdout.write(f'  Filas del feed: {processed} ({processed / elapsed if elapsed else 0:.0f} filas/s)')
+        if self.errors:
+            self.stdout.write(self.style.WARNING(f'  {self.errors} filas inválidas omitidas'))
+
+    def reject(self, line, message):
+        self.errors += 1
+        self.stderr.write(f'  Línea {line}: {message}')
+        if self.errors >= self.max_errors:
+            raise CommandError(f'Demasiadas filas inválidas ({self.errors}); sincronización abortada.')
+
+    def write_inserts(self, products):
+        if products:
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+                deltas = {}
+                for product in products:
+                    count_change(deltas, None, (product.category_id, product.stock))
+                Category.objects.apply_count_deltas(deltas)
+
+    def locked_state(self, ids):
+        """
+        {id: (categoría, stock)} de las filas bloqueadas (en orden de PK, como el checkout).
+        Los deltas de los contadores salen de aquí y no de la precarga: durante una
+        sincronización larga los checkouts y reservas siguen cambiando el stock.
+        """
+        return {
+            pk: (category_id, stock)
+            for pk, category_id, stock in Product.objects.select_for_update().filter(id__in=ids)
+            .order_by('pk').values_list('id', 'category_id', 'stock')
+        }
+
+    def write_updates(self, products):
+        # Solo las filas cuyo hash cambió: updated_at se mueve únicamente para ellas
+        if products:
+            with transaction.atomic():
+                before = self.locked_state([product.id for product in products])
+                Product.objects.bulk_update(
+                    products,
+                    ['category_id', 'name', 'description', 'price', 'stock', 'image_url', 'content_hash', 'updated_at'],
+                )
+                deltas = {}
+                for product in products:
+                    if product.id in before: # Eliminado desde la precarga: el UPDATE no lo tocó
+                        count_change(deltas, before[product.id], (product.category_id, product.stock))
+                Category.objects.apply_count_deltas(deltas)
+
+    def write_removed(self, ids, mode, now):
+        with transaction.atomic():
+            products = Product.objects.filter(id__in=ids)
+            if mode == 'delete':
+                products.delete() # Bloquea y descuenta lo que haya al eliminar (ProductQuerySet.delete)
+            else:
+                before = self.locked_state(ids)
+                # Se vacía el hash: si el producto vuelve al feed se actualiza, y mientras no vuelva no se toca más
+                products.update(stock=0, content_hash='', updated_at=now)
+                deltas = {}
+                for category_id, stock in before.values():
+                    count_change(deltas, (category_id, stock), (category_id, 0))
+                Category.objects.apply_count_deltas(deltas)
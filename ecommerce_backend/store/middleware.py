@@ -0,0 +1,77 @@
+"""
+Compresión negociada (brotli o gzip) de las respuestas de la API.
+
+WhiteNoise solo comprime los estáticos. Aquí se comprimen las respuestas no
+streaming con tipos de la API (JSON, NDJSON, CSV) a partir de
+API_COMPRESSION_MIN_SIZE bytes: por debajo, las cabeceras y la CPU pesan más
+que el ahorro. El HTML no se comprime: las páginas del admin llevan el token
+CSRF y comprimirlas las expondría a BREACH. La exportación en streaming ya
+trae su propio gzip (Content-Encoding), así que se deja pasar.
+
+brotli es opcional: sin el paquete instalado solo se negocia gzip.
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError: # pragma: no cover - depende del entorno
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+
+
+def accepted_encodings(header):
+    """Codificaciones de Accept-Encoding con q > 0 (p. ej. 'gzip, br;q=0.9' -> {'gzip', 'br'})."""
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class CompressionMiddleware:
+    """Prefiere brotli (más compacto con costo de CPU similar a calidad media) y si no, gzip."""
+    gzip_level = 6
+    brotli_quality = 5 # 11 es para estáticos precomprimidos; con contenido dinámico cuesta demasiada CPU
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if response.streaming or content_type not in COMPRESSIBLE_TYPES or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.API_COMPRESSION_MIN_SIZE:
+            return response
+
+        encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in encodings:
+            encoding, content = 'br', brotli.compress(response.content, quality=self.brotli_quality)
+        elif 'gzip' in encodings:
+            encoding, content = 'gzip', gzip.compress(response.content, compresslevel=self.gzip_level, mtime=0)
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag # El cuerpo ya no es idéntico byte a byte
+        return response
@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-18 02:24
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+from store.operations import RunPostgreSQL
+
+
+PRODUCT_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION store_product_search_document() RETURNS trigger AS $$
+BEGIN
+    NEW.search_document :=
+        setweight(to_tsvector('spanish', unaccent(coalesce(NEW.name, ''))), 'A') ||
+        setweight(to_tsvector('spanish', unaccent(coalesce(
+            (SELECT name FROM store_category WHERE id = NEW.category_id), ''))), 'B') ||
+        setweight(to_tsvector('spanish', unaccent(coalesce(NEW.description, ''))), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_product_search_document_trg
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON store_product
+    FOR EACH ROW EXECUTE FUNCTION store_product_search_document();
+
+-- Renombrar una categoría recalcula el documento de sus productos
+CREATE OR REPLACE FUNCTION store_category_search_document() RETURNS trigger AS $$
+BEGIN
+    UPDATE store_product SET name = name WHERE category_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_category_search_document_trg
+    AFTER UPDATE OF name ON store_category
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION store_category_search_document();
+
+-- Rellenar los productos existentes
+UPDATE store_product SET name = name;
+"""
+
+DROP_PRODUCT_SEARCH_TRIGGER = """
+DROP TRIGGER IF EXISTS store_category_search_document_trg ON store_category;
+DROP FUNCTION IF EXISTS store_category_search_document();
+DROP TRIGGER IF EXISTS store_product_search_document_trg ON store_product;
+DROP FUNCTION IF EXISTS store_product_search_document();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_product_keyset_indexes'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        RunPostgreSQL(PRODUCT_SEARCH_TRIGGER, DROP_PRODUCT_SEARCH_TRIGGER),
+        RunPostgreSQL(
+            'CREATE INDEX product_search_document_gin ON store_product USING gin (search_document);',
+            'DROP INDEX IF EXISTS product_search_document_gin;',
+        ),
+    ]
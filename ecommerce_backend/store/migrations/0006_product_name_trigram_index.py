@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 02:40
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from store.operations import RunPostgreSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_search_document'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # Sirve name ILIKE 'q%' (no UPPER(name) LIKE, que compila istartswith) y la similitud de palabra (<%) del autocompletado
+        RunPostgreSQL(
+            'CREATE INDEX product_name_trgm_gin ON store_product USING gin (name gin_trgm_ops);',
+            'DROP INDEX IF EXISTS product_name_trgm_gin;',
+        ),
+    ]
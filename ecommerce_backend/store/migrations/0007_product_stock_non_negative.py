@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 02:26
+
+from django.db import migrations, models
+
+
+def clamp_negative_stock(apps, schema_editor):
+    # Los PATCH del carrito podían dejar stock negativo; se corrige antes de crear el constraint
+    Product = apps.get_model('store', 'Product')
+    Product.objects.filter(stock__lt=0).update(stock=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_product_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_negative_stock, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(condition=models.Q(('stock__gte', 0)), name='product_stock_non_negative'),
+        ),
+    ]
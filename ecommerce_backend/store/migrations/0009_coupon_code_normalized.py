@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 02:30
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Trim, Upper
+
+
+def normalize_coupon_codes(apps, schema_editor):
+    # Los códigos pasan a guardarse en mayúsculas; se normalizan los existentes
+    Coupon = apps.get_model('store', 'Coupon')
+    # Códigos que solo difieren en mayúsculas o espacios chocarían con el índice único:
+    # se listan para que se decida cuál conservar (cada uno puede tener pedidos)
+    collisions = (
+        Coupon.objects.annotate(normalized=Upper(Trim('code'))).values('normalized')
+        .annotate(total=Count('id')).filter(total__gt=1).values_list('normalized', flat=True)
+    )
+    groups = {}
+    for pk, code, normalized in (
+        Coupon.objects.annotate(normalized=Upper(Trim('code'))).filter(normalized__in=list(collisions))
+        .order_by('normalized', 'id').values_list('id', 'code', 'normalized')
+    ):
+        groups.setdefault(normalized, []).append(f'{code!r} (id {pk})')
+    if groups:
+        details = '; '.join(f'{normalized}: {", ".join(codes)}' for normalized, codes in groups.items())
+        raise RuntimeError(
+            'No se pueden normalizar los códigos de cupón: hay códigos que solo difieren en '
+            f'mayúsculas o espacios ({details}). Renombre o elimine los duplicados y vuelva a ejecutar migrate.'
+        )
+    Coupon.objects.update(code=Upper(Trim('code')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_coupon_codes, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='order',
+            name='coupon',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='store.coupon'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddConstraint(
+            model_name='coupon',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('code'), name='coupon_code_upper_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_coupon_code_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coupon',
+            name='is_public',
+            field=models.BooleanField(default=False, help_text='Se ofrece automáticamente en el carrito (best_coupon) sin que el cliente conozca el código'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_coupon_is_public'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.CharField(blank=True, db_default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='supplier',
+            field=models.CharField(blank=True, db_default='', max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id__isnull', False)), fields=('supplier', 'external_id'), name='product_supplier_external_id_uniq'),
+        ),
+    ]
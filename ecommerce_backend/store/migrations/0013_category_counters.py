@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def recount_categories(apps, schema_editor):
+    # Misma cuenta que CategoryQuerySet.recount(), con los modelos históricos
+    Category = apps.get_model('store', 'Category')
+    Product = apps.get_model('store', 'Product')
+    products = Product.objects.filter(category=OuterRef('pk')).order_by().values('category')
+    Category.objects.update(
+        product_count=Coalesce(Subquery(products.annotate(total=Count('id')).values('total')), 0),
+        in_stock_count=Coalesce(Subquery(products.filter(stock__gt=0).annotate(total=Count('id')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='productos'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='in_stock_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='con stock'),
+        ),
+        migrations.RunPython(recount_categories, migrations.RunPython.noop),
+    ]
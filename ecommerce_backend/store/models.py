@@ -1,9 +1,66 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Upper
+from django.utils import timezone
 from django.utils.text import slugify # Importar para el slug
 
+
+def count_change(deltas, before, after):
+    """
+    Acumula en `deltas` ({category_id: [productos, con stock]}) el paso de un
+    producto de `before` a `after`, cada uno (category_id, stock) o None si el
+    producto no existe (alta o baja). Mover de categoría resta en una y suma en otra.
+    """
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            category_id, stock = state
+            counts = deltas.setdefault(category_id, [0, 0])
+            counts[0] += sign
+            if stock > 0:
+                counts[1] += sign
+    return deltas
+
+
+class CategoryQuerySet(models.QuerySet):
+
+    def apply_count_deltas(self, deltas):
+        """
+        Aplica deltas de count_change() con F(): una UPDATE por categoría, en
+        orden de id para que dos transacciones no se bloqueen en cruz. Debe
+        llamarse dentro de la transacción que modificó los productos.
+        """
+        now = timezone.now()
+        for category_id in sorted(deltas):
+            products, in_stock = deltas[category_id]
+            if products or in_stock:
+                self.filter(pk=category_id).update(
+                    product_count=F('product_count') + products,
+                    in_stock_count=F('in_stock_count') + in_stock,
+                    updated_at=now, # Los contadores son parte de la categoría (versión del catálogo)
+                )
+
+    def recount(self):
+        """Recalcula los contadores desde la tabla de productos (reparación y cargas masivas con SQL directo)."""
+        products = Product.objects.filter(category=OuterRef('pk')).order_by().values('category')
+        return self.update(
+            product_count=Coalesce(Subquery(products.annotate(total=Count('id')).values('total')), 0),
+            in_stock_count=Coalesce(Subquery(products.filter(stock__gt=0).annotate(total=Count('id')).values('total')), 0),
+            updated_at=timezone.now(),
+        )
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True) # Campo para URLs amigables
+    updated_at = models.DateTimeField(auto_now=True) # También se toca al eliminar uno de sus productos (ver store/caching.py)
+    # Contadores desnormalizados: los mantienen Product.save(), la eliminación (signals.py), el inventario,
+    # el checkout y las cargas masivas. recount_categories los repara.
+    product_count = models.IntegerField('productos', default=0, editable=False)
+    in_stock_count = models.IntegerField('con stock', default=0, editable=False) # Productos con stock > 0
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Categories" # Para que en el admin aparezca "Categories"
@@ -17,8 +74,26 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+class ProductQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Eliminación masiva (acción del admin, sync_catalog): descuenta los productos
+        de los contadores de su categoría con una UPDATE por categoría, no una por
+        producto. El estado previo se lee bloqueado, como en Product.save().
+        """
+        with transaction.atomic(using=self.db):
+            deltas = {}
+            for category_id, stock in self.order_by('pk').select_for_update().values_list('category_id', 'stock'):
+                count_change(deltas, (category_id, stock), None)
+            result = super().delete()
+            Category.objects.apply_count_deltas(deltas)
+        return result
+
+
 class Product(models.Model):
-    category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE)
+    # Sin índice propio: lo cubren los índices compuestos que empiezan por category
+    category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE, db_index=False)
     name = models.CharField(max_length=200) # Renombrado de 'nombre'
     description = models.TextField(blank=True) # Renombrado de 'descripcion', ahora opcional
     price = models.DecimalField(max_digits=10, decimal_places=2) # Renombrado de 'precio'
@@ -28,8 +103,64 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True) # Fecha de creación automática
     updated_at = models.DateTimeField(auto_now=True)   # Fecha de última actualización automática
 
+    # Sincronización con catálogos de proveedores (comando sync_catalog)
+    supplier = models.CharField(max_length=50, blank=True, db_default='') # Proveedor del feed ('' = producto propio)
+    external_id = models.CharField(max_length=100, null=True, blank=True) # Id del producto en el feed del proveedor
+    content_hash = models.CharField(max_length=32, blank=True, db_default='', editable=False) # Hash de los campos del feed
+
+    # Documento de búsqueda (nombre 'A', categoría 'B', descripción 'C') en configuración 'spanish'.
+    # Lo mantiene un trigger de PostgreSQL y lo indexa un GIN (ver migración 0005).
+    search_document = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at'] # Ordenar por fecha de creación descendente (los más nuevos primero)
+        indexes = [
+            # Índices compuestos (campo, id) para la paginación keyset de cada ordering_field
+            models.Index(fields=['created_at', 'id'], name='product_created_id_idx'),
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            models.Index(fields=['stock', 'id'], name='product_stock_id_idx'),
+            # Max(updated_at) de la versión del catálogo (ETag) se resuelve leyendo el extremo del índice
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+            # Navegación por categoría (filtro por category_id, sin JOIN) con el orden por defecto y por precio
+            models.Index(fields=['category', '-created_at', '-id'], name='product_cat_created_idx'),
+            models.Index(fields=['category', 'price', 'id'], name='product_cat_price_idx'),
+            # Solo productos con stock (?in_stock=true): el recorrido salta los agotados
+            models.Index(
+                fields=['category', '-created_at', '-id'], condition=models.Q(stock__gt=0), name='product_in_stock_idx',
+            ),
+        ]
+        constraints = [
+            # Las reservas descuentan stock con UPDATE condicional; la BD garantiza que nunca sea negativo
+            models.CheckConstraint(condition=models.Q(stock__gte=0), name='product_stock_non_negative'),
+            # Un id externo por proveedor; también es el índice con el que sync_catalog precarga {external_id: hash}
+            models.UniqueConstraint(
+                fields=['supplier', 'external_id'], condition=models.Q(external_id__isnull=False),
+                name='product_supplier_external_id_uniq',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'category', 'category_id', 'stock'} & set(update_fields):
+            return super().save(*args, **kwargs) # No cambia ningún contador
+        # Producto y contadores de su categoría en la misma transacción; el estado previo se lee bloqueado
+        with transaction.atomic():
+            before = None
+            if not self._state.adding:
+                before = Product.objects.select_for_update().filter(pk=self.pk).values_list('category_id', 'stock').first()
+            super().save(*args, **kwargs)
+            Category.objects.apply_count_deltas(count_change({}, before, (self.category_id, self.stock)))
+
+    def delete(self, *args, **kwargs):
+        # Sin receiver post_delete: así las eliminaciones masivas (ProductQuerySet.delete) no pagan una UPDATE por fila
+        with transaction.atomic():
+            before = Product.objects.select_for_update().filter(pk=self.pk).values_list('category_id', 'stock').first()
+            result = super().delete(*args, **kwargs)
+            Category.objects.apply_count_deltas(count_change({}, before, None))
+        return result
 
     def __str__(self):
         return self.name
@@ -45,6 +176,7 @@ class Coupon(models.Model):
     discount_value = models.DecimalField(max_digits=10, decimal_places=2, help_text="Valor del descuento (ej. 10 para 10% o S/.10)")
     
     active = models.BooleanField(default=True, help_text="Indica si el cupón está activo y puede ser usado")
+    is_public = models.BooleanField(default=False, help_text="Se ofrece automáticamente en el carrito (best_coupon) sin que el cliente conozca el código")
     valid_from = models.DateTimeField(null=True, blank=True, help_text="Fecha y hora de inicio de validez")
     valid_until = models.DateTimeField(null=True, blank=True, help_text="Fecha y hora de fin de validez")
     
@@ -60,10 +192,70 @@ class Coupon(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        self.code = self.code.strip().upper() # Los códigos se guardan normalizados en mayúsculas
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.code
 
     class Meta:
         verbose_name = "Cupón"
         verbose_name_plural = "Cupones"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        constraints = [
+            # Garantiza unicidad sin distinguir mayúsculas aunque se escriba sin pasar por save()
+            models.UniqueConstraint(Upper('code'), name='coupon_code_upper_uniq'),
+        ]
+
+
+class Order(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('paid', 'Pagado'),
+        ('shipped', 'Enviado'),
+        ('delivered', 'Entregado'),
+        ('cancelled', 'Cancelado'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='orders', on_delete=models.PROTECT)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    shipping_address = models.TextField()
+
+    # Montos calculados en el servidor con los precios vigentes al momento del checkout
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    coupon = models.ForeignKey(Coupon, related_name='orders', null=True, blank=True, on_delete=models.SET_NULL)
+    discount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    shipping_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Pedido #{self.pk}'
+
+    class Meta:
+        verbose_name = "Pedido"
+        verbose_name_plural = "Pedidos"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
+    # SET_NULL para conservar el historial aunque se elimine el producto
+    product = models.ForeignKey(Product, related_name='order_items', null=True, on_delete=models.SET_NULL)
+    product_name = models.CharField(max_length=200) # Copia del nombre al momento de la compra
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+    line_total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f'{self.quantity} x {self.product_name}'
+
+    class Meta:
+        verbose_name = "Ítem de pedido"
+        verbose_name_plural = "Ítems de pedido"
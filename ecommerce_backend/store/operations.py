@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class RunPostgreSQL(migrations.RunSQL):
+    """
+    RunSQL que solo se ejecuta en PostgreSQL.
+
+    Para índices GIN, triggers y demás DDL específico de PostgreSQL, de modo que
+    las migraciones sigan aplicándose en SQLite (tests y benchmarks locales).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return 'Raw SQL operation (PostgreSQL only)'
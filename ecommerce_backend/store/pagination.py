@@ -0,0 +1,192 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sin COUNT(*) ni OFFSET.
+
+    La posición se codifica como (valor del campo de orden, id), de modo que
+    cada página es un rango sobre el índice compuesto (campo, id) y cuesta lo
+    mismo sin importar qué tan profundo esté en el catálogo.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field_name = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+        self.field = queryset.model._meta.get_field(self.field_name)
+
+        position, self.reverse = self.decode_cursor(request)
+
+        # En modo "reverse" (página anterior) se recorre el índice al revés
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}id')
+
+        if position is not None:
+            value, pk = position
+            if descending:
+                bound = Q(**{f'{self.field_name}__lte': value})
+                after = Q(**{f'{self.field_name}__lt': value}) | Q(**{self.field_name: value, 'id__lt': pk})
+            else:
+                bound = Q(**{f'{self.field_name}__gte': value})
+                after = Q(**{f'{self.field_name}__gt': value}) | Q(**{self.field_name: value, 'id__gt': pk})
+            # 'bound' es redundante pero permite al planner usar un index range scan
+            queryset = queryset.filter(bound & after)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_ordering(self, request, queryset, view):
+        """Toma el primer campo de ?ordering= válido para la vista o el orden por defecto."""
+        param = request.query_params.get(OrderingFilter.ordering_param)
+        valid_fields = getattr(view, 'ordering_fields', None) or []
+        if param:
+            for term in param.split(','):
+                term = term.strip()
+                if term.lstrip('-') in valid_fields:
+                    return term
+        return self.default_ordering
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if payload['o'] != self.ordering:
+                raise ValueError('El cursor pertenece a otro orden.')
+            value = self.field.to_python(payload['v'])
+            pk = int(payload['id'])
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return (value, pk), reverse
+
+    def encode_cursor(self, obj, reverse):
+        if isinstance(obj, dict): # Filas de values() (lectura rápida del catálogo)
+            value, pk = obj[self.field.attname], obj['id']
+        else:
+            value, pk = self.field.value_from_object(obj), obj.pk
+        payload = {
+            'o': self.ordering,
+            'v': value.isoformat() if hasattr(value, 'isoformat') else str(value), # Como Field.value_to_string
+            'id': pk,
+        }
+        if reverse:
+            payload['r'] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Valor del cursor de paginación.',
+            'schema': {'type': 'string'},
+        }]
+
+
+class ProductPagination(BasePagination):
+    """
+    Paginación del catálogo: keyset por defecto, o la paginación por número de
+    página de siempre cuando se envía ?page=N o ?pagination=page.
+
+    Las búsquedas sin ?ordering= se ordenan por relevancia (SearchRank), que no
+    es un campo indexable, así que también usan paginación por número de página.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+    page_number_class = PageNumberPagination
+
+    def use_page_numbers(self, request):
+        page_query_param = self.page_number_class.page_query_param
+        ranked_search = (
+            request.query_params.get(api_settings.SEARCH_PARAM)
+            and not request.query_params.get(OrderingFilter.ordering_param)
+        )
+        return bool(
+            request.query_params.get(self.mode_query_param) == 'page'
+            or page_query_param in request.query_params
+            or ranked_search
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_page_numbers(request):
+            self.paginator = self.page_number_class()
+        else:
+            self.paginator = self.keyset_class()
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.keyset_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.keyset_class().get_schema_operation_parameters(view)
+            + self.page_number_class().get_schema_operation_parameters(view)
+        )
@@ -0,0 +1,89 @@
+"""
+Lectura rápida del catálogo (list/retrieve de ProductViewSet).
+
+ProductSerializer crea un campo DRF por columna y llama a su to_representation
+en cada fila; con páginas grandes eso domina el tiempo de CPU, y category_name
+costaba una query por fila. Aquí las filas salen de queryset.values() con el
+nombre de la categoría en el mismo JOIN, se cargan en ProductRow (__slots__) y
+se convierten a dict con una función generada una sola vez por conjunto de
+campos. El JSON es el mismo que el de ProductSerializer.
+"""
+import decimal
+from functools import lru_cache
+
+from django.db.models import F
+from django.utils import timezone
+
+CENT = decimal.Decimal('0.01')
+
+# Campo del serializador -> (atributo de ProductRow, formateador o None)
+FIELD_SOURCES = {
+    'id': ('id', None),
+    'name': ('name', None),
+    'description': ('description', None),
+    'price': ('price', 'format_price'),
+    'stock': ('stock', None),
+    'category': ('category_id', None),
+    'image_url': ('image_url', None),
+    'category_name': ('category_name', None),
+    'created_at': ('created_at', 'format_datetime'),
+    'updated_at': ('updated_at', 'format_datetime'),
+}
+
+
+class ProductRow:
+    """Producto de solo lectura: los atributos que se leyeron de values(), sin instancia del modelo."""
+    __slots__ = tuple(attribute for attribute, _ in FIELD_SOURCES.values())
+
+    def __init__(self, **values):
+        for attribute, value in values.items():
+            setattr(self, attribute, value)
+
+    @property
+    def pk(self):
+        return self.id
+
+
+def format_price(value, tz):
+    # Como serializers.DecimalField(decimal_places=2) con COERCE_DECIMAL_TO_STRING
+    return None if value is None else format(value.quantize(CENT), 'f')
+
+
+def format_datetime(value, tz):
+    # Como serializers.DateTimeField: hora en la zona actual, ISO 8601 con 'Z' para UTC
+    if value is None:
+        return None
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def row_values(queryset, fields, extra=()):
+    """values() con las columnas de `fields` (más `extra`, p. ej. el campo de orden del cursor)."""
+    columns = {FIELD_SOURCES[name][0] for name in fields} | {'id', *extra}
+    expressions = {'category_name': F('category__name')} if 'category_name' in columns else {}
+    columns.discard('category_name')
+    return queryset.values(*sorted(columns), **expressions)
+
+
+@lru_cache(maxsize=None)
+def compile_renderer(fields):
+    """
+    Genera `render(row, tz) -> dict` para una tupla de campos: un literal de
+    dict sin bucles ni búsquedas por campo. Los nombres vienen de
+    FIELD_SOURCES (validados en la vista), nunca de la petición tal cual.
+    """
+    items = []
+    for name in fields:
+        attribute, formatter = FIELD_SOURCES[name]
+        expression = f'row.{attribute}' if formatter is None else f'{formatter}(row.{attribute}, tz)'
+        items.append(f'{name!r}: {expression}')
+    source = 'def render(row, tz):\n    return {' + ', '.join(items) + '}\n'
+    namespace = {'format_price': format_price, 'format_datetime': format_datetime}
+    exec(compile(source, f'<product_rows {",".join(fields)}>', 'exec'), namespace)
+    return namespace['render']
+
+
+def render_rows(rows, fields):
+    """Dicts de values() -> ProductRow -> representación JSON, en el orden de `fields`."""
+    render, tz = compile_renderer(tuple(fields)), timezone.get_current_timezone()
+    return [render(ProductRow(**values), tz) for values in rows]
@@ -0,0 +1,289 @@
+"""
+Perfilado opcional de peticiones (REQUEST_PROFILING=True).
+
+ProfilingMiddleware mide cada petición y agrega la cabecera Server-Timing
+(visible en la pestaña Network del navegador):
+
+- total: toda la petición, incluido el resto del middleware (va primero en MIDDLEWARE).
+- view: desde que se despacha la vista hasta que devuelve la respuesta.
+- db: tiempo y número de consultas (execute_wrapper).
+- auth / serialize: autenticación de DRF y `serializer.data` (o render_rows).
+- render: el renderer (JSON) de la respuesta.
+
+Lo que queda entre total y view + render es middleware. Además acumula
+estadísticas por ruta (route_stats, por proceso) y guarda volcados de cProfile
+de 1 de cada REQUEST_PROFILING_SAMPLE_RATE peticiones y de las que tardan más
+de REQUEST_PROFILING_SLOW_MS en REQUEST_PROFILING_DIR, conservando los
+REQUEST_PROFILING_MAX_DUMPS más recientes. Se consultan en /api/profiling/
+(solo administradores).
+
+Desactivado, el middleware se descarta al arrancar (MiddlewareNotUsed) y
+timed() solo lee una ContextVar: el costo es prácticamente cero.
+"""
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+_current = ContextVar('request_profile', default=None)
+
+DUMP_NAME_RE = re.compile(r'^[\w-]+$')
+SORT_KEYS = set(pstats.Stats.sort_arg_dict_default) # cumulative, tottime, calls, ncalls...
+
+
+class RequestProfile:
+    """Tiempos de una petición en curso (segundos)."""
+
+    def __init__(self):
+        self.spans = {}
+        self.open = set()
+        self.queries = 0
+        self.view_start = None
+        self.view_end = None
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', time.perf_counter() - start)
+
+
+@contextmanager
+def timed(name):
+    """Suma la duración del bloque al tramo `name` de la petición perfilada; sin perfilado no hace nada."""
+    profile = _current.get()
+    if profile is None or name in profile.open: # Anidado (un serializer dentro de otro): cuenta el exterior
+        yield
+        return
+    profile.open.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+        profile.open.discard(name)
+
+
+_instrumented = False
+
+
+def instrument_drf():
+    """Mide la autenticación y `serializer.data` de DRF. Se instala una sola vez, al activar el middleware."""
+    global _instrumented
+    if _instrumented:
+        return
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    data = BaseSerializer.data # Serializer.data y ListSerializer.data lo llaman con super()
+
+    def timed_data(serializer):
+        with timed('serialize'):
+            return data.fget(serializer)
+
+    perform_authentication = APIView.perform_authentication
+
+    def timed_authentication(view, request):
+        with timed('auth'):
+            return perform_authentication(view, request)
+
+    BaseSerializer.data = property(timed_data)
+    APIView.perform_authentication = timed_authentication
+    _instrumented = True
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class RouteStats:
+    """Estadísticas por ruta ('GET product-list') de las peticiones perfiladas en este proceso."""
+
+    def __init__(self, window=1000):
+        self.window = window # Duraciones recientes guardadas por ruta para los percentiles
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, status, total_ms, spans_ms, queries):
+        with self.lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = {'count': 0, 'errors': 0, 'max_ms': 0.0, 'queries': 0, 'spans': {}, 'recent': deque(maxlen=self.window)}
+            stats['count'] += 1
+            stats['errors'] += status >= 500
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['queries'] += queries
+            stats['recent'].append(total_ms)
+            for name, value in spans_ms.items():
+                stats['spans'][name] = stats['spans'].get(name, 0.0) + value
+
+    def snapshot(self):
+        """Una fila por ruta, las de mayor tiempo acumulado primero; los tramos son promedios en ms."""
+        with self.lock:
+            rows = [
+                {
+                    'route': route,
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'p50_ms': round(percentile(stats['recent'], 0.5), 2),
+                    'p95_ms': round(percentile(stats['recent'], 0.95), 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'queries': round(stats['queries'] / stats['count'], 1),
+                    'mean_ms': {name: round(value / stats['count'], 2) for name, value in stats['spans'].items()},
+                }
+                for route, stats in self.routes.items()
+            ]
+        return sorted(rows, key=lambda row: row['mean_ms'].get('total', 0) * row['count'], reverse=True)
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+
+route_stats = RouteStats()
+
+
+class ProfileDumps:
+    """Directorio rotativo de volcados de cProfile (<fecha>-<ms>ms-<método>-<ruta>.prof)."""
+
+    def __init__(self, directory, max_dumps):
+        self.directory = directory
+        self.max_dumps = max_dumps
+
+    def save(self, profiler, route, total_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^\w-]+', '_', route)[:80]
+        name = f'{datetime.now():%Y%m%dT%H%M%S%f}-{total_ms:.0f}ms-{slug}'
+        profiler.dump_stats(self.path(name))
+        for dump in self.list()[self.max_dumps:]:
+            try:
+                os.remove(self.path(dump['name']))
+            except FileNotFoundError: # Otro worker ya lo rotó
+                pass
+        return name
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.prof')
+
+    def list(self):
+        """Volcados del más reciente al más antiguo."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.prof') and entry.is_file()]
+        except FileNotFoundError:
+            return []
+        dumps = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError: # Rotado por otro worker mientras se listaba
+                continue
+            dumps.append({'name': entry.name[:-len('.prof')], 'size': stat.st_size, 'modified': stat.st_mtime})
+        return sorted(dumps, key=lambda dump: (dump['modified'], dump['name']), reverse=True)
+
+    def find(self, name):
+        """Ruta del volcado o None si el nombre no es válido o no existe."""
+        if not DUMP_NAME_RE.match(name):
+            return None
+        path = self.path(name)
+        return path if os.path.isfile(path) else None
+
+    def report(self, name, sort='cumulative', limit=40):
+        """Resumen de pstats como texto (funciones ordenadas por `sort`, las primeras `limit`)."""
+        stream = io.StringIO()
+        pstats.Stats(self.path(name), stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+def profile_dumps():
+    return ProfileDumps(settings.REQUEST_PROFILING_DIR, settings.REQUEST_PROFILING_MAX_DUMPS)
+
+
+def server_timing(spans_ms, queries):
+    """Valor de la cabecera Server-Timing (p. ej. 'total;dur=12.3, db;dur=4.1;desc="3 queries"')."""
+    metrics = []
+    for name in ('total', 'view', 'db', 'auth', 'serialize', 'render'):
+        if name in spans_ms:
+            desc = f';desc="{queries} queries"' if name == 'db' else ''
+            metrics.append(f'{name};dur={spans_ms[name]:.1f}{desc}')
+    return ', '.join(metrics)
+
+
+class ProfilingMiddleware:
+    """Server-Timing, estadísticas por ruta y volcados de cProfile muestreados (ver el docstring del módulo)."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        self.slow_ms = settings.REQUEST_PROFILING_SLOW_MS
+        self.dumps = profile_dumps()
+        self.requests = itertools.count(1)
+        instrument_drf()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        # Con umbral de lentitud hay que perfilar todas: no se sabe cuáles serán lentas hasta que terminan
+        sampled = bool(self.sample_rate) and next(self.requests) % self.sample_rate == 0
+        profiler = cProfile.Profile() if sampled or self.slow_ms else None
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile.execute):
+                if profiler is not None:
+                    try:
+                        profiler.enable()
+                    except ValueError: # Otro perfilador activo en el intérprete
+                        profiler = None
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        spans_ms = {name: seconds * 1000 for name, seconds in profile.spans.items()}
+        spans_ms['total'] = total * 1000
+        if profile.view_start is not None:
+            spans_ms['view'] = ((profile.view_end or start + total) - profile.view_start) * 1000
+        response['Server-Timing'] = server_timing(spans_ms, profile.queries)
+
+        match = request.resolver_match
+        route = f'{request.method} {(match.view_name or match.route) if match else "sin ruta"}'
+        route_stats.record(route, response.status_code, spans_ms['total'], spans_ms, profile.queries)
+        if profiler is not None and (sampled or spans_ms['total'] >= self.slow_ms):
+            self.dumps.save(profiler, route, spans_ms['total'])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Las Response de DRF se renderizan después de este punto: el resto es el renderer
+        profile = _current.get()
+        if profile is not None:
+            profile.view_end = render_start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: profile.add('render', time.perf_counter() - render_start))
+        return response
@@ -0,0 +1,76 @@
+"""
+Inspección de planes de consulta (EXPLAIN) para los tests de regresión.
+
+sequential_scans() devuelve las tablas grandes que una consulta recorre
+completas. En PostgreSQL el EXPLAIN se pide con enable_seqscan = off: el
+planificador elige un índice siempre que exista uno aplicable, así que un
+Seq Scan que sobrevive significa que falta el índice, no que la tabla de
+prueba sea pequeña. Con los Seq Scan desactivados, un filtro sin índice
+puede aparecer también como un índice leído entero (sin Index Cond) que
+descarta filas con Filter; eso cuenta igual, salvo bajo un Limit (el
+recorrido ordenado del listado keyset se detiene al llenar la página). Un
+Sort, Hash o Aggregate entre el Limit y el recorrido consume toda su
+entrada, así que ahí el Limit ya no acorta nada.
+
+En SQLite se usa EXPLAIN QUERY PLAN y solo se detecta el caso grueso:
+'SCAN tabla' sin índice alguno.
+"""
+import json
+import re
+
+from django.db import connections
+
+# Tablas que crecen con el negocio; las de categorías y cupones caben en memoria
+LARGE_TABLES = frozenset({'store_product', 'store_order', 'store_orderitem', 'accounts_customuser'})
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+# Nodos que leen toda su entrada antes de devolver la primera fila
+BLOCKING_NODES = frozenset({'Sort', 'Hash', 'Aggregate'})
+
+
+def explain(sql, using='default'):
+    """Plan de `sql` (ya con los parámetros interpolados, como en connection.queries)."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+            return json.loads(plan) if isinstance(plan, str) else plan
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_nodes(node, limited=False):
+    """Recorre en profundidad los nodos de un plan JSON de PostgreSQL: (nodo, ¿hay un Limit encima?)."""
+    yield node, limited
+    if node['Node Type'] in BLOCKING_NODES:
+        limited = False
+    else:
+        limited = limited or node['Node Type'] == 'Limit'
+    for child in node.get('Plans', ()):
+        yield from plan_nodes(child, limited)
+
+
+def is_full_scan(node, limited):
+    if node['Node Type'] == 'Seq Scan':
+        return True
+    return (
+        node['Node Type'] in ('Index Scan', 'Index Only Scan')
+        and 'Index Cond' not in node and 'Filter' in node and not limited
+    )
+
+
+def sequential_scans(sql, tables=LARGE_TABLES, using='default'):
+    """Conjunto de tablas de `tables` que la consulta lee completas."""
+    plan = explain(sql, using)
+    if connections[using].vendor == 'postgresql':
+        return {
+            node['Relation Name'] for root in plan for node, limited in plan_nodes(root['Plan'])
+            if node.get('Relation Name') in tables and is_full_scan(node, limited)
+        }
+    return {match.group(1) for match in map(SQLITE_FULL_SCAN.match, plan) if match and match.group(1) in tables}
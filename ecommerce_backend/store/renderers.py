@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    JSON por líneas. La exportación escribe su propio stream; el renderer
+    permite negociar ?format=ndjson y renderiza las respuestas normales
+    (por ejemplo, errores) como una sola línea.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV para ?format=csv: una fila por dict, con las claves del primero como cabecera."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON con orjson (renderer por defecto de la API). Mismo resultado que el
+    JSONRenderer de DRF con la configuración del proyecto (compacto, UTF-8 sin
+    escapar, fechas ISO 8601 con 'Z'); lo que orjson no conoce (Decimal,
+    traducciones perezosas, QuerySets...) pasa por el JSONEncoder de DRF.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None # JSON siempre es UTF-8
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2 # orjson solo indenta con 2 espacios
+        content = orjson.dumps(data, default=JSONEncoder().default, option=options)
+        # Como DRF: U+2028/U+2029 escapados para poder incrustar el JSON en <script>
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            return True # application/json; indent=4
+        return bool(renderer_context.get('indent')) # API navegable
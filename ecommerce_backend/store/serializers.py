@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import Product, Category, Coupon
+from .models import Product, Category, Coupon, Order, OrderItem
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug'] # Incluye el nuevo campo 'slug'
+        fields = ['id', 'name', 'slug', 'product_count', 'in_stock_count'] # Incluye el nuevo campo 'slug'
+        read_only_fields = ('product_count', 'in_stock_count') # Contadores mantenidos por el backend (sin queries extra)
 
 class ProductSerializer(serializers.ModelSerializer):
     # 'category_name' es un campo de solo lectura que obtiene el nombre de la categoría
@@ -23,6 +24,19 @@ class ProductSerializer(serializers.ModelSerializer):
         #     'category': {'write_only': True} # Para que el frontend solo envíe el ID de la categoría
         # }
 
+    # Conjuntos de campos con nombre para ?fields=; 'card' es lo que muestra ProductCard (sin la descripción)
+    field_sets = {
+        'card': ['id', 'name', 'price', 'stock', 'category', 'image_url', 'category_name'],
+        'all': Meta.fields,
+    }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            # Campos dispersos: solo se serializan los pedidos
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     # El método update personalizado que tenías no es estrictamente necesario si solo actualiza el stock
     # y otros campos. ModelSerializer.update() ya maneja esto por defecto.
     # Si tuvieras lógica de negocio compleja para el stock, lo dejarías.
@@ -34,4 +48,112 @@ class ProductSerializer(serializers.ModelSerializer):
 class CouponSerializer(serializers.ModelSerializer):
     class Meta:
         model = Coupon
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    def validate_code(self, value):
+        """Normaliza el código y valida unicidad sin distinguir mayúsculas."""
+        code = value.strip().upper()
+        queryset = Coupon.objects.filter(code=code)
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError("Ya existe un cupón con este código.")
+        return code
+
+class StockQuantitySerializer(serializers.Serializer):
+    """Cantidad para reservar o liberar stock de un producto."""
+    quantity = serializers.IntegerField(min_value=1, max_value=10000)
+
+
+class ProductBulkEntrySerializer(serializers.Serializer):
+    """Un cambio de la actualización masiva: precio y/o stock (absoluto o relativo)."""
+    id = serializers.IntegerField(min_value=1)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    stock = serializers.IntegerField(min_value=0, required=False)
+    stock_delta = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if 'stock' in attrs and 'stock_delta' in attrs:
+            raise serializers.ValidationError('Usa stock o stock_delta, no ambos.')
+        if not {'price', 'stock', 'stock_delta'} & attrs.keys():
+            raise serializers.ValidationError('Indica price, stock o stock_delta.')
+        return attrs
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'unit_price', 'quantity', 'line_total']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'user', 'status', 'shipping_address', 'subtotal', 'coupon', 'discount', 'shipping_cost', 'total', 'items', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class CheckoutLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, max_value=1000)
+    # Cualquier precio enviado por el cliente se ignora: el servidor vuelve a cotizar
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Datos de entrada del checkout (POST /api/orders/)."""
+    items = CheckoutLineSerializer(many=True, allow_empty=False, max_length=100)
+    shipping_address = serializers.CharField(max_length=500)
+    coupon_code = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    quote_token = serializers.CharField(required=False, allow_blank=True) # De /api/cart/price/: respeta los precios cotizados
+
+
+class CartPriceSerializer(serializers.Serializer):
+    """Datos de entrada de la cotización del carrito (POST /api/cart/price/)."""
+    items = CheckoutLineSerializer(many=True, allow_empty=False, max_length=100)
+    coupon_code = serializers.CharField(max_length=50, required=False, allow_blank=True)
+
+
+class CartLineQuoteSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    name = serializers.CharField()
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    quantity = serializers.IntegerField()
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    stock = serializers.IntegerField()
+    available = serializers.BooleanField()
+
+
+class CartQuoteSerializer(serializers.Serializer):
+    """Respuesta de la cotización: montos como texto, igual que en los pedidos."""
+    items = CartLineQuoteSerializer(many=True)
+    available = serializers.BooleanField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    coupon_code = serializers.CharField(allow_null=True)
+    coupon_detail = serializers.CharField(allow_null=True)
+    discount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    shipping_cost = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    quote_token = serializers.CharField()
+    expires_in = serializers.IntegerField()
+
+
+class CouponEvaluationSerializer(serializers.Serializer):
+    """
+    Entrada de best_coupon: el total del carrito o sus líneas, y los códigos
+    candidatos o public=true para evaluar todos los cupones públicos activos.
+    """
+    cart_total = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+    items = CheckoutLineSerializer(many=True, required=False, allow_empty=False, max_length=100)
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False, allow_empty=False, max_length=50,
+    )
+    public = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if ('cart_total' in attrs) == ('items' in attrs):
+            raise serializers.ValidationError('Envía cart_total o items (uno de los dos).')
+        if not attrs.get('codes') and not attrs['public']:
+            raise serializers.ValidationError('Envía la lista codes o public=true.')
+        return attrs
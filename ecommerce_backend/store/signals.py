@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .coupon_cache import coupon_rules
+from .filters import CATEGORY_SLUGS_CACHE_KEY
+from .models import Category, Coupon
+
+
+@receiver(pre_save, sender=Coupon)
+def remember_previous_coupon_code(sender, instance, raw=False, **kwargs):
+    """Guarda el código con el que estaba el cupón, para invalidarlo también si se renombra."""
+    if not raw and instance.pk is not None:
+        instance._previous_code = Coupon.objects.filter(pk=instance.pk).values_list('code', flat=True).first()
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon_rule(sender, instance, **kwargs):
+    """Mantiene la caché de reglas de cupones al día cuando se crea, edita, renombra o elimina un cupón."""
+    coupon_rules.invalidate(instance.code)
+    previous_code = instance.__dict__.pop('_previous_code', None)
+    if previous_code and previous_code != instance.code:
+        coupon_rules.invalidate(previous_code)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_slugs(sender, instance, **kwargs):
+    """El mapa {slug: id} de los filtros se reconstruye en la próxima petición."""
+    cache.delete(CATEGORY_SLUGS_CACHE_KEY)
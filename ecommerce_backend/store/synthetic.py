@@ -0,0 +1,120 @@
+"""
+Generador determinista de catálogo sintético (generate_synthetic_catalog).
+
+Solo usa la biblioteca estándar para que los procesos de trabajo no
+necesiten Django: cada bloque de productos se genera con su propio
+random.Random(f'{seed}:{bloque}'), así que el resultado es idéntico sin
+importar cuántos procesos se usen ni en qué orden terminen.
+"""
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from .bulk_load import copy_line
+
+# (nombre, slug, precio típico en S/.) de los departamentos base
+DEPARTMENTS = [
+    ('Electrónica', 'electronica', 450), ('Ropa', 'ropa', 80), ('Hogar', 'hogar', 120),
+    ('Deportes', 'deportes', 150), ('Libros', 'libros', 45), ('Juguetes', 'juguetes', 70),
+    ('Salud', 'salud', 60), ('Alimentos', 'alimentos', 25), ('Computación', 'computacion', 900),
+    ('Celulares', 'celulares', 1100), ('Electrodomésticos', 'electrodomesticos', 700),
+    ('Muebles', 'muebles', 600), ('Jardín', 'jardin', 90), ('Mascotas', 'mascotas', 55),
+    ('Bebés', 'bebes', 110), ('Belleza', 'belleza', 65), ('Ferretería', 'ferreteria', 75),
+    ('Automotriz', 'automotriz', 160), ('Oficina', 'oficina', 40), ('Música', 'musica', 320),
+    ('Videojuegos', 'videojuegos', 250), ('Calzado', 'calzado', 180), ('Accesorios', 'accesorios', 50),
+    ('Bebidas', 'bebidas', 18),
+]
+
+# (sustantivo, género y número) para concordar los adjetivos: m, f, mp, fp
+NOUNS = [
+    ('Audífonos', 'mp'), ('Cámara', 'f'), ('Parlante', 'm'), ('Monitor', 'm'), ('Teclado', 'm'), ('Mochila', 'f'),
+    ('Lámpara', 'f'), ('Silla', 'f'), ('Mesa', 'f'), ('Zapatillas', 'fp'), ('Polo', 'm'), ('Casaca', 'f'),
+    ('Reloj', 'm'), ('Licuadora', 'f'), ('Cafetera', 'f'), ('Sartén', 'f'), ('Olla', 'f'), ('Tostadora', 'f'),
+    ('Bicicleta', 'f'), ('Pelota', 'f'), ('Raqueta', 'f'), ('Mancuernas', 'fp'), ('Colchoneta', 'f'), ('Termo', 'm'),
+    ('Botella', 'f'), ('Cuaderno', 'm'), ('Rompecabezas', 'm'), ('Muñeca', 'f'), ('Peluche', 'm'), ('Perfume', 'm'),
+    ('Cepillo', 'm'), ('Secadora', 'f'), ('Alfombra', 'f'), ('Cortina', 'f'), ('Almohada', 'f'), ('Sábanas', 'fp'),
+    ('Estante', 'm'), ('Taladro', 'm'), ('Linterna', 'f'), ('Guitarra', 'f'), ('Tablet', 'f'), ('Maletín', 'm'),
+]
+# Adjetivos en masculino singular; inflect() los concuerda con el sustantivo
+ADJECTIVES = [
+    'Inalámbrico', 'Compacto', 'Profesional', 'Ergonómico', 'Portátil', 'Premium', 'Clásico', 'Deportivo',
+    'Ultraligero', 'Recargable', 'Plegable', 'Inteligente', 'Resistente', 'Ecológico', 'Digital', 'Vintage',
+    'Minimalista', 'Térmico', 'Impermeable', 'Multifunción',
+]
+INVARIABLE = {'Premium', 'Vintage', 'Multifunción'}
+BRANDS = [
+    'Andino', 'Inkatech', 'Kallpa', 'Pacífico', 'Sol de Oro', 'Amazonas', 'Cóndor', 'Titicaca', 'Huascarán',
+    'Nazca', 'Vicuña', 'Quinoa', 'Misti', 'Paracas', 'Chavín', 'Urubamba',
+]
+COLORS = ['Negro', 'Blanco', 'Azul', 'Rojo', 'Gris', 'Verde', 'Beige', 'Plateado', 'Rosado', 'Turquesa']
+FEATURES = [
+    'batería de larga duración', 'materiales de alta calidad', 'diseño ergonómico', 'garantía de 12 meses',
+    'fácil de limpiar', 'resistente al agua', 'ideal para uso diario', 'acabado premium',
+    'conexión Bluetooth 5.3', 'envío en 24 horas', 'libre de BPA', 'tecnología de bajo consumo',
+    'incluye estuche de transporte', 'certificación internacional', 'ajuste regulable', 'carga rápida USB-C',
+]
+OPENINGS = ['Perfecto para', 'Pensado para', 'Ideal para', 'Diseñado para', 'Recomendado para']
+AUDIENCES = ['el hogar', 'la oficina', 'viajes', 'deportistas', 'estudiantes', 'toda la familia', 'regalar', 'profesionales']
+
+
+def inflect(adjective, gender):
+    """Concuerda un adjetivo en masculino singular con el género y número del sustantivo."""
+    if adjective in INVARIABLE:
+        return adjective
+    if gender.startswith('f') and adjective.endswith('o'):
+        adjective = adjective[:-1] + 'a'
+    if gender.endswith('p'):
+        adjective += 's' if adjective[-1] in 'aeo' else 'es'
+    return adjective
+
+
+def category_rows(count):
+    """(nombre, slug, precio típico) de `count` categorías; más allá de la lista base se numeran."""
+    rows = []
+    for index in range(count):
+        name, slug, base = DEPARTMENTS[index % len(DEPARTMENTS)]
+        cycle = index // len(DEPARTMENTS)
+        if cycle:
+            name, slug = f'{name} {cycle + 1}', f'{slug}-{cycle + 1}'
+        rows.append((name, slug, base))
+    return rows
+
+
+def product_values(rng, category_id, base_price, now, days):
+    """Una fila en el orden de bulk_load.PRODUCT_COLUMNS."""
+    (noun, gender), brand = rng.choice(NOUNS), rng.choice(BRANDS)
+    adjective = inflect(rng.choice(ADJECTIVES), gender)
+    name = f'{noun} {adjective} {brand} {rng.choice(COLORS)} {rng.randint(100, 9999)}'
+    features = rng.sample(FEATURES, 3)
+    description = (
+        f'{noun} {adjective.lower()} de la marca {brand}: {features[0]}, {features[1]} y {features[2]}. '
+        f'{rng.choice(OPENINGS)} {rng.choice(AUDIENCES)}.'
+    )
+
+    # Precio log-normal alrededor del típico de la categoría, con terminaciones comerciales
+    price = max(1.0, base_price * math.exp(rng.gauss(0, 0.6)))
+    price = Decimal(int(price)) + Decimal(rng.choice(['0.90', '0.99', '0.50', '0.00']))
+
+    # Stock: ~8% agotado, la mayoría con pocas unidades y una cola larga
+    stock = 0 if rng.random() < 0.08 else min(5000, int(rng.paretovariate(1.3) * 5))
+
+    # Fechas de creación sesgadas hacia lo reciente (más productos nuevos que antiguos)
+    created_at = now - timedelta(seconds=int(days * 86400 * rng.random() ** 2))
+    updated_at = created_at + timedelta(seconds=int((now - created_at).total_seconds() * rng.random() * 0.5))
+
+    image_url = f'https://picsum.photos/seed/{rng.getrandbits(32):08x}/500/500'
+    return (category_id, name, description, price, stock, image_url, created_at, updated_at)
+
+
+def generate_chunk(seed, chunk, count, categories, now, days, as_copy):
+    """
+    Genera el bloque `chunk` de `count` productos. `categories` es una lista
+    de (category_id, precio típico). Con as_copy devuelve el texto listo
+    para COPY; si no, la lista de tuplas.
+    """
+    rng = random.Random(f'{seed}:{chunk}')
+    rows = (product_values(rng, *rng.choice(categories), now, days) for _ in range(count))
+    if as_copy:
+        return ''.join(copy_line(values) for values in rows)
+    return list(rows)
@@ -1,3 +1,1335 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.functions import Upper
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .coupon_cache import coupon_rules
+from .coupons import redeem_coupon
+from .checkout import place_order
+from .inventory import bulk_update_products, release_stock, reserve_stock
+from .management.commands.sync_catalog import Command as SyncCatalogCommand
+from .middleware import brotli
+from .models import Category, Coupon, Order, Product
+from .product_rows import render_rows, row_values
+from .profiling import route_stats
+from .query_plans import sequential_scans
+from .renderers import ORJSONRenderer
+from .serializers import ProductSerializer
+
+
+class StoreAPITestCase(APITestCase):
+    """Base común: limpia las cachés (throttling, cupones) y crea un catálogo pequeño."""
+
+    def setUp(self):
+        cache.clear()
+        coupon_rules.clear()
+        self.category = Category.objects.create(name='Electrónica')
+
+    def create_products(self, count, **kwargs):
+        return [
+            Product.objects.create(
+                category=kwargs.get('category', self.category),
+                name=f'Producto {i:03d}',
+                price=Decimal(kwargs.get('price', 10 + i)),
+                stock=kwargs.get('stock', i % 3),
+            )
+            for i in range(count)
+        ]
+
+
+class ProductPaginationTests(StoreAPITestCase):
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_keyset_walks_every_ordering_without_gaps(self):
+        # Precios y stock repetidos para forzar el desempate por id
+        self.create_products(45, price=25)
+        for ordering in ['name', '-name', 'price', '-price', 'created_at', '-created_at', 'stock', '-stock']:
+            ids = self.walk(f'/api/products/?ordering={ordering}')
+            self.assertEqual(len(ids), 45, ordering)
+            self.assertEqual(len(set(ids)), 45, ordering)
+
+    def test_previous_link_returns_previous_page(self):
+        self.create_products(45)
+        first = self.client.get('/api/products/?ordering=price')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']],
+        )
+
+    def test_page_number_mode_is_still_available(self):
+        self.create_products(25)
+        response = self.client.get('/api/products/?page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get('/api/products/?cursor=no-es-un-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductSearchTests(StoreAPITestCase):
+
+    def test_search_matches_name_and_category(self):
+        Product.objects.create(category=self.category, name='Laptop Gaming', price=Decimal('999.00'))
+        Product.objects.create(
+            category=Category.objects.create(name='Hogar'), name='Lámpara LED', price=Decimal('49.90'),
+        )
+        response = self.client.get('/api/products/?search=laptop')
+        self.assertEqual([item['name'] for item in response.data['results']], ['Laptop Gaming'])
+        self.assertEqual(response.data['count'], 1)
+
+        response = self.client.get('/api/products/?search=hogar&ordering=name')
+        self.assertEqual([item['name'] for item in response.data['results']], ['Lámpara LED'])
+
+
+class ProductSuggestTests(StoreAPITestCase):
+
+    def test_suggest_returns_compact_rows(self):
+        product = Product.objects.create(category=self.category, name='Laptop Gaming', price=Decimal('999.00'))
+        Product.objects.create(category=self.category, name='Mouse Gaming', price=Decimal('59.00'))
+        response = self.client.get('/api/products/suggest/?q=LAP')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'id': product.id, 'name': 'Laptop Gaming', 'category_slug': 'electronica'},
+        ])
+
+    def test_suggest_is_cached_per_prefix(self):
+        Product.objects.create(category=self.category, name='Laptop Gaming', price=Decimal('999.00'))
+        self.client.get('/api/products/suggest/?q=lap')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/suggest/?q=%20Lap%20')
+        self.assertEqual(len(response.data['results']), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'ILIKE y trigramas solo en PostgreSQL')
+    def test_prefix_predicate_can_use_the_trigram_index(self):
+        # UPPER(name) LIKE (lo que compila istartswith) no lo sirve el índice gin_trgm_ops sobre name
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/products/suggest/?q=lap_')
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('"store_product"."name" ILIKE \'lap\\_%\'', sql)
+        self.assertNotIn('UPPER(', sql)
+
+    def test_short_terms_skip_the_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/suggest/?q=l')
+        self.assertEqual(response.data['results'], [])
+
+
+class StockReservationTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(category=self.category, name='Laptop', price=Decimal('999.00'), stock=5)
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='admin', email='admin@test.com', password='Test1234!', is_staff=True)
+        self.customer = User.objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        self.client.force_authenticate(self.admin)
+
+    def test_only_admins_adjust_stock(self):
+        for user, expected in [(None, 401), (self.customer, 403)]:
+            self.client.force_authenticate(user)
+            for action in ('reserve', 'release'):
+                response = self.client.post(f'/api/products/{self.product.id}/{action}/', {'quantity': 1}, format='json')
+                self.assertEqual(response.status_code, expected, action)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_reserve_decrements_and_returns_new_stock(self):
+        response = self.client.post(f'/api/products/{self.product.id}/reserve/', {'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': self.product.id, 'stock': 2})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+
+    def test_reserve_more_than_available_is_rejected(self):
+        response = self.client.post(f'/api/products/{self.product.id}/reserve/', {'quantity': 6}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['stock'], 5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_release_returns_stock(self):
+        response = self.client.post(f'/api/products/{self.product.id}/release/', {'quantity': 2}, format='json')
+        self.assertEqual(response.data['stock'], 7)
+
+    def test_unknown_product_and_invalid_quantity(self):
+        self.assertEqual(self.client.post('/api/products/999999/reserve/', {'quantity': 1}, format='json').status_code, 404)
+        self.assertEqual(self.client.post('/api/products/999999/release/', {'quantity': 1}, format='json').status_code, 404)
+        response = self.client.post(f'/api/products/{self.product.id}/reserve/', {'quantity': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_database_rejects_negative_stock(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Product.objects.filter(pk=self.product.pk).update(stock=-1)
+
+
+class CheckoutTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        self.client.force_authenticate(self.user)
+        self.laptop = Product.objects.create(category=self.category, name='Laptop', price=Decimal('80.00'), stock=5)
+        self.mouse = Product.objects.create(category=self.category, name='Mouse', price=Decimal('10.50'), stock=2)
+
+    def checkout(self, items):
+        return self.client.post('/api/orders/', {'items': items, 'shipping_address': 'Av. Demo 123'}, format='json')
+
+    def test_checkout_prices_on_server_and_decrements_stock(self):
+        response = self.checkout([
+            {'product_id': self.laptop.id, 'quantity': 1, 'price': '0.01'},
+            {'product_id': self.mouse.id, 'quantity': 1},
+            {'product_id': self.mouse.id, 'quantity': 1},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['subtotal'], '101.00')
+        self.assertEqual(response.data['shipping_cost'], '0.00')
+        self.assertEqual(response.data['total'], '101.00')
+        self.assertEqual(len(response.data['items']), 2)
+        self.laptop.refresh_from_db()
+        self.mouse.refresh_from_db()
+        self.assertEqual((self.laptop.stock, self.mouse.stock), (4, 0))
+
+    def test_checkout_uses_constant_number_of_queries(self):
+        products = self.create_products(30, stock=10)
+        items = [{'product_id': product.id, 'quantity': 2} for product in products]
+        with self.assertNumQueries(7):
+            # SAVEPOINT, SELECT ... FOR UPDATE, UPDATE de stock, INSERT pedido, INSERT ítems, RELEASE, ítems de la respuesta
+            response = self.checkout(items)
+        self.assertEqual(response.status_code, 201)
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        response = self.checkout([
+            {'product_id': self.laptop.id, 'quantity': 1},
+            {'product_id': self.mouse.id, 'quantity': 3},
+        ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['items'][0]['available'], 2)
+        self.laptop.refresh_from_db()
+        self.assertEqual(self.laptop.stock, 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_unknown_product_and_anonymous_user(self):
+        self.assertEqual(self.checkout([{'product_id': 999999, 'quantity': 1}]).status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.checkout([{'product_id': self.laptop.id, 'quantity': 1}]).status_code, 401)
+
+    def test_users_only_see_their_orders(self):
+        self.checkout([{'product_id': self.laptop.id, 'quantity': 1}])
+        other = get_user_model().objects.create_user(username='otro', email='otro@test.com', password='Test1234!')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/orders/').data['count'], 0)
+
+
+class CouponTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.coupon = Coupon.objects.create(
+            code=' welcome10 ', discount_type='percentage', discount_value=Decimal('10.00'),
+            minimum_amount=Decimal('50.00'), usage_limit=2,
+        )
+
+    def test_codes_are_stored_normalized_and_unique_ignoring_case(self):
+        self.assertEqual(self.coupon.code, 'WELCOME10')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Coupon.objects.bulk_create([Coupon(code='Welcome10', discount_value=Decimal('5.00'))])
+
+    def test_apply_coupon_is_case_insensitive_and_exact(self):
+        response = self.client.post('/api/coupons/apply_coupon/', {'code': 'welcome10', 'cart_total': '155.50'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['discount_amount'], 15.55)
+        self.assertEqual(response.data['final_total'], 139.95)
+
+    def test_apply_coupon_rejections(self):
+        response = self.client.post('/api/coupons/apply_coupon/', {'code': 'NOPE', 'cart_total': 100}, format='json')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/coupons/apply_coupon/', {'code': 'WELCOME10', 'cart_total': 10}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/coupons/apply_coupon/', {'code': 'WELCOME10', 'cart_total': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_redeem_never_exceeds_usage_limit(self):
+        self.assertEqual([redeem_coupon(self.coupon) for _ in range(4)], [True, True, False, False])
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.used_count, 2)
+
+    def test_unlimited_coupons_keep_counting(self):
+        self.coupon.usage_limit = -1
+        self.coupon.save()
+        self.assertTrue(all(redeem_coupon(self.coupon) for _ in range(5)))
+
+    def test_checkout_redeems_coupon(self):
+        user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        self.client.force_authenticate(user)
+        product = Product.objects.create(category=self.category, name='Laptop', price=Decimal('120.00'), stock=5)
+        response = self.client.post('/api/orders/', {
+            'items': [{'product_id': product.id, 'quantity': 1}],
+            'shipping_address': 'Av. Demo 123',
+            'coupon_code': 'welcome10',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['discount'], '12.00')
+        self.assertEqual(response.data['total'], '108.00')
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.used_count, 1)
+
+
+class CouponCacheTests(StoreAPITestCase):
+
+    def apply(self, code, total='100.00'):
+        return self.client.post('/api/coupons/apply_coupon/', {'code': code, 'cart_total': total}, format='json')
+
+    def test_steady_state_checks_cost_no_queries(self):
+        Coupon.objects.create(code='WELCOME10', discount_value=Decimal('10.00'))
+        self.apply('WELCOME10')
+        self.apply('RANDOM123')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.apply('welcome10').status_code, 200)
+            self.assertEqual(self.apply('RANDOM123').status_code, 404)
+            self.assertEqual(self.apply('OTRO-AL-AZAR').status_code, 404)
+
+    def test_signals_invalidate_cached_rules(self):
+        coupon = Coupon.objects.create(code='WELCOME10', discount_value=Decimal('10.00'))
+        self.assertEqual(self.apply('WELCOME10').status_code, 200)
+        coupon.active = False
+        coupon.save()
+        self.assertEqual(self.apply('WELCOME10').status_code, 400)
+        coupon.delete()
+        self.assertEqual(self.apply('WELCOME10').status_code, 404)
+
+    def test_renamed_coupon_invalidates_the_old_code(self):
+        coupon = Coupon.objects.create(code='VIEJO10', discount_value=Decimal('10.00'))
+        self.assertEqual(self.apply('VIEJO10').status_code, 200)
+        coupon.code = 'nuevo10'
+        coupon.save()
+        self.assertEqual(self.apply('VIEJO10').status_code, 404)
+        self.assertEqual(self.apply('NUEVO10').status_code, 200)
+
+    def test_used_count_is_not_cached(self):
+        coupon = Coupon.objects.create(code='UNO', discount_value=Decimal('10.00'), usage_limit=1)
+        self.assertEqual(self.apply('UNO').status_code, 200)
+        # Redención en otro proceso: UPDATE sin señales ni invalidación local
+        Coupon.objects.filter(pk=coupon.pk).update(used_count=1)
+        response = self.apply('UNO')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('límite de usos', response.data['detail'])
+
+    def test_stale_fetch_is_not_stored_after_invalidate(self):
+        coupon = Coupon.objects.create(code='CARRERA', discount_value=Decimal('10.00'))
+
+        class RacingCache(type(coupon_rules)):
+            def _fetch(self, code):
+                rule = super()._fetch(code)
+                # Otro hilo desactiva el cupón e invalida mientras esta lectura está en curso
+                Coupon.objects.filter(pk=coupon.pk).update(active=False)
+                self.invalidate(code)
+                return rule
+
+        rules = RacingCache(timeout=60)
+        self.assertTrue(rules.get('CARRERA').active) # La lectura en curso devuelve lo que leyó...
+        self.assertNotIn('CARRERA', rules._entries) # ...pero no lo guarda sobre la invalidación
+        self.assertFalse(rules.get('CARRERA').active)
+
+    def test_new_coupon_is_visible_after_negative_result(self):
+        self.assertEqual(self.apply('NUEVO').status_code, 404)
+        Coupon.objects.create(code='NUEVO', discount_value=Decimal('5.00'))
+        self.assertEqual(self.apply('NUEVO').status_code, 200)
+
+    def test_lru_is_bounded(self):
+        rules = type(coupon_rules)(max_size=3, timeout=60)
+        Coupon.objects.create(code='A1', discount_value=Decimal('5.00'))
+        for code in ['A1', 'B2', 'C3', 'D4']:
+            rules.invalidate(code)  # Fuerza que pasen el filtro de Bloom
+            rules.get(code)
+        self.assertEqual(len(rules._entries), 3)
+
+
+class CouponCodeMigrationTests(TransactionTestCase):
+    migrate_from = [('store', '0008_order')]
+    migrate_to = [('store', '0009_coupon_code_normalized')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.migrate_from)
+        self.Coupon = self.executor.loader.project_state(self.migrate_from).apps.get_model('store', 'Coupon')
+
+    def tearDown(self):
+        self.Coupon.objects.all().delete()
+        executor = MigrationExecutor(connection) # Vuelve a la última migración para el resto de la suite
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.migrate_to)
+
+    def test_codes_are_normalized(self):
+        self.Coupon.objects.create(code=' welcome10 ', discount_value=Decimal('10.00'))
+        self.migrate()
+        self.assertEqual(list(self.Coupon.objects.values_list('code', flat=True)), ['WELCOME10'])
+
+    def test_colliding_codes_stop_the_migration_with_the_list(self):
+        first = self.Coupon.objects.create(code='Welcome10', discount_value=Decimal('10.00'))
+        second = self.Coupon.objects.create(code='WELCOME10 ', discount_value=Decimal('10.00'))
+        self.Coupon.objects.create(code='otro', discount_value=Decimal('5.00'))
+        with self.assertRaisesMessage(RuntimeError, f"WELCOME10: 'Welcome10' (id {first.id}), 'WELCOME10 ' (id {second.id})") as raised:
+            self.migrate()
+        self.assertNotIn('OTRO', str(raised.exception))
+        self.assertEqual(self.Coupon.objects.get(pk=first.pk).code, 'Welcome10') # Nada se modificó
+
+
+class BestCouponTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        Coupon.objects.create(code='DIEZ', discount_value=Decimal('10.00'))
+        Coupon.objects.create(code='FIJO25', discount_type='fixed_amount', discount_value=Decimal('25.00'), is_public=True)
+        Coupon.objects.create(code='VIP', discount_value=Decimal('50.00'), minimum_amount=Decimal('500.00'), is_public=True)
+        Coupon.objects.create(code='OFF', discount_value=Decimal('90.00'), active=False, is_public=True)
+
+    def evaluate(self, payload):
+        return self.client.post('/api/coupons/best_coupon/', payload, format='json')
+
+    def test_ranks_candidate_codes_with_exact_decimals(self):
+        with self.assertNumQueries(1):
+            response = self.evaluate({'cart_total': '200.00', 'codes': ['diez', 'FIJO25', 'VIP', 'NOPE']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['best']['code'], 'FIJO25')
+        self.assertEqual(
+            [(r['code'], r['applicable'], r.get('discount_amount')) for r in response.data['results']],
+            [('FIJO25', True, '25.00'), ('DIEZ', True, '20.00'), ('VIP', False, '0.00'), ('NOPE', False, None)],
+        )
+        self.assertEqual(response.data['results'][1]['final_total'], '180.00')
+
+    def test_public_coupons_from_cart_lines(self):
+        products = self.create_products(2, price=Decimal('300.00'))
+        lines = [{'product_id': product.id, 'quantity': 1} for product in products]
+        with self.assertNumQueries(2):
+            response = self.evaluate({'items': lines, 'public': True})
+        self.assertEqual(response.data['cart_total'], '600.00')
+        self.assertEqual(response.data['best']['code'], 'VIP')
+        self.assertNotIn('DIEZ', [r['code'] for r in response.data['results']])
+        self.assertNotIn('OFF', [r['code'] for r in response.data['results']])
+
+    def test_requires_exactly_one_cart_source(self):
+        self.assertEqual(self.evaluate({'codes': ['DIEZ']}).status_code, 400)
+        self.assertEqual(self.evaluate({'cart_total': '10', 'items': [{'product_id': 1, 'quantity': 1}], 'codes': ['DIEZ']}).status_code, 400)
+        self.assertEqual(self.evaluate({'cart_total': '10'}).status_code, 400)
+
+
+class CartPriceTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.laptop = Product.objects.create(category=self.category, name='Laptop', price=Decimal('80.00'), stock=5)
+        self.mouse = Product.objects.create(category=self.category, name='Mouse', price=Decimal('10.50'), stock=1)
+        Coupon.objects.create(code='DIEZ', discount_value=Decimal('10.00'))
+
+    def price(self, items, **extra):
+        return self.client.post('/api/cart/price/', {'items': items, **extra}, format='json')
+
+    def test_prices_lines_coupon_and_availability(self):
+        response = self.price([
+            {'product_id': self.laptop.id, 'quantity': 1},
+            {'product_id': self.mouse.id, 'quantity': 2},
+        ], coupon_code='diez')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['items'][1]['line_total'], '21.00')
+        self.assertFalse(response.data['items'][1]['available'])
+        self.assertFalse(response.data['available'])
+        self.assertEqual(response.data['subtotal'], '101.00')
+        self.assertEqual(response.data['discount'], '10.10')
+        self.assertEqual(response.data['shipping_cost'], '0.00')
+        self.assertEqual(response.data['total'], '90.90')
+        self.assertEqual(response.data['coupon_code'], 'DIEZ')
+
+    def test_large_cart_is_priced_in_one_query(self):
+        products = self.create_products(100, stock=10)
+        items = [{'product_id': product.id, 'quantity': 1} for product in products]
+        with self.assertNumQueries(1):
+            response = self.price(items)
+        self.assertEqual(len(response.data['items']), 100)
+
+    def test_checkout_honors_quote_and_rejects_mismatches(self):
+        items = [{'product_id': self.laptop.id, 'quantity': 2}]
+        token = self.price(items).data['quote_token']
+        Product.objects.filter(pk=self.laptop.pk).update(price=Decimal('99.00'))
+
+        user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        self.client.force_authenticate(user)
+        checkout = lambda payload: self.client.post('/api/orders/', {'shipping_address': 'Av. Demo 123', **payload}, format='json')
+
+        mismatch = checkout({'items': [{'product_id': self.laptop.id, 'quantity': 3}], 'quote_token': token})
+        self.assertEqual(mismatch.status_code, 400)
+        self.assertIn('quote_token', mismatch.data)
+        self.assertEqual(checkout({'items': items, 'quote_token': token + 'x'}).status_code, 400)
+
+        response = checkout({'items': items, 'quote_token': token})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['subtotal'], '160.00')
+
+    def test_checkout_with_coupon_dropped_by_the_quote(self):
+        # El carrito no llega al mínimo del cupón: la cotización lo descarta y el checkout va sin él
+        Coupon.objects.create(code='MIN200', discount_value=Decimal('10.00'), minimum_amount=Decimal('200.00'))
+        items = [{'product_id': self.laptop.id, 'quantity': 1}]
+        quote = self.price(items, coupon_code='MIN200').data
+        self.assertIsNone(quote['coupon_code'])
+        self.assertIn('200', quote['coupon_detail'])
+
+        user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        self.client.force_authenticate(user)
+        checkout = lambda coupon: self.client.post('/api/orders/', {
+            'items': items, 'shipping_address': 'Av. Demo 123', 'quote_token': quote['quote_token'],
+            **({'coupon_code': coupon} if coupon else {}), # Como createOrder del frontend: sin cupón no se envía
+        }, format='json')
+        # Con el cupón que pidió el cliente el token no corresponde; con el de la cotización (ninguno) sí
+        self.assertIn('quote_token', checkout('MIN200').data)
+        response = checkout(quote['coupon_code'])
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['coupon'])
+        self.assertEqual(response.data['discount'], '0.00')
+
+
+class ImportCatalogTests(StoreAPITestCase):
+
+    def write_file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_imports_csv_in_batches_and_skips_invalid_rows(self):
+        path = self.write_file('.csv', (
+            'name,description,price,stock,category\n'
+            'Teclado,"Mecánico, RGB",149.99,4,electronica\n'
+            'Sin precio,,abc,1,electronica\n'
+            'Polo,,39.90,10,ropa\n'
+            'Mouse,,25,0,Electrónica\n'
+        ))
+        call_command('import_catalog', path, '--batch-size', '2', '--method', 'bulk', '--create-categories', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Product.objects.count(), 3)
+        self.assertEqual(Product.objects.get(name='Teclado').description, 'Mecánico, RGB')
+        self.assertEqual(Product.objects.get(name='Mouse').category, self.category)
+        self.assertTrue(Category.objects.filter(slug='ropa').exists())
+
+    def test_jsonl_requires_known_categories_unless_asked(self):
+        path = self.write_file('.jsonl', '{"name": "Libro", "price": "12.50", "stock": 3, "category": "libros"}\n')
+        call_command('import_catalog', path, '--method', 'bulk', stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Product.objects.exists())
+
+    def test_malformed_jsonl_lines_count_as_invalid_rows(self):
+        path = self.write_file('.jsonl', (
+            '{"name": "Libro", "price": "12.50", "stock": 3, "category": "electronica"}\n'
+            '{"name": "Roto", "price": \n'
+            '\n'
+            '[1, 2]\n'
+            '{"name": 7, "price": "3.00", "category": "electronica"}\n'
+        ))
+        err = StringIO()
+        call_command('import_catalog', path, '--method', 'bulk', stdout=StringIO(), stderr=err)
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['7', 'Libro'])
+        self.assertIn('Línea 2: JSON inválido', err.getvalue())
+        self.assertIn('Línea 4: se esperaba un objeto JSON, no list', err.getvalue())
+
+        with self.assertRaisesMessage(CommandError, 'Demasiadas filas inválidas (2)'):
+            call_command('import_catalog', path, '--method', 'bulk', '--max-errors', '2', stdout=StringIO(), stderr=StringIO())
+
+
+class SyntheticCatalogTests(StoreAPITestCase):
+
+    def generate(self, seed):
+        call_command(
+            'generate_synthetic_catalog', '--products', '120', '--categories', '3', '--seed', str(seed),
+            '--workers', '2', '--chunk-size', '50', '--replace', stdout=StringIO(),
+        )
+        return list(Product.objects.order_by('id').values_list('name', 'price', 'stock', 'created_at', 'category__slug'))
+
+    def test_same_seed_rebuilds_the_same_catalog(self):
+        first = self.generate(7)
+        self.assertEqual(len(first), 120)
+        self.assertEqual(self.generate(7), first)
+        self.assertNotEqual(self.generate(8), first)
+        self.assertEqual(Category.objects.filter(slug__in=['electronica', 'ropa', 'hogar']).count(), 3)
+
+
+class ProductBulkUpdateTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_user(username='admin', email='admin@test.com', password='Test1234!', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.products = self.create_products(3, stock=5)
+
+    def bulk(self, items):
+        return self.client.post('/api/products/bulk/', {'items': items}, format='json')
+
+    def test_applies_valid_entries_and_reports_each_row(self):
+        a, b, c = self.products
+        response = self.bulk([
+            {'id': a.id, 'price': '19.90'},
+            {'id': b.id, 'stock_delta': -2},
+            {'id': c.id, 'stock': 0, 'stock_delta': 1},
+            {'id': c.id, 'stock_delta': -6},
+            {'id': 999999, 'stock': 1},
+            {'id': a.id, 'stock': 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], ['updated', 'updated', 'error', 'error', 'error', 'error'])
+        self.assertEqual(response.data['results'][0], {'id': a.id, 'status': 'updated', 'price': '19.90', 'stock': 5})
+        self.assertEqual(response.data['updated'], 2)
+        a.refresh_from_db()
+        b.refresh_from_db()
+        c.refresh_from_db()
+        self.assertEqual((a.price, a.stock, b.stock, c.stock), (Decimal('19.90'), 5, 3, 5))
+
+    def test_whole_catalog_in_constant_queries(self):
+        products = self.products + self.create_products(200, stock=1)
+        with self.assertNumQueries(4 if connection.vendor == 'postgresql' else 5):
+            # SAVEPOINT, SELECT ... FOR UPDATE, UPDATE (bulk_update en SQLite: + SAVEPOINT propio), RELEASE
+            response = self.bulk([{'id': product.id, 'price': '9.99', 'stock_delta': 1} for product in products])
+        self.assertEqual(response.data['updated'], 203)
+        self.assertEqual(Product.objects.filter(price=Decimal('9.99')).count(), 203)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.bulk([{'id': self.products[0].id, 'stock': 1}]).status_code, 401)
+
+
+class SyncCatalogTests(ImportCatalogTests):
+
+    def sync(self, content, *args):
+        path = self.write_file('.csv', 'external_id,name,price,stock,category\n' + content)
+        out = StringIO()
+        call_command('sync_catalog', path, '--supplier', 'acme', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_only_changed_rows_are_written(self):
+        self.sync('A1,Teclado,100,5,electronica\nA2,Mouse,20,7,electronica\nA3,Monitor,500,2,electronica\n')
+        self.assertEqual(Product.objects.filter(supplier='acme').count(), 3)
+        untouched = Product.objects.get(external_id='A2').updated_at
+
+        with self.assertNumQueries(7):
+            # Categorías, mapa {external_id: hash}, el retirado bloqueado, un único UPDATE para él y
+            # el contador de su categoría (con su SAVEPOINT)
+            output = self.sync('A1,Teclado,100,5,electronica\nA2,Mouse,20,7,electronica\n')
+        self.assertIn('Nuevos: 0  cambiados: 0  sin cambios: 2  retirados: 1', output)
+
+        output = self.sync('A1,Teclado RGB,100,5,electronica\nA2,Mouse,20,7,electronica\nA4,Parlante,80,1,electronica\n')
+        self.assertIn('Nuevos: 1  cambiados: 1  sin cambios: 1  retirados: 0', output)
+        self.assertEqual(Product.objects.get(external_id='A1').name, 'Teclado RGB')
+        self.assertEqual(Product.objects.get(external_id='A2').updated_at, untouched)
+        self.assertEqual(Product.objects.get(external_id='A3').stock, 0)
+
+        out = StringIO()
+        call_command('recount_categories', '--check', stdout=out) # Los deltas de cada lote dejaron los contadores exactos
+        self.assertIn('al día', out.getvalue())
+
+    def test_malformed_jsonl_lines_count_as_invalid_rows_in_sync(self):
+        path = self.write_file('.jsonl', (
+            '{"external_id": "A1", "name": "Teclado", "price": "100", "stock": 5, "category": "electronica"}\n'
+            '"A2"\n'
+            '{"external_id": "A3", \n'
+        ))
+        with self.assertRaisesMessage(CommandError, 'Demasiadas filas inválidas (2); sincronización abortada'):
+            call_command('sync_catalog', path, '--supplier', 'acme', '--max-errors', '2', stdout=StringIO(), stderr=StringIO())
+
+        err = StringIO()
+        call_command('sync_catalog', path, '--supplier', 'acme', stdout=StringIO(), stderr=err)
+        self.assertIn('Línea 2: se esperaba un objeto JSON, no str', err.getvalue())
+        self.assertIn('Línea 3: JSON inválido', err.getvalue())
+        self.assertEqual(list(Product.objects.values_list('external_id', flat=True)), ['A1'])
+
+    def test_counter_deltas_use_the_stock_at_write_time(self):
+        self.sync('A1,Teclado,100,5,electronica\nA2,Mouse,20,7,electronica\n')
+        changed, removed = Product.objects.order_by('external_id')
+        # Checkouts durante una sincronización larga: el stock precargado (5 y 7) ya no es el actual
+        reserve_stock(changed.id, 5)
+        reserve_stock(removed.id, 7)
+
+        changed.stock = 2
+        command = SyncCatalogCommand(stdout=StringIO(), stderr=StringIO())
+        command.write_updates([changed])
+        command.write_removed([removed.id], 'zero-stock', timezone.now())
+
+        out = StringIO()
+        call_command('recount_categories', '--check', stdout=out)
+        self.assertIn('al día', out.getvalue())
+
+    def test_removed_delete_updates_counters_once(self):
+        self.sync('A1,Teclado,100,5,electronica\nA2,Mouse,20,7,electronica\nA3,Monitor,500,0,electronica\nA4,Parlante,80,1,electronica\n')
+        with CaptureQueriesContext(connection) as queries:
+            output = self.sync('A1,Teclado,100,5,electronica\n', '--removed', 'delete')
+        self.assertIn('retirados: 3', output)
+        self.assertEqual(list(Product.objects.values_list('external_id', flat=True)), ['A1'])
+        category_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "store_category"')]
+        self.assertEqual(len(category_updates), 1) # Una por categoría, no una por producto eliminado
+
+        out = StringIO()
+        call_command('recount_categories', '--check', stdout=out)
+        self.assertIn('al día', out.getvalue())
+
+    def test_dry_run_writes_nothing(self):
+        output = self.sync('A1,Teclado,100,5,electronica\n', '--dry-run')
+        self.assertIn('Nuevos: 1', output)
+        self.assertFalse(Product.objects.exists())
+
+        self.sync('A1,Teclado,100,5,electronica\nA2,Mouse,20,7,electronica\n')
+        with self.assertNumQueries(2): # Categorías y mapa {external_id: hash}; ningún lote, aun con --batch-size 1
+            output = self.sync('A1,Teclado RGB,100,5,electronica\nA3,Monitor,500,2,electronica\n', '--dry-run', '--batch-size', '1')
+        self.assertIn('Nuevos: 1  cambiados: 1  sin cambios: 0  retirados: 1', output)
+        self.assertEqual(Product.objects.get(external_id='A1').name, 'Teclado')
+
+
+class ProductExportTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_user(username='admin', email='admin@test.com', password='Test1234!', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.products = self.create_products(5, stock=2)
+        other = Category.objects.create(name='Hogar')
+        Product.objects.create(category=other, name='Lámpara, "LED"', price=Decimal('30.00'), stock=1)
+
+    def export(self, params, **headers):
+        response = self.client.get('/api/products/export/', params, **headers)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_honors_list_filters(self):
+        response, body = self.export({'format': 'ndjson', 'category__slug': 'electronica'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [product.id for product in self.products])
+        self.assertEqual(rows[0]['price'], '10.00')
+
+    def test_csv_is_gzipped_when_accepted(self):
+        response, body = self.export({'format': 'csv', 'category__slug': 'hogar'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = list(csv.reader(gzip.decompress(body).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'name', 'description'])
+        self.assertEqual(rows[1][1], 'Lámpara, "LED"')
+
+    def test_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/products/export/', {'format': 'csv'}).status_code, 401)
+
+
+class ConditionalGetTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.products = self.create_products(3, stock=5)
+
+    def test_unchanged_catalog_returns_304_without_listing(self):
+        first = self.client.get('/api/products/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+        self.assertIn('Authorization', first['Vary'])
+        with self.assertNumQueries(2):
+            # Solo la versión del catálogo: ni la página ni la serialización
+            second = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        other_page = self.client.get('/api/products/?ordering=price', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other_page.status_code, 200)
+
+    def test_writes_change_the_validators(self):
+        etag = self.client.get('/api/products/').get('ETag')
+        reserve_stock(self.products[0].id, 1)
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/products/').get('ETag')
+        self.products[1].delete()
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/categories/').get('ETag')
+        self.category.name = 'Electrónica y más'
+        self.category.save()
+        self.assertEqual(self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def backdate_catalog(self, stamp):
+        # update() no toca auto_now: fija la versión del catálogo
+        Product.objects.update(updated_at=stamp)
+        Category.objects.update(updated_at=stamp)
+
+    def test_retrieve_and_authenticated_responses(self):
+        self.backdate_catalog(timezone.now() - timedelta(minutes=1))
+        url = f'/api/products/{self.products[0].id}/'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        self.client.force_authenticate(user)
+        self.assertIn('private', self.client.get(url)['Cache-Control'])
+        self.assertEqual(self.client.get('/api/products/999999/').status_code, 404)
+
+    def test_last_modified_is_withheld_during_the_current_second(self):
+        # Cambio en el segundo en curso: otro cambio en ese segundo no movería Last-Modified
+        stamp = timezone.now() + timedelta(seconds=1)
+        self.backdate_catalog(stamp)
+        response = self.client.get('/api/products/')
+        self.assertNotIn('Last-Modified', response)
+        same_second = http_date(int(stamp.timestamp()))
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_MODIFIED_SINCE=same_second).status_code, 200)
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_if_none_match_takes_precedence_over_if_modified_since(self):
+        self.backdate_catalog(timezone.now() - timedelta(minutes=1))
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH='W/"otra-version"', HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+
+
+class SparseFieldsetTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_products(1, stock=5)[0]
+
+    def test_list_defaults_to_card_fields_without_description(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'name', 'price', 'stock', 'category', 'image_url', 'category_name'},
+        )
+        product_select = next(q['sql'] for q in queries if 'FROM "store_product"' in q['sql'])
+        self.assertNotIn('"description"', product_select)
+
+    def test_list_searches_the_description_it_does_not_return(self):
+        # ProductList busca en el backend: la descripción filtra aunque el listado no la envíe
+        Product.objects.create(category=self.category, name='Mochila', description='Impermeable, con bolsillo para notebook', price=Decimal('50.00'), stock=3)
+        response = self.client.get('/api/products/', {'search': 'impermeable', 'ordering': 'price'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Mochila'])
+        self.assertNotIn('description', response.data['results'][0])
+
+    def test_fields_and_omit(self):
+        response = self.client.get('/api/products/?fields=id,name&ordering=price')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+
+        response = self.client.get('/api/products/?fields=all&omit=created_at,updated_at')
+        self.assertIn('description', response.data['results'][0])
+        self.assertNotIn('created_at', response.data['results'][0])
+
+        detail = self.client.get(f'/api/products/{self.product.id}/')
+        self.assertIn('description', detail.data)
+        detail = self.client.get(f'/api/products/{self.product.id}/?fields=card')
+        self.assertNotIn('description', detail.data)
+
+    def test_unknown_or_empty_fields_are_rejected(self):
+        self.assertEqual(self.client.get('/api/products/?fields=id,secreto').status_code, 400)
+        self.assertEqual(self.client.get('/api/products/?fields=id&omit=id').status_code, 400)
+
+
+class ProductRowsTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.products = self.create_products(3, stock=5)
+        Product.objects.filter(pk=self.products[0].pk).update(image_url=None, price=Decimal('7.5'))
+
+    def test_same_json_as_product_serializer(self):
+        fields = ProductSerializer.field_sets['all']
+        for zone in ('UTC', 'America/Lima'):
+            with timezone.override(zone):
+                expected = ProductSerializer(Product.objects.select_related('category').order_by('id'), many=True).data
+                self.assertEqual(render_rows(row_values(Product.objects.order_by('id'), fields), fields), expected)
+
+    def test_list_reads_a_page_in_one_query(self):
+        self.create_products(20, stock=1)
+        with self.assertNumQueries(3): # Versión del catálogo (2) + página con la categoría en el JOIN
+            response = self.client.get('/api/products/?fields=all')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['category_name'], self.category.name)
+
+        next_page = self.client.get(response.data['next'])
+        self.assertEqual(len(next_page.data['results']), 3)
+
+    def test_retrieve(self):
+        response = self.client.get(f'/api/products/{self.products[0].id}/')
+        self.assertEqual(response.data['price'], '7.50')
+        self.assertIsNone(response.data['image_url'])
+        self.assertEqual(self.client.get('/api/products/999999/').status_code, 404)
+
+
+class ResponseEncodingTests(StoreAPITestCase):
+
+    def test_orjson_renderer_matches_drf(self):
+        data = {
+            'price': Decimal('19.90'),
+            'created_at': timezone.now(),
+            'detail': ErrorDetail('Cupón inválido ', code='invalid'),
+            'lazy': gettext_lazy('Not found.'),
+            'items': [{'id': 1, 'name': 'Café'}],
+            3: None,
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data, 'application/json; indent=4')),
+            json.loads(JSONRenderer().render(data, 'application/json; indent=4')),
+        )
+
+    def test_malformed_json_body_is_rejected(self):
+        response = self.client.post('/api/cart/price/', data='{"items": [', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_large_responses_are_gzipped(self):
+        self.create_products(30, stock=5)
+        response = self.client.get('/api/products/?fields=all', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 20)
+
+        with self.settings(API_COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self.client.get('/api/products/?fields=all', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get('/api/products/?fields=all', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @skipUnless(brotli, 'brotli no está instalado')
+    def test_brotli_is_preferred(self):
+        self.create_products(30, stock=5)
+        response = self.client.get('/api/products/?fields=all', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))['results']), 20)
+
+
+class CategoryCounterTests(StoreAPITestCase):
+
+    def assertCounts(self, category, product_count, in_stock_count):
+        category.refresh_from_db()
+        self.assertEqual((category.product_count, category.in_stock_count), (product_count, in_stock_count))
+
+    def test_product_writes_keep_counters(self):
+        other = Category.objects.create(name='Hogar', slug='hogar')
+        product = Product.objects.create(category=self.category, name='Taza', price=Decimal('9.90'), stock=0)
+        self.assertCounts(self.category, 1, 0)
+
+        product.stock = 4
+        product.save()
+        self.assertCounts(self.category, 1, 1)
+
+        product.category = other
+        product.save()
+        self.assertCounts(self.category, 0, 0)
+        self.assertCounts(other, 1, 1)
+
+        product.delete()
+        self.assertCounts(other, 0, 0)
+
+    def test_stock_crossing_zero(self):
+        product = self.create_products(1, stock=2)[0]
+        self.assertEqual(reserve_stock(product.id, 1), 1)
+        self.assertCounts(self.category, 1, 1)
+        self.assertEqual(reserve_stock(product.id, 1), 0)
+        self.assertCounts(self.category, 1, 0)
+        self.assertEqual(release_stock(product.id, 3), 3)
+        self.assertCounts(self.category, 1, 1)
+
+        bulk_update_products([{'id': product.id, 'stock': 0}])
+        self.assertCounts(self.category, 1, 0)
+        bulk_update_products([{'id': product.id, 'stock_delta': 2}])
+        self.assertCounts(self.category, 1, 1)
+
+        user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        place_order(user, [{'product_id': product.id, 'quantity': 2}], 'Av. Siempre Viva 123')
+        self.assertCounts(self.category, 1, 0)
+
+    def test_bulk_delete_applies_counters_per_category(self):
+        other = Category.objects.create(name='Hogar', slug='hogar')
+        self.create_products(2, stock=0)
+        self.create_products(6, stock=3)
+        Product.objects.create(category=other, name='Taza', price=Decimal('9.90'), stock=1)
+        kept = Product.objects.create(category=other, name='Plato', price=Decimal('5.00'), stock=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            Product.objects.exclude(pk=kept.pk).delete()
+        category_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "store_category"')]
+        self.assertEqual(len(category_updates), 2) # Una por categoría, no una por producto
+        self.assertCounts(self.category, 0, 0)
+        self.assertCounts(other, 1, 1)
+
+        other.delete() # Cascada del collector: el producto restante se elimina junto con la categoría
+        self.assertFalse(Product.objects.exists())
+
+    def test_recount_repairs_drift_and_api_has_no_extra_queries(self):
+        self.create_products(3, stock=1)
+        Category.objects.filter(pk=self.category.pk).update(product_count=99, in_stock_count=-4)
+
+        out = StringIO()
+        call_command('recount_categories', '--check', stdout=out)
+        self.assertIn('99 -> 3', out.getvalue())
+        self.assertCounts(self.category, 99, -4)
+        call_command('recount_categories', stdout=StringIO())
+        self.assertCounts(self.category, 3, 3)
+
+        Category.objects.create(name='Hogar', slug='hogar')
+        with self.assertNumQueries(4): # Versión del catálogo (2), COUNT de la paginación y la página
+            response = self.client.get('/api/categories/')
+        counts = {row['slug']: (row['product_count'], row['in_stock_count']) for row in response.data['results']}
+        self.assertEqual(counts, {'electronica': (3, 3), 'hogar': (0, 0)})
+
+
+class ProductFacetsTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        home = Category.objects.create(name='Hogar', slug='hogar')
+        self.create_products(3, price='20', stock=0) # Electrónica, sin stock
+        self.create_products(2, price='120', stock=4, category=home)
+
+    def test_counts_in_one_query_and_cached(self):
+        with self.assertNumQueries(3): # Versión del catálogo (2) + la consulta agregada
+            response = self.client.get('/api/products/facets/?price_buckets=0,50,100')
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(
+            [(row['slug'], row['count']) for row in response.data['categories']], [('electronica', 3), ('hogar', 2)],
+        )
+        self.assertEqual(
+            response.data['price'],
+            [{'min': '0.00', 'max': '50.00', 'count': 3}, {'min': '50.00', 'max': '100.00', 'count': 0},
+             {'min': '100.00', 'max': None, 'count': 2}],
+        )
+        self.assertEqual(response.data['availability'], {'in_stock': 2, 'out_of_stock': 3})
+
+        with self.assertNumQueries(2): # Mismos filtros normalizados: desde la caché
+            self.client.get('/api/products/facets/?ordering=price&price_buckets=0,50,100')
+
+        Product.objects.filter(category__slug='hogar').first().delete()
+        response = self.client.get('/api/products/facets/?price_buckets=0,50,100')
+        self.assertEqual(response.data['total'], 4) # La versión del catálogo cambió: nueva clave
+
+    def test_filters_and_validation(self):
+        response = self.client.get('/api/products/facets/?category__slug=hogar')
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(len(response.data['price']), 7) # Tramos por defecto
+        self.assertEqual(self.client.get('/api/products/facets/?price_buckets=50,10').status_code, 400)
+        self.assertEqual(self.client.get('/api/products/facets/?price_buckets=abc').status_code, 400)
+
+
+class ProductFilterTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.home = Category.objects.create(name='Hogar', slug='hogar')
+        self.create_products(4) # Electrónica: precios 10-13, stock 0,1,2,0
+        self.create_products(2, price='150', stock=5, category=self.home)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/products/?{query}')
+        self.assertEqual(response.status_code, 200, query)
+        return sorted(item['name'] for item in response.data['results'])
+
+    def test_category_by_id_or_slug_without_join(self):
+        self.assertEqual(len(self.ids(f'category={self.home.pk}')), 2)
+        self.assertEqual(len(self.ids('category=hogar')), 2)
+        self.assertEqual(len(self.ids('category__slug=electronica')), 4) # Parámetro anterior
+        self.assertEqual(self.ids('category=no-existe'), [])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.ids('category=hogar')
+        # El slug sale del mapa cacheado: el filtro va por category_id, sin JOIN con la tabla de categorías
+        listing = ctx.captured_queries[-1]['sql']
+        self.assertIn('"store_product"."category_id" = %d' % self.home.pk, listing)
+        self.assertNotIn('"store_category"."slug"', listing)
+
+    def test_slug_map_invalidated_on_category_change(self):
+        self.assertEqual(len(self.ids('category=hogar')), 2)
+        self.home.slug = 'casa'
+        self.home.save()
+        self.assertEqual(self.ids('category=hogar'), [])
+        self.assertEqual(len(self.ids('category=casa')), 2)
+
+    def test_price_stock_and_date_ranges(self):
+        self.assertEqual(self.ids('price__gte=11&price__lte=12'), ['Producto 001', 'Producto 002'])
+        self.assertEqual(len(self.ids('price__gte=100')), 2)
+        self.assertEqual(len(self.ids('in_stock=true')), 4)
+        self.assertEqual(self.ids('category=electronica&in_stock=false'), ['Producto 000', 'Producto 003'])
+        Product.objects.filter(category=self.home).update(created_at=timezone.now() - timedelta(days=30))
+        since = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.assertEqual(len(self.ids(f'created_after={since}')), 4)
+        self.assertEqual(self.client.get('/api/products/?price__gte=abc').status_code, 400)
+
+
+class APIBenchmarkTests(StoreAPITestCase):
+
+    def benchmark(self, *args):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command(
+            'benchmark_api', '--iterations', '3', '--warmup', '1', '--alloc-iterations', '1', '--page', '2',
+            '--output', path, *args, stdout=StringIO(),
+        )
+        with open(path, encoding='utf-8') as f:
+            return path, json.load(f)
+
+    def test_writes_json_and_flags_regressions_against_baseline(self):
+        self.create_products(30, stock=20)
+        path, report = self.benchmark()
+        self.assertEqual(report['meta']['products'], 30)
+        for name in ['browse_page_n', 'browse_cursor_page_n', 'search', 'category_filter', 'coupon_apply', 'login', 'cart_price']:
+            self.assertEqual(report['scenarios'][name]['status'], [200], name)
+        self.assertEqual(report['scenarios']['browse_first_page']['queries'], 3)
+        # Todo se revierte al terminar: ni el usuario ni el cupón del benchmark quedan en la BD
+        self.assertFalse(get_user_model().objects.filter(username='benchmark_api').exists())
+        self.assertFalse(Coupon.objects.exists())
+
+        report['scenarios']['categories']['queries'] -= 1 # Línea base con una consulta menos
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, 'categories.queries'):
+            self.benchmark('--scenarios', 'categories', '--compare', path)
+        with self.assertRaisesMessage(CommandError, 'Escenarios desconocidos'):
+            self.benchmark('--scenarios', 'checkout')
+
+
+class ProvisionLoadTestTests(StoreAPITestCase):
+
+    def test_provisions_users_and_coupons_and_cleans_up(self):
+        self.create_products(5, stock=20)
+        call_command('provision_load_test', '--users', '3', '--products', '5', stdout=StringIO())
+        call_command('provision_load_test', '--users', '3', '--products', '5', stdout=StringIO()) # Idempotente
+        User = get_user_model()
+        self.assertEqual(User.objects.filter(username__startswith='loadtest_').count(), 3)
+        self.assertEqual(Product.objects.count(), 5)
+        response = self.client.post('/api/accounts/login/', {'username': 'loadtest_00003', 'password': 'LoadTest1234!'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        product = Product.objects.first()
+        response = self.client.post('/api/orders/', {
+            'items': [{'product_id': product.id, 'quantity': 1}], 'shipping_address': 'Av. Carga 123', 'coupon_code': 'LOADTEST10',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        call_command('provision_load_test', '--cleanup', stdout=StringIO())
+        self.assertFalse(User.objects.filter(username__startswith='loadtest_').exists())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Coupon.objects.exists())
+
+
+class ProfilingMiddlewareTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        route_stats.clear()
+        self.create_products(5)
+        self.admin = get_user_model().objects.create_user(username='admin', email='admin@test.com', password='Test1234!', is_staff=True)
+
+    def profiling(self, **kwargs):
+        """Activa el perfilado; el middleware lee la configuración al cargarse, así que cada bloque usa un cliente nuevo."""
+        self.client = self.client_class()
+        return override_settings(**{
+            'REQUEST_PROFILING': True, 'REQUEST_PROFILING_SAMPLE_RATE': 0, 'REQUEST_PROFILING_SLOW_MS': 0,
+            'REQUEST_PROFILING_DIR': self.directory, 'REQUEST_PROFILING_MAX_DUMPS': 2, **kwargs,
+        })
+
+    def timings(self, response):
+        return {item.split(';')[0]: item for item in response['Server-Timing'].split(', ')}
+
+    def test_server_timing_and_route_stats(self):
+        with self.profiling():
+            response = self.client.get('/api/products/')
+            self.client.get('/api/categories/')
+            self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'total', 'view', 'db', 'auth', 'serialize', 'render'})
+        self.assertRegex(timings['db'], r'^db;dur=[\d.]+;desc="3 queries"$')
+
+        routes = {row['route']: row for row in route_stats.snapshot()}
+        self.assertEqual(routes['GET product-list']['count'], 2)
+        self.assertEqual(routes['GET product-list']['queries'], 3)
+        self.assertEqual(routes['GET category-list']['count'], 1)
+        self.assertIn('serialize', routes['GET category-list']['mean_ms']) # CategorySerializer (serializer.data de DRF)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_disabled_adds_nothing(self):
+        response = self.client.get('/api/products/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(route_stats.snapshot(), [])
+
+    def test_sampled_dumps_rotate_and_are_admin_only(self):
+        with self.profiling(REQUEST_PROFILING_SAMPLE_RATE=2):
+            for _ in range(6):
+                self.client.get('/api/products/')
+        dumps = sorted(os.listdir(self.directory))
+        self.assertEqual(len(dumps), 2) # 3 muestreadas, se conservan las 2 últimas
+        name = dumps[-1][:-len('.prof')]
+        self.assertIn('GET_product-list', name)
+
+        with self.profiling():
+            self.assertEqual(self.client.get('/api/profiling/').status_code, 401)
+            self.client.force_authenticate(self.admin)
+            response = self.client.get('/api/profiling/')
+            self.assertEqual([dump['name'] for dump in response.data['dumps']], [name, dumps[0][:-len('.prof')]])
+            self.assertEqual(response.data['routes'][0]['route'], 'GET product-list')
+
+            response = self.client.get(f'/api/profiling/{name}/?sort=tottime&limit=5')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('function calls', response.content.decode())
+            response = self.client.get(f'/api/profiling/{name}/?download=1')
+            self.assertEqual(response['Content-Disposition'], f'attachment; filename="{name}.prof"')
+            self.assertTrue(b''.join(response.streaming_content)) # Consumirlo cierra el archivo
+            self.assertEqual(self.client.get(f'/api/profiling/{name}/?sort=nada').status_code, 400)
+            self.assertEqual(self.client.get('/api/profiling/no-existe/').status_code, 404)
+
+    def test_slow_requests_are_dumped(self):
+        with self.profiling(REQUEST_PROFILING_SLOW_MS=0.001):
+            self.client.get('/api/categories/')
+        with self.profiling(REQUEST_PROFILING_SLOW_MS=60000):
+            self.client.get('/api/categories/')
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+
+class QueryBudgetMixin:
+    """
+    assertQueryBudget() ejecuta una petición y falla si supera su presupuesto de
+    consultas o si alguna SELECT recorre completa una tabla grande (LARGE_TABLES
+    en store.query_plans). Cada petición parte de la caché vacía: se mide el
+    camino frío, el que paga la base de datos.
+    """
+
+    def assertQueryBudget(self, budget, method, url, data=None, status_code=200, plans=True):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, status_code, f'{method.upper()} {url}')
+        queries = [query['sql'] for query in ctx.captured_queries]
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{method.upper()} {url}: {len(queries)} consultas (presupuesto {budget})\n' + '\n'.join(queries),
+        )
+        if plans:
+            for sql in queries:
+                if sql.lstrip().upper().startswith('SELECT'):
+                    self.assertFalse(sequential_scans(sql), f'{method.upper()} {url}: recorrido secuencial en\n{sql}')
+        return response
+
+
+class EndpointQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """Presupuesto de consultas y planes sin recorridos secuenciales por endpoint, sobre un catálogo sembrado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_synthetic_catalog', '--products', '300', '--categories', '4', '--seed', '22',
+            '--workers', '1', '--chunk-size', '100', stdout=StringIO(),
+        )
+        cls.product = Product.objects.filter(stock__gt=5).order_by('id').first()
+        cls.user = get_user_model().objects.create_user(username='cliente', email='cliente@test.com', password='Test1234!')
+        cls.admin = get_user_model().objects.create_superuser(username='admin', email='admin@test.com', password='Test1234!')
+        Coupon.objects.create(code='WELCOME10', discount_type='percentage', discount_value=Decimal('10.00'))
+        items = [{'product_id': product_id, 'quantity': 1} for product_id in Product.objects.filter(stock__gt=5).values_list('id', flat=True)[:5]]
+        for _ in range(3):
+            place_order(cls.user, items, 'Av. Demo 123')
+
+    def setUp(self):
+        coupon_rules.clear()
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def test_catalog_reads(self):
+        product = self.product
+        for budget, url in [
+            (3, '/api/products/'), # Versión del catálogo (2) + la página
+            (4, '/api/products/?page=3'), # + COUNT del modo por número de página
+            (3, '/api/products/?fields=all&ordering=price'),
+            (4, '/api/products/?category=electronica&ordering=-price'), # + mapa de slugs (caché vacía)
+            (4, '/api/products/?category=ropa&price__gte=50&price__lte=200'),
+            (4, '/api/products/?category=hogar&in_stock=true'),
+            (3, f'/api/products/{product.pk}/'),
+            (3, f'/api/products/{product.pk}/?fields=all'),
+            (4, '/api/products/facets/?category=electronica'),
+            (4, '/api/categories/'), # Contadores desnormalizados: sin consulta por categoría
+            (3, f'/api/categories/{product.category_id}/'),
+        ]:
+            with self.subTest(url=url):
+                self.assertQueryBudget(budget, 'get', url)
+
+    def test_search(self):
+        # Sin tsvector fuera de PostgreSQL la búsqueda es icontains: solo se revisa el plan en PostgreSQL
+        self.assertQueryBudget(4, 'get', '/api/products/?search=mochila', plans=connection.vendor == 'postgresql')
+
+    def test_suggest(self):
+        # El plan depende del índice GIN gin_trgm_ops (migración 0006), que requiere el pg_trgm real
+        with connection.cursor() as cursor:
+            indexed = 'product_name_trgm_gin' in connection.introspection.get_constraints(cursor, 'store_product')
+        self.assertQueryBudget(1, 'get', '/api/products/suggest/?q=moch', plans=indexed)
+        if not indexed:
+            self.skipTest('Sin el índice product_name_trgm_gin no se revisa el plan del autocompletado')
+
+    def test_cart_and_coupons(self):
+        items = [{'product_id': self.product.pk, 'quantity': 2}]
+        self.assertQueryBudget(2, 'post', '/api/coupons/apply_coupon/', {'code': 'welcome10', 'cart_total': '150.00'})
+        self.assertQueryBudget(1, 'post', '/api/cart/price/', {'items': items, 'coupon_code': 'WELCOME10'})
+        self.assertQueryBudget(2, 'post', '/api/coupons/best_coupon/', {'items': items, 'public': True})
+
+    def test_orders(self):
+        self.authenticate(self.user)
+        self.assertQueryBudget(4, 'get', '/api/orders/') # Usuario (JWT), COUNT, pedidos, ítems prefetch
+        order = Order.objects.filter(user=self.user).first()
+        self.assertQueryBudget(3, 'get', f'/api/orders/{order.pk}/')
+        items = [{'product_id': self.product.pk, 'quantity': 1}]
+        self.assertQueryBudget(8, 'post', '/api/orders/', {'items': items, 'shipping_address': 'Av. Demo 123'}, status_code=201)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.admin)
+        # Sesión + usuario + COUNT(s) + la página; product_count no consulta productos por fila
+        self.assertQueryBudget(5, 'get', '/admin/store/category/')
+        # Los filtros de proveedor y disponibilidad no hacen SELECT DISTINCT sobre el catálogo
+        self.assertQueryBudget(6, 'get', '/admin/store/product/')
+        self.assertQueryBudget(6, 'get', '/admin/store/product/?in_stock=1&supplier=')
+        self.assertQueryBudget(5, 'get', '/admin/store/order/')
+
+    def test_sequential_scan_detection(self):
+        # El arnés no es vacuo: un filtro sin índice se detecta y uno por clave primaria no
+        with CaptureQueriesContext(connection) as ctx:
+            list(Product.objects.filter(description='x').order_by())
+            list(Product.objects.filter(pk=self.product.pk))
+            list(Product.objects.filter(description='x').order_by(Upper('description'))[:5]) # Limit sobre un Sort: lee todo
+        unindexed, indexed, sorted_limit = (query['sql'] for query in ctx.captured_queries)
+        self.assertEqual(sequential_scans(unindexed), {'store_product'})
+        self.assertEqual(sequential_scans(indexed), set())
+        self.assertEqual(sequential_scans(sorted_limit), {'store_product'})
@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, CategoryViewSet, CouponViewSet
+from .views import ProductViewSet, CategoryViewSet, CouponViewSet, OrderViewSet, CartViewSet, ProfilingViewSet
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet) # Renombrado para consistencia
 router.register(r'categories', CategoryViewSet) # Renombrado para consistencia
 router.register(r'coupons', CouponViewSet)
+router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'cart', CartViewSet, basename='cart')
+router.register(r'profiling', ProfilingViewSet, basename='profiling') # Solo administradores (REQUEST_PROFILING)
 
 urlpatterns = [
     path('', include(router.urls)),
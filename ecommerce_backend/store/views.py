@@ -1,17 +1,37 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, mixins
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework.decorators import action  # <--- ¡ESTA ES LA IMPORTACIÓN QUE SIEMPRE FALTA!
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.db.models import F
+from django.db.models import F, Q
 from django.utils import timezone 
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import ScopedRateThrottle
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+import hashlib
 
-from .models import Category, Product, Coupon # Asegúrate de que Coupon esté importado
-from .serializers import CategorySerializer, ProductSerializer, CouponSerializer # Asegúrate de que CouponSerializer esté importado
+from .models import Category, Product, Coupon, Order # Asegúrate de que Coupon esté importado
+from .serializers import CategorySerializer, ProductSerializer, CouponSerializer, StockQuantitySerializer, OrderSerializer, CheckoutSerializer, CouponEvaluationSerializer, CartPriceSerializer, CartQuoteSerializer, ProductBulkEntrySerializer # Asegúrate de que CouponSerializer esté importado
+from .caching import CatalogCacheMixin
+from .checkout import cart_subtotal, load_quote, merge_lines, place_order, price_cart
+from .coupon_cache import coupon_rules
+from .coupons import CENT, normalize_coupon_code, rank_coupons
+from .exports import export_stream
+from .facets import facet_cache_key, facet_counts, parse_price_edges
+from .inventory import bulk_update_products, reserve_stock, release_stock
+from .pagination import ProductPagination
+from .product_rows import render_rows, row_values
+from .profiling import SORT_KEYS, profile_dumps, route_stats, timed
+from .renderers import CSVRenderer, NDJSONRenderer
+from .filters import ProductFilter, ProductSearchFilter, normalize_suggest_term, suggest_products
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny] # Por defecto, permitir acceso a todos (GET)
@@ -23,21 +43,290 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+class ProductViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.defer('search_document').select_related('category') # El tsvector solo se usa dentro de la base de datos
     serializer_class = ProductSerializer
     permission_classes = [AllowAny] # Por defecto, permitir acceso a todos (GET)
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category__slug'] # Permite filtrar por category_slug
-    search_fields = ['name', 'description', 'category__name'] # Permite buscar por nombre, descripción, nombre de categoría
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, filters.OrderingFilter]
+    filterset_class = ProductFilter # category (id o slug), price__gte/lte, in_stock, created_after
+    search_fields = ['name', 'description', 'category__name'] # Fallback icontains fuera de PostgreSQL (full-text en search_document)
     ordering_fields = ['name', 'price', 'created_at', 'stock'] # Permite ordenar por estos campos
+    pagination_class = ProductPagination # Cursor (keyset) por defecto, ?page=N para el modo por número de página
+    lookup_value_regex = r'\d+' # Los ids son numéricos (las acciones de detalle usan SQL directo)
+    suggest_limit = 8 # Máximo de sugerencias devueltas por /products/suggest/
+    suggest_min_length = 2 # No se consulta la base de datos con menos caracteres
+    suggest_cache_timeout = 60 # Segundos que se cachea cada prefijo
+    bulk_update_max_items = 10000 # Máximo de cambios por petición en /products/bulk/
+    list_field_set = 'card' # Campos por defecto del listado (?fields=all para todos)
+    facets_cache_timeout = 300 # La clave incluye la versión del catálogo: una escritura la invalida antes
+
+    def list(self, request, *args, **kwargs):
+        """Listado por la lectura rápida (values() + render compilado): mismo JSON que ProductSerializer."""
+        return self.conditional_response(request, self.list_rows)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.retrieve_row, *args, **kwargs)
+
+    def list_rows(self, request):
+        fields = self.get_response_fields()
+        # Solo se leen las columnas que se van a serializar, más las del orden (el cursor lee su valor)
+        ordering = request.query_params.get(filters.OrderingFilter.ordering_param, '')
+        extra = {'created_at'} | ({term.strip().lstrip('-') for term in ordering.split(',')} & set(self.ordering_fields))
+        rows = row_values(self.filter_queryset(self.get_queryset()), fields, extra)
+
+        page = self.paginate_queryset(rows)
+        with timed('serialize'):
+            results = render_rows(page if page is not None else rows, fields)
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
+    def retrieve_row(self, request, pk=None):
+        fields = self.get_response_fields()
+        values = row_values(self.filter_queryset(self.get_queryset()).filter(pk=pk), fields).first()
+        if values is None:
+            raise Http404
+        with timed('serialize'):
+            result = render_rows([values], fields)[0]
+        return Response(result)
+
+    def get_response_fields(self):
+        """
+        Campos a devolver en list/retrieve según ?fields= (nombres separados por
+        coma o un conjunto: 'card', 'all') y ?omit=. El listado usa por defecto
+        el conjunto 'card'; el detalle, todos los campos. None = sin recorte.
+        """
+        if self.action not in ('list', 'retrieve'):
+            return None
+        if hasattr(self, '_response_fields'):
+            return self._response_fields
+
+        field_sets = ProductSerializer.field_sets
+        requested = self.request.query_params.get('fields', '').strip()
+        if requested in field_sets:
+            fields = list(field_sets[requested])
+        elif requested:
+            fields = [name.strip() for name in requested.split(',') if name.strip()]
+        else:
+            fields = list(field_sets[self.list_field_set if self.action == 'list' else 'all'])
+        omitted = [name.strip() for name in self.request.query_params.get('omit', '').split(',') if name.strip()]
+
+        unknown = sorted(set(fields + omitted) - set(field_sets['all']))
+        if unknown:
+            raise ValidationError({'fields': [f'Campos desconocidos: {", ".join(unknown)}. Disponibles: {", ".join(field_sets["all"])}.']})
+        fields = [name for name in field_sets['all'] if name in fields and name not in omitted]
+        if not fields:
+            raise ValidationError({'fields': ['No queda ningún campo para devolver.']})
+
+        self._response_fields = fields
+        return fields
 
     def get_permissions(self):
         """Asigna permisos para ProductViewSet."""
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            self.permission_classes = [IsAdminUser] # Solo administradores pueden crear/editar/borrar
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_update', 'export', 'reserve', 'release']:
+            self.permission_classes = [IsAdminUser] # Solo administradores pueden crear/editar/borrar o ajustar stock
         return super().get_permissions()
 
+    def get_throttles(self):
+        """El autocompletado tiene su propio límite (se llama en cada tecla)."""
+        if self.action == 'suggest':
+            self.throttle_classes = [ScopedRateThrottle]
+            self.throttle_scope = 'product_suggest'
+        return super().get_throttles()
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_update(self, request):
+        """
+        Actualización masiva de precio y stock (POST /api/products/bulk/).
+        Requiere:
+        - 'items': lista de {'id', 'price'?, 'stock'?, 'stock_delta'?}.
+        Las entradas válidas se aplican en una sola transacción; la respuesta
+        trae un resultado por entrada, en el mismo orden.
+        """
+        items = request.data.get('items') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({'detail': "Envía 'items' con al menos un cambio."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_update_max_items:
+            return Response(
+                {'detail': f'Máximo {self.bulk_update_max_items} cambios por petición.'}, status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results, valid, positions = [None] * len(items), [], []
+        for position, item in enumerate(items):
+            serializer = ProductBulkEntrySerializer(data=item)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+                positions.append(position)
+            else:
+                item_id = item.get('id') if isinstance(item, dict) else None
+                results[position] = {'id': item_id, 'status': 'error', 'errors': serializer.errors}
+
+        for position, result in zip(positions, bulk_update_products(valid) if valid else []):
+            if 'price' in result:
+                result['price'] = str(result['price']) # Como en ProductSerializer
+            results[position] = result
+
+        updated = sum(1 for result in results if result['status'] == 'updated')
+        return Response({'updated': updated, 'errors': len(results) - updated, 'results': results}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Exporta el catálogo en streaming (GET /api/products/export/?format=ndjson|csv).
+        Acepta los mismos filtros que el listado (category__slug, search, ordering)
+        y se comprime con gzip si el cliente lo acepta. Sin paginación.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'ordering' not in request.query_params and not request.query_params.get('search'):
+            queryset = queryset.order_by('id') # Recorrido por clave primaria: estable y sin ordenamiento en memoria
+
+        fmt = request.accepted_renderer.format
+        use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        response = StreamingHttpResponse(
+            export_stream(queryset, fmt, gzip=use_gzip),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="productos-{timezone.now():%Y%m%d}.{fmt}"'
+        response['Cache-Control'] = 'no-store'
+        response['X-Accel-Buffering'] = 'no' # Que un proxy (nginx) no acumule la respuesta completa
+        response['Vary'] = 'Accept-Encoding'
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Autocompletado de nombres de producto para cada tecla del buscador.
+        Parámetro: 'q'. Devuelve solo id, nombre y slug de la categoría.
+        """
+        term = normalize_suggest_term(request.query_params.get('q'))[:100]
+        if len(term) < self.suggest_min_length:
+            return Response({'results': []})
+
+        cache_key = 'product_suggest:' + hashlib.md5(term.encode('utf-8')).hexdigest()
+        results = cache.get(cache_key)
+        if results is None:
+            rows = suggest_products(Product.objects.all(), term, self.suggest_limit)
+            results = [{'id': pk, 'name': name, 'category_slug': slug} for pk, name, slug in rows]
+            cache.set(cache_key, results, self.suggest_cache_timeout)
+
+        response = Response({'results': results})
+        response['Cache-Control'] = f'public, max-age={self.suggest_cache_timeout}'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Facetas del listado (GET /api/products/facets/): acepta los mismos filtros y
+        'search' que /products/. Opcional: 'price_buckets' (límites inferiores de los
+        tramos de precio, p. ej. 0,50,100). Devuelve el total, los conteos por
+        categoría, por tramo de precio y con/sin stock.
+        """
+        return self.conditional_response(request, self.facet_response)
+
+    def facet_response(self, request):
+        edges = parse_price_edges(request.query_params.get('price_buckets'))
+        _, version = self.catalog_version
+        cache_key = facet_cache_key(request.query_params, api_settings.SEARCH_PARAM, version)
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = facet_counts(self.filter_queryset(self.get_queryset()), edges)
+            cache.set(cache_key, facets, self.facets_cache_timeout)
+        return Response(facets)
+
+    @action(detail=True, methods=['post'])
+    def reserve(self, request, pk=None):
+        """
+        Descuenta stock de forma atómica (ajustes de inventario, solo administradores).
+        Requiere 'quantity'. Devuelve el stock restante o 409 si no alcanza.
+        El carrito no reserva: el checkout descuenta el stock en su transacción.
+        """
+        serializer = StockQuantitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data['quantity']
+
+        stock = reserve_stock(pk, quantity)
+        if stock is None:
+            # Solo en el camino de error se consulta el producto para distinguir 404 de falta de stock
+            product = self.get_object()
+            return Response(
+                {'detail': f'No hay suficiente stock. Stock disponible: {product.stock}', 'id': product.id, 'stock': product.stock},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({'id': int(pk), 'stock': stock})
+
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        """
+        Repone stock de forma atómica (devoluciones, ingresos; solo administradores).
+        Requiere 'quantity'. Devuelve el stock resultante.
+        """
+        serializer = StockQuantitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        stock = release_stock(pk, serializer.validated_data['quantity'])
+        if stock is None:
+            self.get_object() # Lanza 404
+        return Response({'id': int(pk), 'stock': stock})
+
+
+
+# VISTA para Pedidos (checkout)
+class OrderViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Cada usuario ve solo sus pedidos; los administradores ven todos."""
+        queryset = Order.objects.prefetch_related('items')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Checkout: cotiza, valida stock, descuenta y crea el pedido en una transacción.
+        Requiere:
+        - 'items': lista de {'product_id', 'quantity'}.
+        - 'shipping_address': dirección de envío.
+        Opcional:
+        - 'coupon_code': cupón a redimir con el pedido.
+        - 'quote_token': cotización de /api/cart/price/ (se respetan sus precios mientras esté vigente).
+        """
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        quoted_prices = None
+        if data.get('quote_token'):
+            quoted_prices = load_quote(data['quote_token'], data['items'], data.get('coupon_code'))
+        order = place_order(
+            request.user,
+            data['items'],
+            data['shipping_address'],
+            coupon_code=data.get('coupon_code'),
+            quoted_prices=quoted_prices,
+        )
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class CartViewSet(viewsets.ViewSet):
+    permission_classes = [AllowAny] # El carrito se cotiza también para invitados
+
+    @action(detail=False, methods=['post'])
+    def price(self, request):
+        """
+        Cotiza el carrito en el servidor (POST /api/cart/price/).
+        Requiere:
+        - 'items': lista de {'product_id', 'quantity'}.
+        Opcional:
+        - 'coupon_code': cupón a aplicar (si no aplica, se informa en 'coupon_detail').
+        Devuelve totales por línea, disponibilidad, el total y un 'quote_token' para el checkout.
+        """
+        serializer = CartPriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quote = price_cart(serializer.validated_data['items'], serializer.validated_data.get('coupon_code'))
+        return Response(CartQuoteSerializer(quote).data, status=status.HTTP_200_OK)
 
 
 # VISTA para Cupones
@@ -49,7 +338,7 @@ class CouponViewSet(viewsets.ModelViewSet):
         """Asigna permisos basados en la acción para CouponViewSet."""
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             self.permission_classes = [IsAdminUser] # Solo administradores para CRUD de cupones
-        elif self.action == 'apply_coupon':
+        elif self.action in ['apply_coupon', 'best_coupon']:
             self.permission_classes = [AllowAny] # Cualquiera puede intentar aplicar un cupón (guest o logged-in)
         else: # Para acciones como 'list', 'retrieve' (GET)
             self.permission_classes = [IsAdminUser] # Los cupones solo los listan/ven admins, no usuarios comunes
@@ -70,41 +359,23 @@ class CouponViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Código de cupón y total del carrito son requeridos.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            cart_total = float(cart_total_str) # Asegúrate de convertir a float
-        except ValueError:
+            cart_total = Decimal(str(cart_total_str))
+            if not cart_total.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
             return Response({'detail': 'El total del carrito debe ser un número válido.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            coupon = Coupon.objects.get(code__iexact=code) # __iexact para búsqueda insensible a mayúsculas/minúsculas
-        except Coupon.DoesNotExist:
+        coupon = coupon_rules.get(code) # Caché en proceso (con filtro de Bloom y resultados negativos)
+        if coupon is None:
             return Response({'detail': 'Cupón inválido o no existe.'}, status=status.HTTP_404_NOT_FOUND)
 
-        if not coupon.active:
-            return Response({'detail': 'Cupón inactivo.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        now = timezone.now()
-        if coupon.valid_from and now < coupon.valid_from:
-            return Response({'detail': 'Este cupón aún no es válido.'}, status=status.HTTP_400_BAD_REQUEST)
-        if coupon.valid_until and now > coupon.valid_until:
-            return Response({'detail': 'Este cupón ha expirado.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if cart_total < coupon.minimum_amount:
-            return Response({'detail': f'El monto mínimo de compra para este cupón es S/.{coupon.minimum_amount}.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if coupon.usage_limit != -1 and coupon.used_count >= coupon.usage_limit:
-            return Response({'detail': 'Este cupón ha alcanzado su límite de usos.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-
-        # Calcular el descuento
-        discount_amount = 0
-        if coupon.discount_type == 'percentage':
-            discount_amount = (cart_total * float(coupon.discount_value)) / 100
-        elif coupon.discount_type == 'fixed_amount':
-            discount_amount = float(coupon.discount_value)
-        
-        # El descuento no puede ser mayor que el total del carrito
-        discount_amount = min(discount_amount, cart_total)
-        final_total = max(0, cart_total - discount_amount)
+        rejection = coupon.rejection(cart_total)
+        if rejection:
+            return Response({'detail': rejection}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Calcular el descuento (no puede ser mayor que el total del carrito)
+        discount_amount = coupon.discount(cart_total)
+        final_total = max(Decimal('0'), cart_total - discount_amount)
 
         return Response({
             'code': coupon.code,
@@ -113,4 +384,94 @@ class CouponViewSet(viewsets.ModelViewSet):
             'discount_amount': float(discount_amount),
             'final_total': float(final_total),
             'message': 'Cupón aplicado exitosamente.'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def best_coupon(self, request):
+        """
+        Evalúa varios cupones para un carrito en una sola petición.
+        Requiere:
+        - 'cart_total' o 'items' ([{'product_id', 'quantity'}], se cotizan con precios actuales).
+        - 'codes' (lista de códigos) y/o 'public': true (todos los cupones públicos activos).
+        Devuelve los resultados ordenados por descuento y el mejor cupón aplicable.
+        """
+        serializer = CouponEvaluationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'items' in data:
+            cart_total = cart_subtotal(merge_lines(data['items']))
+        else:
+            cart_total = data['cart_total']
+
+        codes = {normalize_coupon_code(code) for code in data.get('codes', [])} - {''}
+        # Una sola query para todos los candidatos (índice único de code / filtro de públicos)
+        condition = Q(code__in=codes)
+        if data['public']:
+            condition |= Q(is_public=True, active=True)
+        coupons = list(Coupon.objects.filter(condition))
+
+        # Los montos van como texto (igual que los DecimalField de DRF) para no perder precisión
+        results = [
+            {key: str(value) if isinstance(value, Decimal) else value for key, value in result.items()}
+            for result in rank_coupons(coupons, cart_total)
+        ]
+        found = {coupon.code for coupon in coupons}
+        results.extend(
+            {'code': code, 'applicable': False, 'detail': 'Cupón inválido o no existe.'}
+            for code in sorted(codes - found)
+        )
+        best = results[0] if results and results[0]['applicable'] and Decimal(results[0]['discount_amount']) > 0 else None
+
+        return Response({
+            'cart_total': str(cart_total.quantize(CENT)),
+            'best': best,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+class ProfilingViewSet(viewsets.ViewSet):
+    """Resultados de ProfilingMiddleware (store/profiling.py): solo administradores."""
+    permission_classes = [IsAdminUser]
+    lookup_value_regex = r'[\w-]+'
+    report_limit = 40 # Funciones por defecto en el resumen de un volcado
+
+    def list(self, request):
+        """
+        GET /api/profiling/: estadísticas por ruta de este proceso (cada worker
+        tiene las suyas) y los volcados de cProfile guardados, del más reciente
+        al más antiguo.
+        """
+        return Response({
+            'enabled': settings.REQUEST_PROFILING,
+            'routes': route_stats.snapshot(),
+            'dumps': profile_dumps().list(),
+        })
+
+    def retrieve(self, request, pk=None):
+        """
+        GET /api/profiling/<volcado>/: resumen de pstats en texto. Opcional:
+        'sort' (cumulative, tottime, calls...), 'limit' (funciones a mostrar) y
+        'download=1' para bajar el .prof (snakeviz, pstats).
+        """
+        dumps = profile_dumps()
+        path = dumps.find(pk)
+        if path is None:
+            raise Http404
+        if request.query_params.get('download') == '1':
+            return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{pk}.prof')
+
+        sort = request.query_params.get('sort', 'cumulative')
+        if sort not in SORT_KEYS:
+            raise ValidationError({'sort': [f'Orden desconocido. Disponibles: {", ".join(sorted(SORT_KEYS))}.']})
+        try:
+            limit = int(request.query_params.get('limit', self.report_limit))
+        except ValueError:
+            raise ValidationError({'limit': ['Debe ser un número entero.']})
+        return HttpResponse(dumps.report(pk, sort, max(limit, 1)), content_type='text/plain; charset=utf-8')
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        """POST /api/profiling/reset/: vacía las estadísticas por ruta de este proceso (los volcados se conservan)."""
+        route_stats.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
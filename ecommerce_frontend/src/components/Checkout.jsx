@@ -1,10 +1,11 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useCart } from '../context/CartContext';
+import { priceCart } from '../services/cart';
 import { useNavigate, Link, useLocation } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 
 const Checkout = () => {
-    const { cart, clearCart, getTotalPrice } = useCart();
+    const { cart, placeOrder, getTotalPrice } = useCart();
     const { user } = useAuth();
     const navigate = useNavigate();
     const location = useLocation();
@@ -31,9 +32,24 @@ const Checkout = () => {
     const [error, setError] = useState('');
     const [step, setStep] = useState(1); // 1: Shipping, 2: Payment, 3: Review
 
-    const subtotal = getTotalPrice();
-    const shipping = subtotal >= 100 ? 0 : 15;
-    const finalTotal = subtotal - couponDiscount + shipping;
+    const [quote, setQuote] = useState(null);
+
+    // Cotización del servidor: mientras llega (o si falla) se muestran los montos calculados localmente
+    useEffect(() => {
+        if (cart.length === 0) return;
+        const items = cart.map(item => ({ product_id: item.product.id, quantity: item.quantity }));
+        priceCart(items, appliedCoupon)
+            .then(setQuote)
+            .catch(() => setQuote(null));
+    }, [cart, appliedCoupon]);
+
+    const subtotal = quote ? parseFloat(quote.subtotal) : getTotalPrice();
+    const discount = quote ? parseFloat(quote.discount) : couponDiscount;
+    const shipping = quote ? parseFloat(quote.shipping_cost) : (subtotal >= 100 ? 0 : 15);
+    const finalTotal = quote ? parseFloat(quote.total) : subtotal - discount + shipping;
+    // El pedido lleva el cupón que aplicó la cotización (el token lo incluye): si el servidor lo descartó, va sin cupón
+    const orderCoupon = quote ? quote.coupon_code : appliedCoupon;
+    const couponDropped = Boolean(quote && appliedCoupon && !quote.coupon_code);
 
     const handleInputChange = (e) => {
         const { name, value } = e.target;
@@ -85,22 +101,17 @@ const Checkout = () => {
         }
 
         try {
-            console.log('Realizando pedido:', {
-                shippingAddress: `${formData.address}, ${formData.city}, ${formData.postalCode}`,
-                paymentMethod,
-                items: cart,
-                total: finalTotal,
-                couponApplied: appliedCoupon,
-            });
-
-            await new Promise(resolve => setTimeout(resolve, 2000));
-
+            await placeOrder(`${formData.address}, ${formData.city}, ${formData.postalCode}`, orderCoupon, quote?.quote_token);
             setOrderConfirmed(true);
-            clearCart();
 
         } catch (err) {
             console.error("Error al realizar el pedido:", err);
-            setError('Error al procesar tu pedido. Inténtalo de nuevo.');
+            if (err.quote_token) {
+                setQuote(null); // Cotización vencida o desactualizada: se vuelve a cotizar
+                const items = cart.map(item => ({ product_id: item.product.id, quantity: item.quantity }));
+                priceCart(items, appliedCoupon).then(setQuote).catch(() => {});
+            }
+            setError(err.detail || err.quote_token?.[0] || 'Error al procesar tu pedido. Inténtalo de nuevo.');
         } finally {
             setLoading(false);
         }
@@ -558,12 +569,17 @@ const Checkout = () => {
                                     <span>Subtotal</span>
                                     <span>S/. {subtotal.toFixed(2)}</span>
                                 </div>
-                                {couponDiscount > 0 && (
+                                {discount > 0 && (
                                     <div className="flex justify-between text-success-green">
-                                        <span>Descuento ({appliedCoupon})</span>
-                                        <span>-S/. {couponDiscount.toFixed(2)}</span>
+                                        <span>Descuento ({orderCoupon})</span>
+                                        <span>-S/. {discount.toFixed(2)}</span>
                                     </div>
                                 )}
+                                {couponDropped && (
+                                    <p className="text-sm text-red-500">
+                                        El cupón {appliedCoupon} no se aplicó: {quote.coupon_detail}
+                                    </p>
+                                )}
                                 <div className="flex justify-between text-medium-text-gray">
                                     <span>Envío</span>
                                     <span className={shipping === 0 ? 'text-success-green font-medium' : ''}>
@@ -233,6 +233,11 @@ const Home = () => {
                                     <h3 className="text-dark-blue-gray font-semibold text-lg group-hover:text-primary-blue transition-colors duration-300">
                                         {category.name}
                                     </h3>
+                                    {category.product_count > 0 && (
+                                        <span className="mt-1 text-xs text-medium-text-gray">
+                                            {category.in_stock_count} de {category.product_count} disponibles
+                                        </span>
+                                    )}
                                     <span className="mt-2 text-sm text-primary-blue opacity-0 group-hover:opacity-100 transition-opacity duration-300 flex items-center">
                                         Ver productos
                                         <svg className="w-4 h-4 ml-1" fill="none" stroke="currentColor" viewBox="0 0 24 24">
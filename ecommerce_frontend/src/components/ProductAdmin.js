@@ -34,7 +34,7 @@ const ProductAdmin = () => {
         setLoading(true);
         try {
             // Usa axiosInstance y la ruta relativa. Headers ya los pone el interceptor.
-            const response = await axiosInstance.get('/products/'); 
+            const response = await axiosInstance.get('/products/', { params: { fields: 'all' } }); // Con descripción para editar
             setProducts(response.data);
         } catch (err) {
             setGeneralMessage({ type: 'error', text: 'Error al cargar productos.' });
@@ -32,7 +32,8 @@ const ProductoAdmin = () => {
   const fetchProducts = async () => {
     try {
       setLoading(true);
-      const data = await productsService.getProducts();
+      // El formulario de edición necesita la descripción: se piden todos los campos
+      const data = await productsService.getProducts({ fields: 'all' });
       setProducts(data);
       setError('');
     } catch (err) {
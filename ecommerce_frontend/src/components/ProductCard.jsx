@@ -61,13 +61,6 @@ const ProductCard = ({ product }) => {
                         {product.name}
                     </h3>
                     
-                    {/* Description preview */}
-                    {product.description && (
-                        <p className="text-sm text-medium-text-gray mb-3 line-clamp-2 flex-grow">
-                            {product.description}
-                        </p>
-                    )}
-
                     {/* Price and Button - Always at bottom */}
                     <div className="mt-auto">
                         <div className="flex items-center justify-between mb-3">
@@ -4,13 +4,18 @@ import { useLocation, useSearchParams } from 'react-router-dom';
 import ProductCard from './ProductCard';
 import LoadingSpinner from './LoadingSpinner';
 
+// Orden del selector -> ?ordering= del backend
+const ORDERINGS = { name: 'name', price_asc: 'price', price_desc: '-price' };
+const SEARCH_DELAY_MS = 300; // Espera a que el usuario deje de escribir antes de consultar
+
 const ProductList = () => {
     const [products, setProducts] = useState([]);
-    const [allProducts, setAllProducts] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [loaded, setLoaded] = useState(false);
     const [error, setError] = useState(null);
     const [searchParams, setSearchParams] = useSearchParams();
     const [searchTerm, setSearchTerm] = useState('');
+    const [search, setSearch] = useState('');
     const [sortBy, setSortBy] = useState('name');
     const [viewMode, setViewMode] = useState('grid');
     const location = useLocation();
@@ -18,64 +23,50 @@ const ProductList = () => {
     const categorySlug = searchParams.get('category');
 
     useEffect(() => {
+        const timer = setTimeout(() => setSearch(searchTerm.trim()), SEARCH_DELAY_MS);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    // La búsqueda (nombre, descripción y categoría) y el orden los resuelve el backend:
+    // el listado trae solo los campos de la tarjeta, sin la descripción
+    useEffect(() => {
+        let cancelled = false; // Descarta respuestas de una búsqueda anterior que lleguen tarde
         const fetchProducts = async () => {
             setLoading(true);
             setError(null);
             try {
-                let url = '/products/';
+                const params = { ordering: ORDERINGS[sortBy] };
                 if (categorySlug) {
-                    url += `?category__slug=${categorySlug}`;
+                    params.category__slug = categorySlug;
                 }
-                const response = await axiosInstance.get(url);
+                if (search) {
+                    params.search = search;
+                }
+                const response = await axiosInstance.get('/products/', { params });
+                if (cancelled) return;
                 const productsData = response.data.results || response.data;
-                const productsArray = Array.isArray(productsData) ? productsData : [];
-                setAllProducts(productsArray);
-                setProducts(productsArray);
+                setProducts(Array.isArray(productsData) ? productsData : []);
             } catch (err) {
+                if (cancelled) return;
                 console.error("Error fetching products:", err);
                 setError('No se pudieron cargar los productos. Inténtalo de nuevo más tarde.');
             } finally {
-                setLoading(false);
+                if (!cancelled) {
+                    setLoading(false);
+                    setLoaded(true);
+                }
             }
         };
 
         fetchProducts();
-    }, [location.search, categorySlug]);
-
-    // Filter and sort products
-    useEffect(() => {
-        let filtered = [...allProducts];
-
-        // Search filter
-        if (searchTerm) {
-            filtered = filtered.filter(product =>
-                product.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                (product.description && product.description.toLowerCase().includes(searchTerm.toLowerCase())) ||
-                (product.category_name && product.category_name.toLowerCase().includes(searchTerm.toLowerCase()))
-            );
-        }
-
-        // Sort
-        filtered.sort((a, b) => {
-            switch (sortBy) {
-                case 'price_asc':
-                    return parseFloat(a.price) - parseFloat(b.price);
-                case 'price_desc':
-                    return parseFloat(b.price) - parseFloat(a.price);
-                case 'name':
-                default:
-                    return a.name.localeCompare(b.name);
-            }
-        });
-
-        setProducts(filtered);
-    }, [searchTerm, sortBy, allProducts]);
+        return () => { cancelled = true; };
+    }, [location.search, categorySlug, search, sortBy]);
 
     const clearCategory = () => {
         setSearchParams({});
     };
 
-    if (loading) {
+    if (loading && !loaded) {
         return (
             <div className="min-h-[60vh] flex items-center justify-center bg-light-background">
                 <LoadingSpinner size="large" text="Cargando productos..." />
@@ -195,7 +186,8 @@ const ProductList = () => {
                     {/* Results count */}
                     <div className="mt-4 pt-4 border-t border-gray-100">
                         <p className="text-sm text-medium-text-gray">
-                            {products.length === 0 ? 'No se encontraron productos' : 
+                            {loading ? 'Buscando...' :
+                             products.length === 0 ? 'No se encontraron productos' : 
                              products.length === 1 ? '1 producto encontrado' : 
                              `${products.length} productos encontrados`}
                             {searchTerm && ` para "${searchTerm}"`}
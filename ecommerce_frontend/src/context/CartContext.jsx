@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import axiosInstance from '../services/axiosInstance'; 
+import { createOrder } from '../services/orders';
 import { useAuth } from './AuthContext';
 
 // Creamos el contexto
@@ -66,10 +66,6 @@ export const CartProvider = ({ children }) => {
                             ? { ...item, quantity: newQuantityInCart }
                             : item
                     );
-                    // Actualizar el stock en el backend (reduce stock)
-                    axiosInstance.patch(`/products/${productToAdd.id}/`, {
-                        stock: productToAdd.stock - quantityToAdd,
-                    }).catch(error => console.error("Error updating product stock on add to cart:", error));
                 } else {
                     alert(`No hay suficiente stock para añadir ${quantityToAdd} unidades. Stock disponible: ${productToAdd.stock - existingItem.quantity}`);
                     newCart = prevCart; // No cambia el carrito si no hay stock
@@ -78,10 +74,6 @@ export const CartProvider = ({ children }) => {
                 // Si el producto no está en el carrito, lo agrega (si hay stock disponible)
                 if (quantityToAdd <= productToAdd.stock) {
                     newCart = [...prevCart, { product: productToAdd, quantity: quantityToAdd }];
-                    // Actualizar el stock en el backend (reduce stock)
-                    axiosInstance.patch(`/products/${productToAdd.id}/`, {
-                        stock: productToAdd.stock - quantityToAdd,
-                    }).catch(error => console.error("Error updating product stock on initial add to cart:", error));
                 } else {
                     alert(`No hay suficiente stock para añadir ${quantityToAdd} unidades. Stock disponible: ${productToAdd.stock}`);
                     newCart = prevCart; // No cambia el carrito si no hay stock
@@ -93,16 +85,7 @@ export const CartProvider = ({ children }) => {
 
     // Función para eliminar del carrito (adapta a los nombres esperados)
     const removeFromCart = async (productId) => {
-        setCart(prevCart => {
-            const itemToRemove = prevCart.find(item => item.product.id === productId);
-            if (itemToRemove) {
-                // Devolver stock al backend
-                axiosInstance.patch(`/products/${productId}/`, {
-                    stock: itemToRemove.product.stock + itemToRemove.quantity,
-                }).catch(error => console.error("Error returning product stock on remove from cart:", error));
-            }
-            return prevCart.filter(item => item.product.id !== productId);
-        });
+        setCart(prevCart => prevCart.filter(item => item.product.id !== productId));
     };
 
     // Función para actualizar la cantidad de productos en el carrito (adapta a los nombres esperados)
@@ -111,27 +94,15 @@ export const CartProvider = ({ children }) => {
         setCart(prevCart => {
             return prevCart.map(item => {
                 if (item.product.id === productId) {
-                    const oldQuantity = item.quantity;
-                    const stockDifference = oldQuantity - newQuantity; // Diferencia de stock a ajustar en el backend
-
                     if (newQuantity <= 0) { // Si la cantidad es 0 o menos, elminar el item
-                         // Devolver stock total del item antes de eliminarlo
-                         axiosInstance.patch(`/products/${productId}/`, {
-                            stock: item.product.stock + oldQuantity,
-                        }).catch(error => console.error("Error returning product stock on zero quantity:", error));
                         return null; // Marca para filtrar
                     }
-                    
-                    if (newQuantity > item.product.stock + oldQuantity) { // stock actual del producto + cantidad que ya tiene en carrito
-                        alert(`No hay suficiente stock para aumentar a ${newQuantity}. Stock total disponible: ${item.product.stock + oldQuantity}`);
+
+                    if (newQuantity > item.product.stock) { // Stock que tenía el producto al agregarlo
+                        alert(`No hay suficiente stock para aumentar a ${newQuantity}. Stock disponible: ${item.product.stock}`);
                         return item; // No actualizar si no hay stock suficiente
                     }
 
-                    // Actualizar stock en el backend
-                    axiosInstance.patch(`/products/${productId}/`, {
-                        stock: item.product.stock + stockDifference, // Resta si la newQuantity es mayor, suma si es menor
-                    }).catch(error => console.error("Error updating product stock on quantity change:", error));
-
                     return { ...item, quantity: newQuantity };
                 }
                 return item;
@@ -139,21 +110,20 @@ export const CartProvider = ({ children }) => {
         });
     };
 
-    // Función para limpiar el carrito (y devolver stock al backend)
+    // Función para limpiar el carrito
     const clearCart = async () => {
-        // Itera sobre el carrito para devolver el stock al backend antes de vaciarlo
-        for (const item of cart) {
-            try {
-                await axiosInstance.patch(`/products/${item.product.id}/`, {
-                    stock: item.product.stock + item.quantity,
-                });
-            } catch (error) {
-                console.error(`Error returning stock for product ${item.product.name}:`, error);
-            }
-        }
         setCart([]);
     };
 
+    // Función para confirmar el pedido en el backend
+    // El carrito no reserva stock: el checkout lo descuenta de forma atómica y responde 409 si no alcanza
+    const placeOrder = async (shippingAddress, couponCode = null, quoteToken = null) => {
+        const items = cart.map(item => ({ product_id: item.product.id, quantity: item.quantity }));
+        const order = await createOrder(items, shippingAddress, couponCode, quoteToken);
+        setCart([]);
+        return order;
+    };
+
     // Función para obtener el total del carrito (adapta a los nombres esperados)
     const getTotalPrice = () => {
         return cart.reduce((total, item) => {
@@ -168,7 +138,7 @@ export const CartProvider = ({ children }) => {
     };
 
     return (
-        <CartContext.Provider value={{ cart, addToCart, removeFromCart, updateQuantity, clearCart, getTotalPrice }}>
+        <CartContext.Provider value={{ cart, addToCart, removeFromCart, updateQuantity, clearCart, placeOrder, getTotalPrice }}>
             {children}
         </CartContext.Provider>
     );
@@ -0,0 +1,14 @@
+import axiosInstance from './axiosInstance';
+
+// Cotizar el carrito en el servidor: precios y stock actuales, cupón y quote_token para el checkout
+export const priceCart = async (items, couponCode = null) => {
+    try {
+        const response = await axiosInstance.post('/cart/price/', {
+            items,
+            ...(couponCode ? { coupon_code: couponCode } : {}),
+        });
+        return response.data;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error al cotizar el carrito' };
+    }
+};
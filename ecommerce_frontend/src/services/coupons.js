@@ -52,3 +52,18 @@ export const applyCoupon = async (code, cartTotal) => {
         throw error.response?.data || { detail: 'Error al aplicar cupón' };
     }
 };
+
+// Evaluar varios cupones a la vez y obtener el mejor (cualquier usuario)
+// Enviar cartTotal o items ([{ product_id, quantity }]); codes y/o publicCoupons = true
+export const getBestCoupon = async ({ cartTotal, items, codes, publicCoupons = false }) => {
+    try {
+        const response = await axiosInstance.post('/coupons/best_coupon/', {
+            ...(items ? { items } : { cart_total: cartTotal }),
+            ...(codes?.length ? { codes } : {}),
+            public: publicCoupons
+        });
+        return response.data;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error al evaluar cupones' };
+    }
+};
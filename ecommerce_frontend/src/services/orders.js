@@ -0,0 +1,26 @@
+import axiosInstance from './axiosInstance';
+
+// Crear pedido (checkout): el backend vuelve a cotizar y descuenta el stock
+export const createOrder = async (items, shippingAddress, couponCode = null, quoteToken = null) => {
+    try {
+        const response = await axiosInstance.post('/orders/', {
+            items,
+            shipping_address: shippingAddress,
+            ...(couponCode ? { coupon_code: couponCode } : {}),
+            ...(quoteToken ? { quote_token: quoteToken } : {}),
+        });
+        return response.data;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error al crear el pedido' };
+    }
+};
+
+// Obtener los pedidos del usuario autenticado
+export const getOrders = async () => {
+    try {
+        const response = await axiosInstance.get('/orders/');
+        return response.data.results || response.data;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error al obtener pedidos' };
+    }
+};
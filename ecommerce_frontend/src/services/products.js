@@ -11,6 +11,27 @@ export const getProducts = async (params = {}) => {
     }
 };
 
+// Sugerencias de autocompletado (id, nombre, slug de categoría) para el buscador
+export const suggestProducts = async (q) => {
+    try {
+        const response = await axiosInstance.get('/products/suggest/', { params: { q } });
+        return response.data.results;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error al obtener sugerencias' };
+    }
+};
+
+// Facetas del listado con los mismos filtros (category__slug, search...): conteos por categoría,
+// tramos de precio (price_buckets: '0,50,100') y disponibilidad
+export const getProductFacets = async (params = {}) => {
+    try {
+        const response = await axiosInstance.get('/products/facets/', { params });
+        return response.data;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error al obtener facetas' };
+    }
+};
+
 // Obtener un producto por ID
 export const getProductById = async (id) => {
     try {
@@ -41,6 +62,17 @@ export const updateProduct = async (id, productData) => {
     }
 };
 
+// Actualizar precio y/o stock de muchos productos en una sola petición (solo admin)
+// items: [{ id, price?, stock?, stock_delta? }]; devuelve un resultado por entrada
+export const bulkUpdateProducts = async (items) => {
+    try {
+        const response = await axiosInstance.post('/products/bulk/', { items });
+        return response.data;
+    } catch (error) {
+        throw error.response?.data || { detail: 'Error en la actualización masiva' };
+    }
+};
+
 // Eliminar producto
 export const deleteProduct = async (id) => {
     try {
@@ -50,3 +82,21 @@ export const deleteProduct = async (id) => {
         throw error.response?.data || { detail: 'Error al eliminar producto' };
     }
 };
+
+// Exportar el catálogo completo (solo admin): descarga un archivo NDJSON o CSV con los filtros dados
+export const exportProducts = async (format = 'csv', params = {}) => {
+    try {
+        const response = await axiosInstance.get('/products/export/', {
+            params: { ...params, format },
+            responseType: 'blob',
+        });
+        const url = URL.createObjectURL(response.data);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = `productos.${format}`;
+        link.click();
+        URL.revokeObjectURL(url);
+    } catch (error) {
+        throw { detail: 'Error al exportar productos' };
+    }
+};
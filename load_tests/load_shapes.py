@@ -0,0 +1,138 @@
+"""
+Formas de carga: escalones (para ubicar el punto de saturación) y pico.
+
+Cada forma divide la prueba en fases y guarda, al cerrar cada una, el
+throughput, la tasa de error y el p95 de sus últimos segundos. La forma
+se elige con LOAD_SHAPE=step|spike (ver locustfile.py); los parámetros
+se leen de variables de entorno.
+"""
+import os
+
+from locust import LoadTestShape
+
+import slos
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+class PhasedShape(LoadTestShape):
+    """Base: subclases definen phase(run_time) -> (etiqueta, usuarios, tasa de arranque) o None al terminar."""
+    abstract = True
+
+    def __init__(self):
+        super().__init__()
+        self.phases = [] # [(etiqueta, usuarios, rps, tasa de error, p95 ms)]
+        self.current = None
+
+    def phase(self, run_time):
+        raise NotImplementedError
+
+    def tick(self):
+        run_time = self.get_run_time()
+        phase = self.phase(run_time)
+        label = phase[0] if phase else None
+        if label != (self.current and self.current['label']):
+            self.close_phase(run_time)
+            if phase:
+                total = self.runner.stats.total
+                self.current = {
+                    'label': label, 'users': phase[1], 'start': run_time,
+                    'requests': total.num_requests, 'failures': total.num_failures,
+                }
+        return phase[1:] if phase else None
+
+    def close_phase(self, run_time):
+        if self.current is None:
+            return
+        total = self.runner.stats.total
+        requests = total.num_requests - self.current['requests']
+        failures = total.num_failures - self.current['failures']
+        elapsed = max(run_time - self.current['start'], 1e-9)
+        self.phases.append((
+            self.current['label'], self.current['users'], requests / elapsed,
+            failures / requests if requests else 0.0,
+            total.get_current_response_time_percentile(0.95) or 0, # Ventana de los últimos segundos de la fase
+        ))
+        self.current = None
+
+    def report(self):
+        lines = [f'{"Fase":<16} {"usuarios":>8} {"req/s":>8} {"errores":>8} {"p95 ms":>8}']
+        lines.extend(
+            f'{label:<16} {users:>8} {rps:>8.1f} {error_rate:>8.1%} {p95:>8.0f}'
+            for label, users, rps, error_rate, p95 in self.phases
+        )
+        return '\n'.join(lines)
+
+
+class StepLoadShape(PhasedShape):
+    """
+    +STEP_USERS usuarios cada STEP_SECONDS hasta STEP_MAX_USERS. El primer
+    escalón donde el throughput deja de crecer, el p95 supera el SLO o los
+    errores superan el máximo es el punto de saturación.
+    """
+    step_users = env_int('STEP_USERS', 10)
+    step_seconds = env_int('STEP_SECONDS', 60)
+    max_users = env_int('STEP_MAX_USERS', 200)
+    spawn_rate = env_int('STEP_SPAWN_RATE', 10)
+    min_gain = float(os.environ.get('STEP_MIN_GAIN', 0.05)) # Mejora mínima de req/s entre escalones
+
+    def phase(self, run_time):
+        steps = -(-self.max_users // self.step_users)
+        step = int(run_time // self.step_seconds)
+        if step >= steps:
+            return None
+        return f'escalón {step + 1}', min(self.step_users * (step + 1), self.max_users), self.spawn_rate
+
+    def saturation(self):
+        """(etiqueta, usuarios, motivo) del primer escalón saturado, o None."""
+        previous_rps = None
+        for label, users, rps, error_rate, p95 in self.phases:
+            if error_rate > slos.MAX_ERROR_RATE:
+                return label, users, f'errores {error_rate:.1%}'
+            if p95 > slos.DEFAULT_P95_MS:
+                return label, users, f'p95 {p95:.0f} ms > {slos.DEFAULT_P95_MS} ms'
+            if previous_rps and rps < previous_rps * (1 + self.min_gain):
+                return label, users, f'req/s {previous_rps:.1f} -> {rps:.1f}: el throughput dejó de crecer'
+            previous_rps = rps
+        return None
+
+    def report(self):
+        saturation = self.saturation()
+        if saturation is None:
+            summary = f'Sin saturación hasta {self.max_users} usuarios'
+        else:
+            summary = f'Saturación en {saturation[0]} ({saturation[1]} usuarios): {saturation[2]}'
+        return f'{super().report()}\n\n{summary}'
+
+
+class SpikeLoadShape(PhasedShape):
+    """SPIKE_BASE_USERS de base, pico a SPIKE_PEAK_USERS durante SPIKE_SECONDS y recuperación a la base."""
+    base_users = env_int('SPIKE_BASE_USERS', 20)
+    peak_users = env_int('SPIKE_PEAK_USERS', 200)
+    warmup_seconds = env_int('SPIKE_WARMUP_SECONDS', 60)
+    spike_seconds = env_int('SPIKE_SECONDS', 60)
+    recovery_seconds = env_int('SPIKE_RECOVERY_SECONDS', 120)
+    spawn_rate = env_int('SPIKE_SPAWN_RATE', 50)
+
+    def phase(self, run_time):
+        if run_time < self.warmup_seconds:
+            return 'base', self.base_users, self.spawn_rate
+        if run_time < self.warmup_seconds + self.spike_seconds:
+            return 'pico', self.peak_users, self.spawn_rate
+        if run_time < self.warmup_seconds + self.spike_seconds + self.recovery_seconds:
+            return 'recuperación', self.base_users, self.spawn_rate
+        return None
+
+    def report(self):
+        phases = {label: p95 for label, _, _, _, p95 in self.phases}
+        summary = ''
+        if phases.get('base') and 'recuperación' in phases:
+            # Tras el pico el p95 debería volver cerca del de la base (colas vaciadas, sin conexiones colgadas)
+            ratio = phases['recuperación'] / phases['base']
+            summary = f'\n\np95 tras el pico: x{ratio:.1f} respecto a la base' + (' ✗ sin recuperar' if ratio > 1.5 else ' ✓')
+        return super().report() + summary
+
+
+SHAPES = {'step': StepLoadShape, 'spike': SpikeLoadShape}
@@ -0,0 +1,206 @@
+"""
+Pruebas de carga contra un servidor local (ver load_tests/README.md).
+
+Tres perfiles con embudos realistas:
+- Visitante (60%): categorías -> listado de una categoría -> más páginas
+  (cursor) -> detalle -> facetas; a veces navega por número de página o
+  se registra.
+- Buscador (30%): autocompletado tecla a tecla -> búsqueda -> detalle.
+- Comprador (10%): login con un usuario loadtest_NNNNN -> listado ->
+  cotización del carrito -> cupón -> checkout con la cotización -> pedidos.
+
+Los usuarios, cupones y el catálogo los prepara
+`manage.py provision_load_test`. Al terminar se comparan las estadísticas
+con los SLO (slos.py) y locust sale con código 1 si alguno no se cumple.
+
+Uso:
+    locust -f load_tests/locustfile.py                      # UI en http://localhost:8089
+    LOAD_SHAPE=step locust -f load_tests/locustfile.py --headless
+"""
+import logging
+import os
+import random
+import time
+import uuid
+from urllib.parse import urlparse
+
+from locust import HttpUser, between, events, task
+
+import load_shapes
+import slos
+
+HOST = os.environ.get('LOADTEST_HOST', 'http://127.0.0.1:8000')
+USERS = int(os.environ.get('LOADTEST_USERS', 200)) # Los creados por provision_load_test --users
+PASSWORD = os.environ.get('LOADTEST_PASSWORD', 'LoadTest1234!')
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1', '0.0.0.0'}
+
+# Sustantivos del catálogo sintético (store/synthetic.py), sin tildes como los escribe la gente
+SEARCH_TERMS = [
+    'audifonos', 'camara', 'parlante', 'monitor', 'teclado', 'mochila', 'lampara', 'silla', 'zapatillas',
+    'reloj', 'licuadora', 'cafetera', 'bicicleta', 'pelota', 'termo', 'perfume', 'alfombra', 'guitarra', 'tablet',
+]
+COUPONS = ['LOADTEST10', 'LOADTEST20', 'NOEXISTE'] # El último responde 404: también es tráfico real
+
+# Forma de carga: LOAD_SHAPE=step|spike; sin definir, usuarios y tasa de la UI o de -u/-r
+if os.environ.get('LOAD_SHAPE'):
+    LoadShape = load_shapes.SHAPES[os.environ['LOAD_SHAPE']]
+
+logger = logging.getLogger(__name__)
+
+
+@events.test_start.add_listener
+def refuse_remote_hosts(environment, **kwargs):
+    """El perfil crea pedidos y usuarios: solo contra servidores locales salvo LOADTEST_ALLOW_REMOTE=1."""
+    host = urlparse(environment.host or HOST).hostname
+    if host not in LOCAL_HOSTS and os.environ.get('LOADTEST_ALLOW_REMOTE') != '1':
+        logger.error('Host %s no es local: las pruebas de carga no deben tocar producción (LOADTEST_ALLOW_REMOTE=1 para forzar)', host)
+        environment.process_exit_code = 2
+        environment.runner.quit()
+
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    shape = environment.shape_class
+    if shape is not None and hasattr(shape, 'report'):
+        logger.info('Fases de la prueba\n%s', shape.report())
+    if environment.process_exit_code == 2:
+        return
+    passed, table = slos.report(environment.stats)
+    logger.info('SLO\n%s', table)
+    if not passed:
+        environment.process_exit_code = 1
+
+
+class StoreUser(HttpUser):
+    abstract = True
+    host = HOST
+    wait_time = between(1, 4) # Tiempo de lectura entre páginas
+
+    def on_start(self):
+        self.categories = [category['slug'] for category in self.get_json('/api/categories/', '/api/categories/').get('results', [])]
+
+    def get_json(self, url, name, expected=(200,)):
+        with self.client.get(url, name=name, catch_response=True) as response:
+            return self.read(response, expected)
+
+    def post_json(self, url, data, name=None, expected=(200,), headers=None):
+        with self.client.post(url, json=data, name=name or url, headers=headers, catch_response=True) as response:
+            return self.read(response, expected)
+
+    def read(self, response, expected):
+        """Marca como error lo que no esté en `expected` (409 sin stock o 404 de un cupón son respuestas válidas)."""
+        if response.status_code not in expected:
+            response.failure(f'HTTP {response.status_code}')
+            return {}
+        response.success()
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def browse_category(self):
+        """Listado de una categoría con un orden al azar; devuelve la página."""
+        if not self.categories:
+            return self.get_json('/api/products/', '/api/products/')
+        ordering = random.choice(['', '&ordering=price', '&ordering=-price', '&in_stock=true'])
+        return self.get_json(f'/api/products/?category={random.choice(self.categories)}{ordering}', '/api/products/?category=[slug]')
+
+    def view_product(self, page):
+        if page.get('results'):
+            product = random.choice(page['results'])
+            return self.get_json(f'/api/products/{product["id"]}/', '/api/products/[id]/')
+        return {}
+
+
+class Visitor(StoreUser):
+    weight = 6
+
+    @task(10)
+    def browse_funnel(self):
+        page = self.get_json('/api/products/', '/api/products/')
+        if random.random() < 0.7:
+            page = self.browse_category()
+            for _ in range(random.randint(0, 3)): # Scroll infinito: siguientes páginas por cursor
+                if not page.get('next'):
+                    break
+                url = urlparse(page['next'])
+                page = self.get_json(f'{url.path}?{url.query}', '/api/products/?cursor=[cursor]')
+        if random.random() < 0.6:
+            self.view_product(page)
+        if random.random() < 0.3 and self.categories:
+            self.get_json(f'/api/products/facets/?category={random.choice(self.categories)}', '/api/products/facets/')
+
+    @task(2)
+    def browse_by_page_number(self):
+        self.get_json(f'/api/products/?page={random.randint(1, 20)}', '/api/products/?page=[n]')
+
+    @task(1)
+    def register(self):
+        # Prefijo loadtest_: provision_load_test --cleanup también los elimina
+        username = f'loadtest_r{uuid.uuid4().hex[:12]}'
+        self.post_json('/api/accounts/register/', {
+            'username': username, 'email': f'{username}@loadtest.local', 'password': PASSWORD, 'password2': PASSWORD,
+        }, expected=(201,))
+
+
+class Searcher(StoreUser):
+    weight = 3
+
+    @task
+    def search_funnel(self):
+        term = random.choice(SEARCH_TERMS)
+        for length in range(3, len(term) + 1): # El autocompletado pide una sugerencia por tecla
+            self.get_json(f'/api/products/suggest/?q={term[:length]}', '/api/products/suggest/')
+            time.sleep(random.uniform(0.1, 0.3))
+        page = self.get_json(f'/api/products/?search={term}', '/api/products/?search=[term]')
+        if random.random() < 0.5:
+            self.view_product(page)
+
+
+class Buyer(StoreUser):
+    weight = 1
+
+    def on_start(self):
+        super().on_start()
+        self.login()
+
+    def login(self):
+        username = f'loadtest_{random.randint(1, USERS):05d}'
+        data = self.post_json('/api/accounts/login/', {'username': username, 'password': PASSWORD})
+        self.headers = {'Authorization': f'Bearer {data["access"]}'} if 'access' in data else None
+
+    @task(5)
+    def checkout_funnel(self):
+        if self.headers is None:
+            return self.login()
+        page = self.browse_category()
+        available = [product for product in page.get('results', []) if product.get('stock', 0) > 0]
+        if not available:
+            return
+        lines = random.sample(available, min(len(available), random.randint(1, 3)))
+        items = [{'product_id': product['id'], 'quantity': random.randint(1, 2)} for product in lines]
+        coupon = random.choice(COUPONS[:2]) if random.random() < 0.4 else None
+        quote = self.post_json('/api/cart/price/', {'items': items, 'coupon_code': coupon} if coupon else {'items': items})
+        if random.random() < 0.3:
+            self.post_json(
+                '/api/coupons/apply_coupon/', {'code': random.choice(COUPONS), 'cart_total': quote.get('subtotal', '100.00')},
+                expected=(200, 400, 404),
+            )
+        if quote.get('available') and random.random() < 0.6: # El resto abandona el carrito
+            order = {'items': items, 'shipping_address': 'Av. Carga 123', 'quote_token': quote['quote_token']}
+            if quote.get('coupon_code'): # Solo el cupón que la cotización aplicó (LOADTEST20 exige un mínimo)
+                order['coupon_code'] = quote['coupon_code']
+            self.post_json('/api/orders/', order, expected=(201, 409), headers=self.headers)
+            self.get_json_auth('/api/orders/')
+
+    @task(1)
+    def profile(self):
+        if self.headers is not None:
+            self.get_json_auth('/api/accounts/profile/')
+
+    def get_json_auth(self, url):
+        with self.client.get(url, headers=self.headers, catch_response=True) as response:
+            if response.status_code == 401: # Token vencido (1 hora): nuevo login
+                response.success()
+                return self.login()
+            return self.read(response, (200,))
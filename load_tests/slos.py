@@ -0,0 +1,68 @@
+"""
+Objetivos de servicio (SLO) del perfil de carga.
+
+Al terminar la prueba se comparan las estadísticas de cada grupo de
+peticiones (el `name` de locust) con su p95 máximo y con la tasa de error
+tolerada; si alguno no se cumple, locust sale con código 1.
+"""
+import os
+
+# p95 máximo en ms por grupo de peticiones; el resto usa DEFAULT_P95_MS
+P95_MS = {
+    'GET /api/products/': 300,
+    'GET /api/products/?category=[slug]': 300,
+    'GET /api/products/?cursor=[cursor]': 300,
+    'GET /api/products/?page=[n]': 500, # COUNT(*) del modo por número de página
+    'GET /api/products/[id]/': 200,
+    'GET /api/products/?search=[term]': 500,
+    'GET /api/products/suggest/': 150,
+    'GET /api/products/facets/': 500,
+    'GET /api/categories/': 200,
+    'POST /api/cart/price/': 300,
+    'POST /api/coupons/apply_coupon/': 200,
+    'POST /api/orders/': 600,
+    'POST /api/accounts/login/': 1000, # PBKDF2: el hash de la contraseña domina
+    'POST /api/accounts/register/': 1000,
+}
+DEFAULT_P95_MS = int(os.environ.get('SLO_P95_MS', 500))
+MAX_ERROR_RATE = float(os.environ.get('SLO_ERROR_RATE', 0.01))
+
+
+def p95_objective(key):
+    return P95_MS.get(key, DEFAULT_P95_MS)
+
+
+def violations(stats):
+    """Lista de (grupo, motivo) que no cumplen su SLO; `stats` es environment.stats de locust."""
+    failed = []
+    for entry in sorted(stats.entries.values(), key=lambda entry: (entry.name, entry.method)):
+        if not entry.num_requests:
+            continue
+        key = f'{entry.method} {entry.name}'
+        p95 = entry.get_response_time_percentile(0.95)
+        if p95 > p95_objective(key):
+            failed.append((key, f'p95 {p95:.0f} ms > {p95_objective(key)} ms'))
+        if entry.fail_ratio > MAX_ERROR_RATE:
+            failed.append((key, f'errores {entry.fail_ratio:.1%} > {MAX_ERROR_RATE:.1%}'))
+    total = stats.total
+    if total.num_requests and total.fail_ratio > MAX_ERROR_RATE:
+        failed.append(('Total', f'errores {total.fail_ratio:.1%} > {MAX_ERROR_RATE:.1%}'))
+    return failed
+
+
+def report(stats):
+    """Tabla de p95 y errores frente a los SLO; devuelve True si todos se cumplen."""
+    lines = [f'{"Grupo":<42} {"peticiones":>10} {"p95 ms":>8} {"SLO":>6} {"errores":>8}']
+    for entry in sorted(stats.entries.values(), key=lambda entry: (entry.name, entry.method)):
+        key = f'{entry.method} {entry.name}'
+        lines.append(
+            f'{key:<42} {entry.num_requests:>10} {entry.get_response_time_percentile(0.95):>8.0f} '
+            f'{p95_objective(key):>6} {entry.fail_ratio:>8.1%}'
+        )
+    failed = violations(stats)
+    lines.append('')
+    if failed:
+        lines.extend(f'✗ {key}: {reason}' for key, reason in failed)
+    else:
+        lines.append(f'✓ Todos los SLO cumplidos (error máximo {MAX_ERROR_RATE:.1%})')
+    return not failed, '\n'.join(lines)